@@ -0,0 +1,29 @@
+// Merges patches of graph elements sent by the server into the graph.
+// A full patch replaces all elements, otherwise elements replace
+// the ones with the same id and new elements are added.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    graph: {
+        applyPatch: function(patch, elements) {
+            if (!patch) {
+                return elements || [];
+            }
+            if (patch.full || !elements) {
+                return patch.elements;
+            }
+            var merged = elements.slice();
+            var indexes = {};
+            merged.forEach(function(element, index) {
+                indexes[element.data.id] = index;
+            });
+            patch.elements.forEach(function(element) {
+                if (element.data.id in indexes) {
+                    merged[indexes[element.data.id]] = element;
+                } else {
+                    indexes[element.data.id] = merged.length;
+                    merged.push(element);
+                }
+            });
+            return merged;
+        }
+    }
+});
@@ -1,25 +1,110 @@
 #!/usr/bin/env python3
-from argparse import ArgumentParser
+from argparse import ArgumentParser, Namespace, SUPPRESS
 import sys
 
-from dash import Dash
-from dash_bootstrap_components.themes import BOOTSTRAP
+from tracerface.export import export_file, FORMATS as EXPORT_FORMATS
+from tracerface.headless import FORMATS as HEADLESS_FORMATS, run_headless
 
-from tracerface.init_resources import initialize
+
+# Options of tracing, accepted before and after the headless command.
+# They have no defaults in the parsers, otherwise the defaults of the
+# command would replace options given before it, these are set here instead.
+_TRACING_DEFAULTS = {'aggregate': False, 'shared_memory': False, 'capture': None}
 
 
 def parse_args(args):
-    parser = ArgumentParser(description=__doc__)
+    tracing = ArgumentParser(add_help=False, argument_default=SUPPRESS)
+    tracing.add_argument('--aggregate', action='store_true',
+                         help='Parse call-stacks in the tracing process and only send aggregated counts')
+    tracing.add_argument('--shared-memory', action='store_true',
+                         help='Receive output of the tracing process through a ring buffer in shared memory')
+    tracing.add_argument('--capture', metavar='PATH',
+                         help='Record call-stacks of each trace to a binary capture at the given path')
+    parser = ArgumentParser(description=__doc__, parents=[tracing])
     parser.add_argument('--debug', action='store_true', help='Start server in debug mode')
     parser.add_argument('--routes-logging', action='store_true', help='Show routes access logging in the console')
-    return parser.parse_args(args)
+    parser.add_argument('--adaptive-refresh', action='store_true',
+                        help='Refresh the graph less often while idle and more often while calls arrive')
+    parser.add_argument('--server-layout', action='store_true',
+                        help='Compute positions of nodes on the server instead of laying out the graph in the browser')
+    parser.add_argument('--count-stacks', action='store_true',
+                        help='Count distinct call-stacks while tracing and expand them into the graph on refresh')
+    parser.add_argument('--calling-context', action='store_true',
+                        help='Keep whole paths of call-stacks to show the paths leading to a clicked function')
+    export = parser.add_mutually_exclusive_group()
+    export.add_argument('--export-folded', nargs=2, metavar=('INPUT', 'OUTPUT'),
+                        help='Convert bcc trace output or a capture to folded stacks for flame graphs and exit')
+    export.add_argument('--export-speedscope', nargs=2, metavar=('INPUT', 'OUTPUT'),
+                        help='Convert bcc trace output or a capture to a speedscope profile and exit')
+    commands = parser.add_subparsers(dest='command')
+    headless = commands.add_parser('headless', parents=[tracing],
+                                   help='Trace functions of a config file without the user interface')
+    headless.add_argument('config', metavar='CONFIG', help='Config file of functions to trace, as loaded by the dashboard')
+    headless.add_argument('output', metavar='OUTPUT', help='Path of the file the traced calls are saved to')
+    headless.add_argument('--duration', type=float, metavar='SECONDS',
+                          help='Stop tracing after the given number of seconds instead of on interrupt')
+    headless.add_argument('--format', choices=HEADLESS_FORMATS, default='snapshot',
+                          help='Save a snapshot loadable by the dashboard, a text report or call-stacks for flame graphs')
+    parsed_args = parser.parse_args(args, Namespace(**_TRACING_DEFAULTS))
+    if parsed_args.command and (parsed_args.export_folded or parsed_args.export_speedscope):
+        parser.error('--export-folded and --export-speedscope can not be combined with the {} command'.format(
+            parsed_args.command))
+    if parsed_args.aggregate and parsed_args.capture:
+        parser.error('--capture records call-stacks, which are not received with --aggregate')
+    if parsed_args.aggregate and parsed_args.calling_context:
+        parser.error('--calling-context keeps paths of call-stacks, which are not received with --aggregate')
+    if parsed_args.command == 'headless' and parsed_args.aggregate and parsed_args.format in EXPORT_FORMATS:
+        parser.error('--format {} needs call-stacks, which are not received with --aggregate'.format(parsed_args.format))
+    return parsed_args
+
+
+# Convert call-stacks of a file without starting the user interface
+def export(parsed_args):
+    if parsed_args.export_folded:
+        format, (input_path, output_path) = 'folded', parsed_args.export_folded
+    else:
+        format, (input_path, output_path) = 'speedscope', parsed_args.export_speedscope
+    stacks = export_file(input_path, output_path, format)
+    print('{} call-stacks written to {}'.format(stacks, output_path))
+
 
+# Trace without the user interface and exit with an error if tracing failed
+def headless(parsed_args):
+    error = run_headless(parsed_args.config, parsed_args.output,
+                         format=parsed_args.format,
+                         duration=parsed_args.duration,
+                         aggregate=parsed_args.aggregate,
+                         shared_memory=parsed_args.shared_memory,
+                         capture_path=parsed_args.capture)
+    if error:
+        sys.exit(error)
+    print('Traced calls saved to {}'.format(parsed_args.output))
 
-# Create resources and start application
+
+# Create resources and start application.
+# Dash is only imported here, so exports and headless traces run without it.
 def main(args):
     parsed_args = parse_args(args)
+    if parsed_args.export_folded or parsed_args.export_speedscope:
+        export(parsed_args)
+        return
+    if parsed_args.command == 'headless':
+        headless(parsed_args)
+        return
+
+    from dash import Dash
+    from dash_bootstrap_components.themes import BOOTSTRAP
+    from tracerface.init_resources import initialize
+
     app = Dash(__name__, external_stylesheets=[BOOTSTRAP])
-    initialize(app)
+    initialize(app,
+               aggregate=parsed_args.aggregate,
+               shared_memory=parsed_args.shared_memory,
+               adaptive_refresh=parsed_args.adaptive_refresh,
+               server_layout=parsed_args.server_layout,
+               capture_path=parsed_args.capture,
+               count_stacks=parsed_args.count_stacks,
+               calling_context=parsed_args.calling_context)
     silent = not parsed_args.routes_logging
     app.run_server(debug=parsed_args.debug, dev_tools_silence_routes_logging=silent)
 
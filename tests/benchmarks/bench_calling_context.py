@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+'''
+Benchmark the calling context tree with many distinct call-stacks.
+Reports the time to add them, the memory used per node of the tree,
+and the time of path queries and of the folded stack export.
+
+Usage: python3 -m tests.benchmarks.bench_calling_context [STACKS ...]
+'''
+from io import StringIO
+from random import Random
+import sys
+import time
+import tracemalloc
+
+from tracerface.calling_context import CallingContextTree
+from tracerface.export import write_folded
+from tracerface.symbol_table import SymbolTable
+
+
+# Returns call-stacks given by ids of functions, starting with the traced one
+def _random_stacks(count, functions=1000, max_depth=30, seed=0):
+    rng = Random(seed)
+    return [
+        [rng.randrange(functions) for _ in range(rng.randint(2, max_depth))]
+        for _ in range(count)
+    ]
+
+
+def run(count):
+    stacks = _random_stacks(count)
+    symbols = SymbolTable()
+    for function in range(1000):
+        symbols.get_id('func{}'.format(function), 'synthetic')
+    tracemalloc.start()
+    start = time.perf_counter()
+    tree = CallingContextTree()
+    for stack in stacks:
+        tree.add_stack(stack)
+    add_time = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for function in range(100):
+        tree.paths_to(function, 10)
+    query_time = (time.perf_counter() - start) / 100
+    start = time.perf_counter()
+    output = StringIO()
+    write_folded(tree.iter_stacks(), symbols, output)
+    lines = output.getvalue().count('\n')
+    folded_time = time.perf_counter() - start
+    print('{:>8} stacks: {:>8} nodes added in {:.2f} s, {:.0f} bytes/node, '
+          'paths query {:.2f} ms, {} folded lines in {:.2f} s'.format(
+              count, len(tree), add_time, memory / len(tree), query_time * 1e3, lines, folded_time))
+
+
+def main(args):
+    counts = [int(arg) for arg in args] or [10000, 100000]
+    for count in counts:
+        run(count)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+'''
+Compare loading synthetic bcc trace output with loading
+the same call-stacks from a binary capture.
+
+Usage: python3 -m tests.benchmarks.bench_capture [SIZE_IN_MB ...]
+'''
+from pathlib import Path
+import sys
+from tempfile import TemporaryDirectory
+import time
+
+from tracerface.call_graph import CallGraph
+from tracerface.capture import convert_trace_output, load_capture_to_call_graph
+from tracerface.load_output import load_trace_output_from_file_to_call_graph
+from tests.benchmarks.synthetic import write_synthetic_trace
+
+
+MEGABYTE = 1024 ** 2
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def run(size_mb, directory):
+    output_path = Path(directory).joinpath('trace_{}mb'.format(size_mb))
+    capture_path = Path(directory).joinpath('capture_{}mb'.format(size_mb))
+    stacks = write_synthetic_trace(output_path, int(size_mb * MEGABYTE))
+    text_time = _timed(load_trace_output_from_file_to_call_graph, str(output_path), CallGraph())
+    convert_time = _timed(convert_trace_output, str(output_path), str(capture_path))
+    capture_time = _timed(load_capture_to_call_graph, str(capture_path), CallGraph())
+    print('{:>6} MB, {:>9} stacks: text {:7.2f} s, conversion {:7.2f} s, capture of {:.0f} MB {:7.2f} s'.format(
+        size_mb, stacks, text_time, convert_time, capture_path.stat().st_size / MEGABYTE, capture_time))
+    output_path.unlink()
+    capture_path.unlink()
+
+
+def main(args):
+    sizes = [float(arg) for arg in args] or [100, 500]
+    with TemporaryDirectory() as directory:
+        for size in sizes:
+            run(size, directory)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+'''
+Benchmark keeping color bounds up to date during live tracing,
+where colors are initialized after every loaded batch of stacks.
+
+Usage: python3 -m tests.benchmarks.bench_color_bounds [NODES] [STACKS]
+'''
+from random import Random
+import sys
+import time
+
+from tracerface.call_graph import CallGraph
+
+
+def run(node_count, stack_count):
+    rng = Random(0)
+    call_graph = CallGraph()
+    call_graph.load_nodes({
+        node_id: {'name': 'func{}'.format(node_id), 'source': 'synthetic', 'call_count': 0}
+        for node_id in range(node_count)
+    })
+    start = time.perf_counter()
+    for _ in range(stack_count):
+        node_id = rng.randrange(node_count)
+        call_graph.load_nodes({node_id: {'name': 'func{}'.format(node_id), 'source': 'synthetic', 'call_count': 1}})
+        call_graph.init_colors()
+    elapsed = time.perf_counter() - start
+    print('{} nodes, {} stacks: {:.2f} s, {:.2f} us per stack, max count {}'.format(
+        node_count, stack_count, elapsed, elapsed / stack_count * 1e6, call_graph.max_count()))
+
+
+def main(args):
+    node_count = int(args[0]) if len(args) > 0 else 50000
+    stack_count = int(args[1]) if len(args) > 1 else 1000000
+    run(node_count, stack_count)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+'''
+Benchmark exporting synthetic bcc trace output and its capture
+to folded stacks and speedscope profiles. Reports the time of every
+export and the peak resident memory, which should not grow with the
+size of the output.
+
+Usage: python3 -m tests.benchmarks.bench_export [SIZE_IN_MB ...]
+'''
+from pathlib import Path
+import resource
+import sys
+from tempfile import TemporaryDirectory
+import time
+
+from tracerface.capture import convert_trace_output
+from tracerface.export import export_file, FORMATS
+from tests.benchmarks.synthetic import write_synthetic_trace
+
+
+MEGABYTE = 1024 ** 2
+
+
+# Peak resident set size of the current process in megabytes
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(size_mb, directory):
+    output_path = Path(directory).joinpath('trace_{}mb'.format(size_mb))
+    capture_path = Path(directory).joinpath('capture_{}mb'.format(size_mb))
+    export_path = Path(directory).joinpath('export')
+    write_synthetic_trace(output_path, int(size_mb * MEGABYTE))
+    convert_trace_output(str(output_path), str(capture_path))
+    for input_path in [output_path, capture_path]:
+        for format in FORMATS:
+            start = time.perf_counter()
+            stacks = export_file(str(input_path), str(export_path), format)
+            print('{:>6} MB {:>8} to {:>10}: {:>9} stacks in {:6.2f} s, {:6.2f} MB written, peak RSS {:.0f} MB'.format(
+                size_mb, input_path.name.split('_')[0], format, stacks, time.perf_counter() - start,
+                export_path.stat().st_size / MEGABYTE, _peak_rss_mb()))
+    output_path.unlink()
+    capture_path.unlink()
+    export_path.unlink()
+
+
+def main(args):
+    sizes = [float(arg) for arg in args] or [100, 1000]
+    with TemporaryDirectory() as directory:
+        for size in sizes:
+            run(size, directory)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+'''
+Benchmark loading large synthetic bcc trace outputs into the call graph.
+Reports the peak resident memory and the number of stacks parsed per second,
+then the time of loading the same output with parallel workers.
+
+Usage: python3 -m tests.benchmarks.bench_load_output [SIZE_IN_GB ...]
+'''
+import os
+from pathlib import Path
+import resource
+import sys
+from tempfile import TemporaryDirectory
+import time
+
+from tracerface.call_graph import CallGraph
+from tracerface.load_output import load_trace_output_from_file_to_call_graph, load_trace_output_in_parallel
+from tests.benchmarks.synthetic import write_synthetic_trace
+
+
+GIGABYTE = 1024 ** 3
+
+
+# Peak resident set size of the current process in megabytes
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(size_gb, directory):
+    path = Path(directory).joinpath('trace_{}gb'.format(size_gb))
+    stacks = write_synthetic_trace(path, int(size_gb * GIGABYTE))
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    load_trace_output_from_file_to_call_graph(str(path), CallGraph())
+    elapsed = time.perf_counter() - start
+    print('{:>5} GB: {:>10} stacks in {:8.1f} s, {:10.0f} stacks/s, peak RSS {:.0f} MB (before load {:.0f} MB)'.format(
+        size_gb, stacks, elapsed, stacks / elapsed, _peak_rss_mb(), rss_before))
+    start = time.perf_counter()
+    load_trace_output_in_parallel(str(path), CallGraph())
+    parallel_elapsed = time.perf_counter() - start
+    path.unlink()
+    print('{:>5} GB in parallel on {} cores: {:8.1f} s, {:.1f} times faster'.format(
+        size_gb, os.cpu_count(), parallel_elapsed, elapsed / parallel_elapsed))
+
+
+def main(args):
+    sizes = [float(arg) for arg in args] or [1, 5]
+    with TemporaryDirectory() as directory:
+        for size in sizes:
+            run(size, directory)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
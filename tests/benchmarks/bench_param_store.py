@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+'''
+Track memory used by the parameters of a single edge while
+a growing number of calls with traced arguments is recorded.
+
+Usage: python3 -m tests.benchmarks.bench_param_store [CALLS]
+'''
+from random import Random
+import sys
+import time
+import tracemalloc
+
+from tracerface.call_graph import CallGraph
+
+
+# Load calls of an edge with random parameters, calling
+# the given function after every power of ten calls
+def _load_calls(calls, checkpoint=lambda index: None):
+    rng = Random(0)
+    call_graph = CallGraph()
+    edge = ('caller', 'called')
+    next_checkpoint = 1000
+    for index in range(1, calls + 1):
+        param = [str(rng.randrange(1000000)), 'b{}'.format(rng.randrange(10))]
+        call_graph.load_edges({edge: {'param': param, 'call_count': 1}})
+        if index == next_checkpoint:
+            checkpoint(index)
+            next_checkpoint *= 10
+
+
+def run(calls):
+    start = time.perf_counter()
+    _load_calls(calls)
+    elapsed = time.perf_counter() - start
+    print('{:.2f} us per call'.format(elapsed / calls * 1e6))
+
+    tracemalloc.start()
+    _load_calls(calls, lambda index: print('{:>10} calls: {:8.1f} KB in use'.format(
+        index, tracemalloc.get_traced_memory()[0] / 1024)))
+    tracemalloc.stop()
+
+
+def main(args):
+    run(int(args[0]) if args else 1000000)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+'''
+Microbenchmark of parse_stack for growing stack depths.
+The time spent per frame should stay roughly constant,
+which means parsing scales linearly with the depth of the stack.
+Then a trace repeating a few hundred distinct stacks is aggregated
+with and without a StackCache, and by counting distinct stacks.
+
+Usage: python3 -m tests.benchmarks.bench_parse_stack [DEPTH ...]
+'''
+import sys
+import time
+import timeit
+
+from tracerface.aggregate import Aggregate
+from tracerface.parse_stack import parse_stack, StackCache
+from tracerface.symbol_table import SymbolTable
+from tests.benchmarks.synthetic import synthetic_stack, synthetic_stack_texts
+
+
+# Returns the average time in seconds needed to parse a stack of given depth
+def measure(depth, repeat=5):
+    stack = synthetic_stack(depth, functions=depth, seed=depth)
+    number = max(1, 20000 // depth)
+    best = min(timeit.repeat(lambda: parse_stack(stack), number=number, repeat=repeat))
+    return best / number
+
+
+# Returns seconds needed to aggregate repeated stacks with a cache keeping
+# none and all of them, then with the cache and distinct stacks counted
+# before they are expanded, and the counters of the cache
+def measure_repeated(distinct=500, stacks=200000):
+    pool = [text.rstrip('\n').split('\n') for text in synthetic_stack_texts(distinct)]
+    trace = [list(pool[index % distinct]) for index in range(stacks)]
+    times = []
+    for size, count_stacks in [(0, False), (distinct, False), (distinct, True)]:
+        symbols = SymbolTable()
+        cache = StackCache(symbols, size)
+        aggregate = Aggregate(symbols, cache, count_stacks)
+        start = time.perf_counter()
+        for stack in trace:
+            aggregate.add_stack(stack)
+        aggregate.get_nodes()
+        times.append(time.perf_counter() - start)
+    return times, cache.stats()
+
+
+def main(args):
+    depths = [int(arg) for arg in args] or [10, 100, 1000]
+    baseline = None
+    for depth in depths:
+        per_stack = measure(depth)
+        per_frame = per_stack / depth
+        baseline = baseline or per_frame
+        print('depth {:>6}: {:10.1f} us/stack, {:6.2f} us/frame ({:.2f}x of depth {})'.format(
+            depth, per_stack * 1e6, per_frame * 1e6, per_frame / baseline, depths[0]))
+    (uncached, cached, counted), stats = measure_repeated()
+    print('repeated stacks: {:.2f} s uncached, {:.2f} s cached ({:.1f}x), {:.2f} s counted ({:.1f}x), {}'.format(
+        uncached, cached, uncached / cached, counted, uncached / counted, stats))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
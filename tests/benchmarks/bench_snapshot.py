@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+'''
+Benchmark saving and loading snapshots of a large call graph.
+
+Usage: python3 -m tests.benchmarks.bench_snapshot [NODES] [EDGES]
+'''
+from pathlib import Path
+from random import Random
+import sys
+from tempfile import TemporaryDirectory
+import time
+
+from tracerface.call_graph import CallGraph
+from tracerface.snapshot import load_snapshot, save_snapshot
+
+
+def _random_call_graph(node_count, edge_count):
+    rng = Random(0)
+    call_graph = CallGraph()
+    symbols = call_graph.get_symbols()
+    ids = [symbols.get_id('func{}'.format(index), 'synthetic') for index in range(node_count)]
+    call_graph.load_nodes({
+        node_id: {'name': 'func{}'.format(index), 'source': 'synthetic', 'call_count': rng.randrange(1000)}
+        for index, node_id in enumerate(ids)
+    })
+    edges = {}
+    while len(edges) < edge_count:
+        edge = (rng.choice(ids), rng.choice(ids))
+        edges[edge] = {'param': [str(rng.randrange(100))], 'call_count': 1}
+    call_graph.load_edges(edges)
+    return call_graph
+
+
+def run(node_count, edge_count):
+    call_graph = _random_call_graph(node_count, edge_count)
+    with TemporaryDirectory() as directory:
+        path = Path(directory).joinpath('snapshot')
+        start = time.perf_counter()
+        save_snapshot(call_graph, str(path))
+        save_time = time.perf_counter() - start
+        start = time.perf_counter()
+        load_snapshot(str(path), CallGraph())
+        load_time = time.perf_counter() - start
+        size = path.stat().st_size
+    print('{} nodes, {} edges: saved in {:.2f} s, {:.1f} MB, loaded in {:.2f} s'.format(
+        node_count, edge_count, save_time, size / 1024 ** 2, load_time))
+
+
+def main(args):
+    node_count = int(args[0]) if len(args) > 0 else 50000
+    edge_count = int(args[1]) if len(args) > 1 else 200000
+    run(node_count, edge_count)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+'''
+Throughput benchmark of the output transport between the tracing
+process and its consumer. A fake bcc trace tool prints synthetic
+call-stacks line by line, the same way bcc trace does.
+
+Usage: python3 -m tests.benchmarks.bench_trace_process [STACK_COUNT]
+'''
+import sys
+import time
+from unittest import mock
+
+from tracerface.trace_process import TraceProcess
+from tests.benchmarks.synthetic import synthetic_stack
+
+
+# Stand-in for the bcc trace Tool printing a fixed amount of stacks
+class FakeTool:
+    def __init__(self, count):
+        self._count = count
+        self._stacks = [synthetic_stack(20, seed=seed) for seed in range(100)]
+
+    def run(self):
+        for index in range(self._count):
+            for line in self._stacks[index % len(self._stacks)]:
+                print(line)
+            print()
+
+
+def run(count):
+    tool = FakeTool(count)
+    lines = sum(len(tool._stacks[index % len(tool._stacks)]) + 1 for index in range(count))
+    with mock.patch('tracerface.trace_process._get_bcc_trace_tool', return_value=tool):
+        process = TraceProcess(args=[])
+        start = time.perf_counter()
+        process.start()
+        received = 0
+        while received < count:
+            received += len(process.get_stacks(timeout=1))
+        elapsed = time.perf_counter() - start
+        process.join()
+    print('{} stacks ({} lines) in {:.2f} s: {:.0f} stacks/s, {:.0f} lines/s'.format(
+        count, lines, elapsed, count / elapsed, lines / elapsed))
+
+
+def main(args):
+    run(int(args[0]) if args else 100000)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
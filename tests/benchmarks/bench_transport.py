@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+'''
+Compare the multiprocessing queue and the shared memory ring buffer
+as transport of call-stacks from the tracing process. A fake bcc trace
+tool prints synthetic stacks at a fixed rate of lines per second.
+
+Usage: python3 -m tests.benchmarks.bench_transport [LINES_PER_SECOND ...]
+'''
+import sys
+import time
+from unittest import mock
+
+from tracerface.trace_process import TraceProcess
+from tests.benchmarks.synthetic import synthetic_stack
+
+
+DURATION = 2 # seconds
+TICK = 0.01 # seconds
+
+
+# Stand-in for the bcc trace Tool printing stacks at a given rate
+class PacedTool:
+    def __init__(self, lines_per_second):
+        self.stack = synthetic_stack(20, seed=0)
+        self.stacks_per_tick = max(1, round(lines_per_second * TICK / (len(self.stack) + 1)))
+
+    def run(self):
+        start = time.monotonic()
+        tick = 0
+        while tick * TICK < DURATION:
+            for _ in range(self.stacks_per_tick):
+                for line in self.stack:
+                    print(line)
+                print()
+            tick += 1
+            delay = start + tick * TICK - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+
+def run(lines_per_second, shared_memory):
+    tool = PacedTool(lines_per_second)
+    with mock.patch('tracerface.trace_process._get_bcc_trace_tool', return_value=tool):
+        process = TraceProcess(args=[], shared_memory=shared_memory)
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        process.start()
+        received = 0
+        while process.is_alive():
+            received += len(process.get_stacks(timeout=0.1))
+        received += len(process.get_stacks(timeout=0.1))
+        elapsed = time.perf_counter() - start
+        cpu_time = time.process_time() - cpu_start
+        dropped = process.get_dropped()
+        process.release()
+    lines = received * (len(tool.stack) + 1)
+    print('{:>13} {:>9} lines/s: {:>9.0f} lines/s received, {:>7} stacks dropped, consumer CPU {:.2f} s'.format(
+        'shared memory' if shared_memory else 'queue', lines_per_second, lines / elapsed, dropped, cpu_time))
+
+
+def main(args):
+    rates = [int(arg) for arg in args] or [10000, 100000, 1000000]
+    for rate in rates:
+        run(rate, shared_memory=False)
+        run(rate, shared_memory=True)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
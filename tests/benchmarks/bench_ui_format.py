@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+'''
+Benchmark converting a large call graph to the format of cytoscape,
+which is done on every refresh of the graph view, and updating
+the cache of converted elements after a few calls, and pruning
+the graph to its most called nodes. Positions of nodes are
+computed for the whole graph and after a few new nodes.
+
+Usage: python3 -m tests.benchmarks.bench_ui_format [NODES] [EDGES]
+'''
+from random import Random
+import sys
+import time
+
+from tracerface.call_graph import CallGraph
+from tracerface.web_ui.ui_format import (
+    convert_edges_to_cytoscape_format,
+    convert_nodes_to_cytoscape_format,
+    ElementCache
+)
+from tracerface.web_ui.layered_layout import LayeredLayout
+
+
+def _random_call_graph(node_count, edge_count):
+    rng = Random(0)
+    call_graph = CallGraph()
+    call_graph.load_nodes({
+        node_id: {'name': 'func{}'.format(node_id), 'source': 'synthetic', 'call_count': 1}
+        for node_id in range(node_count)
+    })
+    edges = {}
+    while len(edges) < edge_count:
+        edge = (rng.randrange(node_count), rng.randrange(node_count))
+        edges[edge] = {'param': [str(rng.randrange(100))], 'call_count': 1}
+    call_graph.load_edges(edges)
+    call_graph.init_colors()
+    return call_graph
+
+
+def run(node_count, edge_count):
+    call_graph = _random_call_graph(node_count, edge_count)
+    start = time.perf_counter()
+    nodes = convert_nodes_to_cytoscape_format(
+        call_graph.get_nodes(),
+        call_graph.get_edges(),
+        call_graph.get_callers_index())
+    edges = convert_edges_to_cytoscape_format(call_graph.get_nodes(), call_graph.get_edges())
+    elapsed = time.perf_counter() - start
+    print('{} nodes, {} edges: {:.3f} s'.format(len(nodes), len(edges), elapsed))
+
+    cache = ElementCache(call_graph)
+    cache.update()
+    call_graph.load_edges({edge: {'param': ['changed'], 'call_count': 1} for edge in list(call_graph.get_edges())[:10]})
+    start = time.perf_counter()
+    cache.update()
+    elapsed = time.perf_counter() - start
+    print('cache update after 10 changed edges: {:.3f} ms'.format(elapsed * 1000))
+
+    start = time.perf_counter()
+    patch = cache.get_patch(None, {'top': 200})
+    elapsed = time.perf_counter() - start
+    print('patch pruned to 200 nodes: {} elements, {:.3f} ms'.format(len(patch['elements']), elapsed * 1000))
+
+    layout = LayeredLayout()
+    start = time.perf_counter()
+    layout.add_nodes(call_graph, call_graph.get_nodes())
+    elapsed = time.perf_counter() - start
+    print('layout of all nodes: {:.3f} s'.format(elapsed))
+    call_graph.load_edges({(0, node_count + index): {'param': [], 'call_count': 1} for index in range(10)})
+    start = time.perf_counter()
+    layout.add_nodes(call_graph, range(node_count, node_count + 10))
+    elapsed = time.perf_counter() - start
+    print('layout of 10 new nodes: {:.3f} ms'.format(elapsed * 1000))
+
+
+def main(args):
+    node_count = int(args[0]) if len(args) > 0 else 10000
+    edge_count = int(args[1]) if len(args) > 1 else 50000
+    run(node_count, edge_count)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
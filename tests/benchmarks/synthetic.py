@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+'''
+Helpers generating synthetic bcc trace output for the benchmarks
+'''
+from random import Random
+
+
+HEADER = 'PID     TID     COMM            FUNC             -'
+
+
+# Returns the lines of a single call-stack in bcc trace output format
+def synthetic_stack(depth, functions=1000, params='', seed=None):
+    rng = Random(seed)
+    lines = ['78862   78862   synthetic       func0            {}'.format(params), '        -14']
+    for _ in range(depth):
+        index = rng.randrange(functions)
+        lines.append('        func{}+0x{:x} [synthetic_{}]'.format(index, rng.randrange(256), index % 7))
+    return lines
+
+
+# Returns a pool of distinct stacks in text form, terminated by an empty line
+def synthetic_stack_texts(count=500, max_depth=30, seed=0):
+    rng = Random(seed)
+    return [
+        '\n'.join(synthetic_stack(rng.randint(2, max_depth), seed=rng.random())) + '\n\n'
+        for _ in range(count)
+    ]
+
+
+# Write synthetic trace output of at least the given size to a file
+# and return the number of stacks written
+def write_synthetic_trace(path, size_bytes, seed=0):
+    texts = synthetic_stack_texts(seed=seed)
+    chunk = ''.join(texts)
+    written = 0
+    stacks = 0
+    with open(path, 'w') as output:
+        output.write(HEADER + '\n')
+        while written < size_bytes:
+            output.write(chunk)
+            written += len(chunk)
+            stacks += len(texts)
+    return stacks
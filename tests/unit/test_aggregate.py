@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+import pickle
+from unittest import main, TestCase
+
+from tracerface.aggregate import Aggregate
+from tracerface.symbol_table import SymbolTable
+
+
+def _stack(param=''):
+    return [
+        "19059  19059  dummy_source1 func1        {}".format(param),
+        "-14",
+        "b'func1+0x0 [dummy_source1]'",
+        "b'func2+0x26 [dummy_source1]'"
+    ]
+
+
+class TestAggregate(TestCase):
+    def test_new_aggregate_is_empty(self):
+        aggregate = Aggregate()
+        self.assertTrue(aggregate.is_empty())
+        self.assertEqual(aggregate.get_nodes(), {})
+        self.assertEqual(aggregate.get_edges(), {})
+
+    def test_add_stack_sums_counts_and_collects_params(self):
+        aggregate = Aggregate()
+        aggregate.add_stack(_stack())
+        aggregate.add_stack(_stack("b'param1'"))
+
+        nodes = sorted(aggregate.get_nodes().values(), key=lambda node: node['name'])
+        self.assertEqual(nodes, [
+            {'name': 'func1', 'source': 'dummy_source1', 'call_count': 2},
+            {'name': 'func2', 'source': 'dummy_source1', 'call_count': 0}
+        ])
+        edge = list(aggregate.get_edges().values())[0]
+        self.assertEqual(edge['call_count'], 2)
+        self.assertEqual(edge['params'].get_samples(), [['param1']])
+        self.assertEqual(aggregate.stack_count(), 2)
+
+    def test_add_frames_counts_like_add_stack(self):
+        by_stack = Aggregate()
+        by_stack.add_stack(_stack("b'param1'"))
+        by_stack.add_stack(_stack("b'param1'"))
+        symbols = SymbolTable()
+        by_frames = Aggregate(symbols)
+        func1 = symbols.get_id('func1', 'dummy_source1')
+        func2 = symbols.get_id('func2', 'dummy_source1')
+        by_frames.add_frames([func1, func2], ['param1'], count=2)
+
+        self.assertEqual(by_frames.get_nodes(), by_stack.get_nodes())
+        self.assertEqual(list(by_frames.get_edges()), list(by_stack.get_edges()))
+        edge = by_frames.get_edges()[(func2, func1)]
+        self.assertEqual(edge['call_count'], 2)
+        self.assertEqual(edge['params'].get_samples(), [['param1'], ['param1']])
+        self.assertEqual(by_frames.stack_count(), 2)
+
+    def test_merge_sums_counts_of_same_functions(self):
+        first = Aggregate()
+        first.add_stack(_stack("b'param1'"))
+        second = Aggregate()
+        second.add_stack(_stack())
+        second.add_stack(_stack("b'param2'"))
+        second.add_stack([
+            "19059  19059  dummy_source1 func3        ",
+            "-14",
+            "b'func3+0x0 [dummy_source1]'",
+            "b'func1+0x26 [dummy_source1]'"
+        ])
+
+        result = first.merge(second)
+        self.assertIs(result, first)
+        nodes = sorted(first.get_nodes().values(), key=lambda node: node['name'])
+        self.assertEqual([(node['name'], node['call_count']) for node in nodes], [
+            ('func1', 3), ('func2', 0), ('func3', 1)
+        ])
+        self.assertEqual(len(first.get_edges()), 2)
+        edge = list(first.get_edges().values())[0]
+        self.assertEqual(edge['call_count'], 3)
+        self.assertEqual(edge['params'].get_samples(), [['param1'], ['param2']])
+        self.assertEqual(first.stack_count(), 4)
+
+    def test_merge_is_associative(self):
+        def aggregate(*params):
+            result = Aggregate()
+            for param in params:
+                result.add_stack(_stack(param))
+            return result
+
+        left = aggregate("b'a'").merge(aggregate("b'b'")).merge(aggregate("b'c'"))
+        right = aggregate("b'a'").merge(aggregate("b'b'").merge(aggregate("b'c'")))
+        self.assertEqual(left.get_nodes(), right.get_nodes())
+        self.assertEqual(
+            [(edge['call_count'], edge['params'].get_samples()) for edge in left.get_edges().values()],
+            [(edge['call_count'], edge['params'].get_samples()) for edge in right.get_edges().values()])
+
+    def test_merge_accepts_pickled_aggregate(self):
+        partial = Aggregate()
+        partial.add_stack(_stack())
+        aggregate = Aggregate()
+        aggregate.merge(pickle.loads(pickle.dumps(partial)))
+        self.assertEqual(aggregate.get_nodes(), partial.get_nodes())
+        self.assertEqual(aggregate.stack_count(), 1)
+
+    def test_counted_stacks_are_expanded_like_added_ones(self):
+        added = Aggregate()
+        counted = Aggregate(count_stacks=True)
+        for param in ["b'param1'", '', "b'param1'"]:
+            added.add_stack(_stack(param))
+            counted.add_stack(_stack(param))
+
+        self.assertEqual(len(counted.get_stack_counts()), 2)
+        self.assertEqual(counted.stack_count(), 3)
+        self.assertEqual(counted.get_nodes(), added.get_nodes())
+        self.assertEqual(
+            [(edge['call_count'], edge['params'].get_samples()) for edge in counted.get_edges().values()],
+            [(edge['call_count'], edge['params'].get_samples()) for edge in added.get_edges().values()])
+        self.assertEqual(counted.get_stack_counts(), {})
+
+    def test_added_frames_are_counted_as_stacks(self):
+        symbols = SymbolTable()
+        ids = (symbols.get_id('func1', 'source'), symbols.get_id('main', 'source'))
+        aggregate = Aggregate(symbols, count_stacks=True)
+        aggregate.add_frames(ids, ['param1'], 3)
+        aggregate.add_frames(ids, None, 2)
+
+        self.assertEqual(aggregate.get_stack_counts(), {(ids, ('param1',)): 3, (ids, None): 2})
+        self.assertEqual(aggregate.stack_count(), 5)
+        self.assertEqual(aggregate.get_nodes()[ids[0]]['call_count'], 5)
+
+    def test_stack_counts_are_summed(self):
+        symbols = SymbolTable()
+        first = Aggregate(symbols, count_stacks=True)
+        first.add_stack(_stack())
+        second = Aggregate(symbols, count_stacks=True)
+        second.add_stack(_stack())
+        second.add_stack_counts(first.get_stack_counts())
+
+        self.assertEqual(list(second.get_stack_counts().values()), [2])
+        self.assertEqual(second.stack_count(), 2)
+
+    def test_pickled_aggregate_expands_counted_stacks(self):
+        aggregate = Aggregate(count_stacks=True)
+        aggregate.add_stack(_stack())
+
+        result = pickle.loads(pickle.dumps(aggregate))
+        self.assertEqual(len(result.get_nodes()), 2)
+        self.assertEqual(result.get_stack_counts(), {})
+
+    def test_pickled_aggregate_keeps_counts_only(self):
+        aggregate = Aggregate()
+        aggregate.add_stack(_stack())
+
+        result = pickle.loads(pickle.dumps(aggregate))
+        self.assertEqual(result.get_nodes(), aggregate.get_nodes())
+        self.assertEqual(list(result.get_edges()), list(aggregate.get_edges()))
+        self.assertEqual(
+            [edge['params'].get_samples() for edge in result.get_edges().values()],
+            [edge['params'].get_samples() for edge in aggregate.get_edges().values()])
+        self.assertIsNone(result._symbols)
+
+
+if __name__ == '__main__':
+    main()
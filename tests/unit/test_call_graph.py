@@ -1,9 +1,18 @@
 #!/usr/bin/env python3
 from unittest import main, TestCase
 
+from tracerface.aggregate import Aggregate
 from tracerface.call_graph import CallGraph
 
 
+# Return edges of the call graph with sampled parameters instead of their stores
+def _edges_with_samples(call_graph):
+    return {
+        edge_id: {'params': edge['params'].get_samples(), 'call_count': edge['call_count']}
+        for edge_id, edge in call_graph.get_edges().items()
+    }
+
+
 class TestConstructor(TestCase):
     def test_initial_call_graph(self):
         call_graph = CallGraph()
@@ -46,7 +55,7 @@ class TestGetEdges(TestCase):
             ('node_hash1', 'node_hash2'): {'params': [], 'call_count': 0},
             ('node_hash3', 'node_hash4'): {'params': [['dummy_param']], 'call_count': 3}
         }
-        self.assertEqual(call_graph.get_edges(), expected_edges)
+        self.assertEqual(_edges_with_samples(call_graph), expected_edges)
 
 
 class TestLoadNodes(TestCase):
@@ -90,7 +99,233 @@ class TestLoadEdges(TestCase):
                 'params': [['dummy_param1'], ['dummy_param2', 'dummy_param3']], 'call_count': 6
             }
         }
-        self.assertEqual(call_graph.get_edges(), expected_edges)
+        self.assertEqual(_edges_with_samples(call_graph), expected_edges)
+
+
+class TestAdjacency(TestCase):
+    def test_callers_and_callees_are_indexed_by_loaded_edges(self):
+        call_graph = CallGraph()
+        call_graph.load_edges({
+            ('node_hash1', 'node_hash2'): {'param': [], 'call_count': 0},
+            ('node_hash3', 'node_hash2'): {'param': [], 'call_count': 1}
+        })
+        call_graph.load_edges({
+            ('node_hash1', 'node_hash2'): {'param': [], 'call_count': 1},
+            ('node_hash1', 'node_hash3'): {'param': [], 'call_count': 1}
+        })
+        self.assertEqual(call_graph.get_callers('node_hash2'), ['node_hash1', 'node_hash3'])
+        self.assertEqual(call_graph.get_callees('node_hash1'), ['node_hash2', 'node_hash3'])
+        self.assertEqual(call_graph.get_callers('node_hash1'), [])
+        self.assertEqual(call_graph.get_callers_index(), {
+            'node_hash2': ['node_hash1', 'node_hash3'],
+            'node_hash3': ['node_hash1']
+        })
+
+    def test_clear_removes_index(self):
+        call_graph = CallGraph()
+        call_graph.load_edges({('node_hash1', 'node_hash2'): {'param': [], 'call_count': 0}})
+        call_graph.clear()
+        self.assertEqual(call_graph.get_callers('node_hash2'), [])
+        self.assertEqual(call_graph.get_callees('node_hash1'), [])
+
+
+class TestVersions(TestCase):
+    def _node(self, call_count=1):
+        return {'name': 'dummy_name', 'source': 'dummy_source', 'call_count': call_count}
+
+    def test_version_only_changes_with_elements(self):
+        call_graph = CallGraph()
+        self.assertEqual(call_graph.version(), 0)
+        call_graph.load_nodes({'node_hash1': self._node()})
+        version = call_graph.version()
+        self.assertEqual(version, 1)
+        self.assertEqual(call_graph.version(), version)
+        call_graph.load_nodes({})
+        self.assertEqual(call_graph.version(), version)
+
+    def test_changes_since_version(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({'node_hash1': self._node(), 'node_hash2': self._node()})
+        version = call_graph.version()
+        call_graph.load_edges({('node_hash1', 'node_hash2'): {'param': [], 'call_count': 1}})
+        call_graph.load_nodes({'node_hash2': self._node()})
+        self.assertEqual(call_graph.changes_since(version), (2, ({'node_hash2'}, {('node_hash1', 'node_hash2')})))
+        self.assertEqual(call_graph.changes_since(0)[1][0], {'node_hash1', 'node_hash2'})
+        self.assertEqual(call_graph.changes_since(2), (2, (set(), set())))
+
+    def test_changes_until_version(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({'node_hash1': self._node()})
+        call_graph.version()
+        call_graph.load_nodes({'node_hash2': self._node()})
+        self.assertEqual(call_graph.changes_since(0, 1), (1, ({'node_hash1'}, set())))
+        self.assertEqual(call_graph.changes_since(1, 5), (2, ({'node_hash2'}, set())))
+
+    def test_changes_are_unknown_after_clear(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({'node_hash1': self._node()})
+        version = call_graph.version()
+        call_graph.clear()
+        self.assertEqual(call_graph.changes_since(version), (version + 1, None))
+        self.assertEqual(call_graph.changes_since(version + 1), (version + 1, (set(), set())))
+
+    def test_changes_are_unknown_before_history(self):
+        call_graph = CallGraph()
+        for index in range(100):
+            call_graph.load_nodes({index: self._node()})
+            call_graph.version()
+        self.assertEqual(call_graph.changes_since(0), (100, None))
+        self.assertEqual(call_graph.changes_since(99), (100, ({99}, set())))
+
+    def test_changes_are_unknown_for_future_version(self):
+        call_graph = CallGraph()
+        self.assertEqual(call_graph.changes_since(5), (0, None))
+
+
+class TestSnapshot(TestCase):
+    def _call_graph(self):
+        call_graph = CallGraph()
+        func1 = call_graph.get_symbols().get_id('func1', 'source')
+        func2 = call_graph.get_symbols().get_id('func2', 'source')
+        call_graph.load_nodes({
+            func1: {'name': 'func1', 'source': 'source', 'call_count': 3},
+            func2: {'name': 'func2', 'source': 'source', 'call_count': 0}
+        })
+        call_graph.load_edges({(func2, func1): {'param': ['param1'], 'call_count': 3}})
+        call_graph.set_colors(1, 2)
+        call_graph.element_clicked(str(func1))
+        call_graph.element_clicked('{}-{}'.format(func2, func1))
+        return call_graph
+
+    def test_snapshot_restores_graph_with_own_ids(self):
+        snapshot = self._call_graph().to_snapshot()
+        call_graph = CallGraph()
+        call_graph.get_symbols().get_id('other', 'source')
+        call_graph.load_snapshot(snapshot)
+
+        func1 = call_graph.get_symbols().get_id('func1', 'source')
+        func2 = call_graph.get_symbols().get_id('func2', 'source')
+        self.assertEqual(call_graph.get_nodes()[func1]['call_count'], 3)
+        self.assertEqual(list(call_graph.get_edges()), [(func2, func1)])
+        self.assertEqual(call_graph.get_edges()[(func2, func1)]['params'].get_samples(), [['param1']])
+        self.assertEqual((call_graph.get_yellow(), call_graph.get_red()), (1, 2))
+        self.assertEqual(call_graph.get_expanded_elements(), [str(func1), '{}-{}'.format(func2, func1)])
+        self.assertEqual(call_graph.max_count(), 3)
+
+    def test_snapshot_replaces_graph(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({'node_hash1': {'name': 'func3', 'source': 'source', 'call_count': 7}})
+        call_graph.load_snapshot(self._call_graph().to_snapshot())
+        self.assertEqual(sorted(node['name'] for node in call_graph.get_nodes().values()), ['func1', 'func2'])
+
+    def test_merged_snapshot_adds_counts(self):
+        call_graph = self._call_graph()
+        call_graph.load_snapshot(self._call_graph().to_snapshot(), merge=True)
+        func1 = call_graph.get_symbols().get_id('func1', 'source')
+        func2 = call_graph.get_symbols().get_id('func2', 'source')
+        self.assertEqual(call_graph.get_nodes()[func1]['call_count'], 6)
+        self.assertEqual(call_graph.get_edges()[(func2, func1)]['call_count'], 6)
+        self.assertEqual(call_graph.get_edges()[(func2, func1)]['params'].seen(), 2)
+        self.assertEqual((call_graph.get_yellow(), call_graph.get_red()), (2, 4))
+
+
+class TestParamStorage(TestCase):
+    def test_parameters_of_edges_are_bounded(self):
+        call_graph = CallGraph(sample_size=5, top_k=2)
+        for index in range(100):
+            call_graph.load_edges({
+                ('node_hash1', 'node_hash2'): {'param': ['dummy_param{}'.format(index % 10)], 'call_count': 1}
+            })
+        params = call_graph.get_edges()[('node_hash1', 'node_hash2')]['params']
+        self.assertEqual(len(params.get_samples()), 5)
+        self.assertEqual(params.seen(), 100)
+        self.assertEqual(params.distinct_count(), 10)
+
+
+class TestLoadAggregate(TestCase):
+    def test_load_aggregate_translates_ids_and_merges_counts(self):
+        aggregate = Aggregate()
+        aggregate.add_stack([
+            "19059  19059  dummy_source1 func1        b'param1'",
+            "b'func1+0x0 [dummy_source1]'",
+            "b'func2+0x26 [dummy_source1]'"
+        ])
+        call_graph = CallGraph()
+        func2 = call_graph.get_symbols().get_id('func2', 'dummy_source1')
+        func1 = call_graph.get_symbols().get_id('func1', 'dummy_source1')
+
+        call_graph.load_aggregate(aggregate)
+        call_graph.load_aggregate(aggregate)
+
+        self.assertEqual(call_graph.get_nodes(), {
+            func1: {'name': 'func1', 'source': 'dummy_source1', 'call_count': 2},
+            func2: {'name': 'func2', 'source': 'dummy_source1', 'call_count': 0}
+        })
+        self.assertEqual(_edges_with_samples(call_graph), {
+            (func2, func1): {'params': [['param1'], ['param1']], 'call_count': 2}
+        })
+
+
+class TestDeferAggregate(TestCase):
+    def _counted_aggregate(self, call_graph, count=3):
+        aggregate = Aggregate(call_graph.get_symbols(), count_stacks=True)
+        for _ in range(count):
+            aggregate.add_stack([
+                "19059  19059  dummy_source1 func1 b'param1'",
+                "-14",
+                "b'func1+0x0 [dummy_source1]'",
+                "b'func2+0x26 [dummy_source1]'"
+            ])
+        return aggregate
+
+    def test_deferred_stacks_are_expanded_on_new_version(self):
+        call_graph = CallGraph()
+        call_graph.defer_aggregate(self._counted_aggregate(call_graph))
+        call_graph.defer_aggregate(self._counted_aggregate(call_graph, 2))
+        self.assertEqual(call_graph.get_nodes(), {})
+
+        self.assertEqual(call_graph.version(), 1)
+        nodes = sorted(call_graph.get_nodes().values(), key=lambda node: node['name'])
+        self.assertEqual([node['call_count'] for node in nodes], [5, 0])
+        edge = list(call_graph.get_edges().values())[0]
+        self.assertEqual(edge['call_count'], 5)
+        self.assertEqual(edge['params'].seen(), 5)
+        self.assertEqual((call_graph.get_yellow(), call_graph.get_red()), (2, 4))
+
+    def test_max_count_expands_deferred_stacks(self):
+        call_graph = CallGraph()
+        call_graph.defer_aggregate(self._counted_aggregate(call_graph))
+        self.assertEqual(call_graph.max_count(), 3)
+
+    def test_clear_drops_deferred_stacks(self):
+        call_graph = CallGraph()
+        call_graph.defer_aggregate(self._counted_aggregate(call_graph))
+        call_graph.clear()
+        self.assertEqual(call_graph.max_count(), 0)
+
+
+class TestCallingContext(TestCase):
+    def test_calling_context_is_not_kept_by_default(self):
+        self.assertIsNone(CallGraph().get_calling_context())
+
+    def test_deferred_stacks_are_added_to_calling_context(self):
+        call_graph = CallGraph(calling_context=True)
+        aggregate = Aggregate(call_graph.get_symbols(), count_stacks=True)
+        aggregate.add_stack([
+            "19059  19059  dummy_source1 func1",
+            "-14",
+            "b'func1+0x0 [dummy_source1]'",
+            "b'main+0x26 [dummy_source1]'"
+        ])
+        call_graph.defer_aggregate(aggregate)
+        call_graph.version()
+
+        symbols = call_graph.get_symbols()
+        func1 = symbols.get_id('func1', 'dummy_source1')
+        main = symbols.get_id('main', 'dummy_source1')
+        self.assertEqual(call_graph.get_calling_context().paths_to(func1), [([main, func1], 1)])
+        call_graph.clear()
+        self.assertEqual(len(call_graph.get_calling_context()), 0)
 
 
 class TestClear(TestCase):
@@ -110,6 +345,12 @@ class TestClear(TestCase):
         self.assertEqual(call_graph.get_yellow(), 0)
         self.assertEqual(call_graph.get_red(), 0)
 
+    def test_clear_keeps_symbol_ids(self):
+        call_graph = CallGraph()
+        id = call_graph.get_symbols().get_id('dummy_name1', 'dummy_source1')
+        call_graph.clear()
+        self.assertEqual(call_graph.get_symbols().get_id('dummy_name1', 'dummy_source1'), id)
+
 
 class TestSetColors(TestCase):
     def test_set_colors_sets_returned_colors(self):
@@ -148,6 +389,25 @@ class TestMaxCount(TestCase):
         })
         self.assertEqual(call_graph.max_count(), 10)
 
+    def test_max_count_follows_merged_counts(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({
+            'dummy_hash1': {'name': 'dummy_name1', 'source': 'dummy_source1', 'call_count': 4},
+            'dummy_hash2': {'name': 'dummy_name2', 'source': 'dummy_source2', 'call_count': 3}
+        })
+        call_graph.load_nodes({
+            'dummy_hash2': {'name': 'dummy_name2', 'source': 'dummy_source2', 'call_count': 2}
+        })
+        self.assertEqual(call_graph.max_count(), 5)
+
+    def test_max_count_is_reset_on_clear(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({
+            'dummy_hash1': {'name': 'dummy_name1', 'source': 'dummy_source1', 'call_count': 4}
+        })
+        call_graph.clear()
+        self.assertEqual(call_graph.max_count(), 0)
+
 
 class TestExpandElements(TestCase):
     def test_element_clicked_adds_element_to_returned_elements(self):
@@ -162,6 +422,11 @@ class TestExpandElements(TestCase):
         call_graph.element_clicked('dummy_id1')
         self.assertEqual(call_graph.get_expanded_elements(), ['dummy_id2'])
 
+    def test_read_calls_function_while_graph_is_locked(self):
+        call_graph = CallGraph()
+        self.assertEqual(call_graph.read(lambda graph, value: (graph._lock.locked(), value), 3), (True, 3))
+        self.assertFalse(call_graph._lock.locked())
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+from unittest import main, TestCase
+
+from tracerface.calling_context import CallingContextTree
+
+
+class TestCallingContextTree(TestCase):
+    def setUp(self):
+        self.tree = CallingContextTree()
+        # call-stacks start with the traced function, main is 0
+        self.tree.add_stack([3, 1, 0], 4)
+        self.tree.add_stack([3, 2, 0], 1)
+        self.tree.add_stack([1, 0], 2)
+
+    def test_nodes_are_shared_by_common_prefixes(self):
+        self.assertEqual(len(self.tree), 5)
+
+    def test_totals_count_call_stacks_of_subtrees(self):
+        main = self.tree.add_stack([0], 0)
+        self.assertEqual(self.tree.total(), 7)
+        self.assertEqual(self.tree.total(main), 7)
+        self.assertEqual(self.tree.count(main), 0)
+        caller = self.tree.add_stack([1, 0], 0)
+        self.assertEqual(self.tree.total(caller), 6)
+        self.assertEqual(self.tree.count(caller), 2)
+
+    def test_paths_to_function_are_sorted_by_frequency(self):
+        self.assertEqual(self.tree.paths_to(3), [([0, 1, 3], 4), ([0, 2, 3], 1)])
+        self.assertEqual(self.tree.paths_to(3, top=1), [([0, 1, 3], 4)])
+        self.assertEqual(self.tree.paths_to(5), [])
+
+    def test_stacks_are_listed_with_counts(self):
+        self.assertEqual(
+            sorted(self.tree.iter_stacks()),
+            [([0, 1], 2), ([0, 1, 3], 4), ([0, 2, 3], 1)])
+
+    def test_clear_removes_all_paths(self):
+        self.tree.clear()
+        self.assertEqual(len(self.tree), 0)
+        self.assertEqual(self.tree.total(), 0)
+        self.assertEqual(self.tree.paths_to(3), [])
+
+
+if __name__ == '__main__':
+    main()
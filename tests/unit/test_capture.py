@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import main, TestCase
+
+from tracerface.call_graph import CallGraph
+from tracerface.capture import (
+    CaptureFormatError,
+    CaptureWriter,
+    convert_trace_output,
+    is_capture,
+    load_capture_to_call_graph,
+    read_capture
+)
+from tracerface.export import write_folded
+from tracerface.load_output import load_trace_output_from_file_to_call_graph
+
+
+STATIC_OUTPUT = str(Path(__file__).absolute().parent.parent.joinpath('resources', 'test_static_output'))
+
+
+# Return paths kept by a call graph as sorted lines of folded stacks
+def _folded(call_graph):
+    output = StringIO()
+    write_folded(call_graph.get_calling_context().iter_stacks(), call_graph.get_symbols(), output)
+    return sorted(output.getvalue().splitlines())
+
+
+def _stack(name, param=''):
+    return [
+        "19059  19059  dummy_source1 {}        {}".format(name, param),
+        "-14",
+        "b'{}+0x0 [dummy_source1]'".format(name),
+        "b'main+0x26 [dummy_source1]'"
+    ]
+
+
+# Return nodes and edges of a call graph by the names of their functions
+def _summary(call_graph):
+    nodes = call_graph.get_nodes()
+    return (
+        sorted((node['name'], node['source'], node['call_count']) for node in nodes.values()),
+        sorted(
+            (nodes[caller]['name'], nodes[called]['name'], edge['call_count'], sorted(map(tuple, edge['params'].get_samples())))
+            for (caller, called), edge in call_graph.get_edges().items()
+        )
+    )
+
+
+class TestCapture(TestCase):
+    def setUp(self):
+        self._directory = TemporaryDirectory()
+        self.path = str(Path(self._directory.name).joinpath('capture'))
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_converted_capture_loads_same_graph_as_output(self):
+        stacks = convert_trace_output(STATIC_OUTPUT, self.path)
+        from_capture = CallGraph()
+        load_capture_to_call_graph(self.path, from_capture)
+        from_output = CallGraph()
+        load_trace_output_from_file_to_call_graph(STATIC_OUTPUT, from_output)
+
+        self.assertGreater(stacks, 0)
+        self.assertTrue(is_capture(self.path))
+        self.assertFalse(is_capture(STATIC_OUTPUT))
+        self.assertEqual(_summary(from_capture), _summary(from_output))
+        self.assertEqual(from_capture.max_count(), from_output.max_count())
+
+    def test_capture_keeps_paths_for_call_graph_with_calling_context(self):
+        convert_trace_output(STATIC_OUTPUT, self.path)
+        from_capture = CallGraph(calling_context=True)
+        load_capture_to_call_graph(self.path, from_capture)
+        from_output = CallGraph(calling_context=True)
+        load_trace_output_from_file_to_call_graph(STATIC_OUTPUT, from_output)
+
+        self.assertEqual(_summary(from_capture), _summary(from_output))
+        self.assertEqual(_folded(from_capture), _folded(from_output))
+        self.assertGreater(from_capture.get_calling_context().total(), 0)
+
+    def test_capture_is_loaded_into_graph_with_other_symbols(self):
+        writer = CaptureWriter(self.path, block_size=1)
+        for name in ['capfunc1', 'capfunc2', 'capfunc1']:
+            writer.add_stack(_stack(name))
+        writer.close()
+        call_graph = CallGraph()
+        load_trace_output_from_file_to_call_graph(STATIC_OUTPUT, call_graph)
+
+        load_capture_to_call_graph(self.path, call_graph)
+
+        counts = sorted((node['name'], node['call_count']) for node in call_graph.get_nodes().values())
+        self.assertEqual(counts, [('capfunc1', 2), ('capfunc2', 1), ('main', 0)])
+
+    def test_symbols_are_shared_between_blocks(self):
+        writer = CaptureWriter(self.path, block_size=2)
+        for name in ['func1', 'func2', 'func1', 'func3', 'func2']:
+            writer.add_stack(_stack(name, "b'param'"))
+        writer.close()
+
+        nodes = read_capture(self.path).get_nodes().values()
+        counts = sorted((node['name'], node['call_count']) for node in nodes)
+        self.assertEqual(counts, [('func1', 2), ('func2', 2), ('func3', 1), ('main', 0)])
+
+    def test_blocks_outside_of_time_range_are_skipped(self):
+        writer = CaptureWriter(self.path, block_size=1)
+        writer.add_stack(_stack('func1'), timestamp=10.0)
+        writer.add_stack(_stack('func2'), timestamp=20.0)
+        writer.add_stack(_stack('func3'), timestamp=30.0)
+        writer.close()
+
+        nodes = read_capture(self.path, start=15, end=25).get_nodes().values()
+        counts = sorted((node['name'], node['call_count']) for node in nodes)
+        self.assertEqual(counts, [('func2', 1), ('main', 0)])
+
+    def test_capture_without_index_is_read_until_incomplete_block(self):
+        writer = CaptureWriter(self.path, block_size=1)
+        writer.add_stack(_stack('func1'))
+        writer.add_stack(_stack('func2'))
+        writer.flush()
+        writer._output.write(b'BLK1')
+        writer._output.close()
+
+        nodes = read_capture(self.path).get_nodes().values()
+        self.assertEqual(sorted(node['name'] for node in nodes), ['func1', 'func2', 'main'])
+
+    def test_params_are_kept(self):
+        writer = CaptureWriter(self.path)
+        writer.add_stack(_stack('func1', "b'param1' b'param2'"))
+        writer.add_stack(_stack('func1', "b'param1' b'param2'"))
+        writer.add_stack(_stack('func1'))
+        writer.close()
+
+        edge = list(read_capture(self.path).get_edges().values())[0]
+        self.assertEqual(edge['call_count'], 3)
+        self.assertEqual(edge['params'].get_samples(), [['param1', 'param2'], ['param1', 'param2']])
+
+    def test_reading_other_file_raises_error(self):
+        with self.assertRaises(CaptureFormatError):
+            read_capture(STATIC_OUTPUT)
+
+
+if __name__ == '__main__':
+    main()
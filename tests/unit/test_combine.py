@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import main, TestCase
+
+from tracerface.call_graph import CallGraph
+from tracerface.capture import convert_trace_output
+from tracerface.combine import load_outputs_to_call_graph, read_outputs
+from tests.benchmarks.synthetic import synthetic_stack
+
+
+# Write call-stacks of the given functions traced with parameters to a file
+def _write_output(path, stacks):
+    with open(path, 'w') as output:
+        for depth, seed, params in stacks:
+            output.write('\n'.join(synthetic_stack(depth, 10, params, seed)) + '\n\n')
+
+
+# Returns call counts of nodes by name
+def _counts_by_name(aggregate):
+    return {node['name']: node['call_count'] for node in aggregate.get_nodes().values()}
+
+
+class TestCombine(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.first = str(Path(self.directory.name).joinpath('first'))
+        self.second = str(Path(self.directory.name).joinpath('second'))
+        _write_output(self.first, [(3, seed, 'x') for seed in range(20)])
+        _write_output(self.second, [(4, seed, 'y') for seed in range(10, 30)])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_outputs_are_combined(self):
+        result = read_outputs([self.first, self.second], workers=1)
+        self.assertEqual(result.stack_count(), 40)
+        self.assertEqual(sum(_counts_by_name(result).values()), 40)
+        params = {
+            tuple(sample) for edge in result.get_edges().values() for sample in edge['params'].get_samples()
+        }
+        self.assertEqual(params, {('x',), ('y',)})
+
+    def test_parallel_read_equals_serial_read(self):
+        serial = read_outputs([self.first, self.second], workers=1)
+        parallel = read_outputs([self.first, self.second], workers=2, chunk_size=500, min_chunk_size=1)
+        self.assertEqual(parallel.get_nodes(), serial.get_nodes())
+        self.assertEqual(
+            [(edge_id, edge['call_count']) for edge_id, edge in parallel.get_edges().items()],
+            [(edge_id, edge['call_count']) for edge_id, edge in serial.get_edges().items()])
+
+    def test_captures_and_outputs_are_combined(self):
+        capture = str(Path(self.directory.name).joinpath('capture'))
+        convert_trace_output(self.second, capture)
+        from_capture = read_outputs([self.first, capture], workers=1)
+        from_output = read_outputs([self.first, self.second], workers=1)
+        self.assertEqual(_counts_by_name(from_capture), _counts_by_name(from_output))
+
+    def test_load_replaces_call_graph(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({0: {'name': 'dummy', 'source': 'dummy', 'call_count': 1}})
+        load_outputs_to_call_graph([self.first, self.second], call_graph, workers=1)
+        names = {node['name'] for node in call_graph.get_nodes().values()}
+        self.assertNotIn('dummy', names)
+        self.assertEqual(sum(node['call_count'] for node in call_graph.get_nodes().values()), 40)
+
+    def test_load_keeps_paths_for_call_graph_with_calling_context(self):
+        capture = str(Path(self.directory.name).joinpath('capture'))
+        convert_trace_output(self.second, capture)
+        call_graph = CallGraph(calling_context=True)
+        load_outputs_to_call_graph([self.first, capture], call_graph, workers=2, min_chunk_size=1)
+        without_paths = CallGraph()
+        load_outputs_to_call_graph([self.first, self.second], without_paths, workers=1)
+
+        self.assertEqual(call_graph.get_calling_context().total(), 40)
+        self.assertEqual(_counts_by_name(call_graph), _counts_by_name(without_paths))
+
+    def test_load_keeps_call_graph_if_a_file_is_missing(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({0: {'name': 'dummy', 'source': 'dummy', 'call_count': 1}})
+        with self.assertRaises(FileNotFoundError):
+            load_outputs_to_call_graph([self.first, '/dummy/path'], call_graph, workers=1)
+        self.assertEqual(len(call_graph.get_nodes()), 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+from collections import Counter
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import main, mock, TestCase
+
+from tracerface.call_graph import CallGraph
+from tracerface.capture import convert_trace_output
+from tracerface.export import export_call_graph, export_file
+from tracerface.load_output import load_trace_output_from_file_to_call_graph
+
+
+STATIC_OUTPUT_PATH = str(Path(__file__).absolute().parent.parent.joinpath('resources', 'test_static_output'))
+
+EXPECTED_FOLDED = {
+    '__libc_start_main;main;func6;func4;func2': 1,
+    '__libc_start_main;main;func6;func4;func3': 5,
+    '__libc_start_main;main;func6;func5;func1': 2
+}
+
+
+# Returns counts of folded stacks in a file, summing repeated lines
+def _read_folded(path):
+    counts = Counter()
+    with open(path) as folded:
+        for line in folded:
+            stack, count = line.rsplit(' ', 1)
+            counts[stack] += int(count)
+    return counts
+
+
+class TestExport(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.output_path = str(Path(self.directory.name).joinpath('export'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_trace_output_is_exported_as_folded_stacks(self):
+        self.assertEqual(export_file(STATIC_OUTPUT_PATH, self.output_path, 'folded'), 8)
+        self.assertEqual(_read_folded(self.output_path), EXPECTED_FOLDED)
+
+    def test_batches_of_trace_output_are_summed_by_readers(self):
+        with mock.patch('tracerface.export._BATCH_SIZE', 1):
+            export_file(STATIC_OUTPUT_PATH, self.output_path, 'folded')
+        self.assertEqual(_read_folded(self.output_path), EXPECTED_FOLDED)
+
+    def test_capture_is_exported_like_trace_output(self):
+        capture_path = str(Path(self.directory.name).joinpath('capture'))
+        convert_trace_output(STATIC_OUTPUT_PATH, capture_path)
+        export_file(capture_path, self.output_path, 'folded')
+        self.assertEqual(_read_folded(self.output_path), EXPECTED_FOLDED)
+
+    def test_trace_output_is_exported_as_speedscope_profile(self):
+        export_file(STATIC_OUTPUT_PATH, self.output_path, 'speedscope')
+        with open(self.output_path) as output:
+            profile = json.load(output)
+
+        frames = [frame['name'] for frame in profile['shared']['frames']]
+        sampled = profile['profiles'][0]
+        self.assertEqual(sampled['type'], 'sampled')
+        self.assertEqual(sampled['endValue'], 8)
+        stacks = {
+            ';'.join(frames[frame] for frame in sample): weight
+            for sample, weight in zip(sampled['samples'], sampled['weights'])
+        }
+        self.assertEqual(stacks, EXPECTED_FOLDED)
+
+    def test_call_graph_with_calling_context_is_exported(self):
+        call_graph = CallGraph(calling_context=True)
+        load_trace_output_from_file_to_call_graph(STATIC_OUTPUT_PATH, call_graph)
+        self.assertEqual(export_call_graph(call_graph, self.output_path, 'folded'), 8)
+        self.assertEqual(_read_folded(self.output_path), EXPECTED_FOLDED)
+
+    def test_call_graph_without_calling_context_is_rejected(self):
+        with self.assertRaises(ValueError):
+            export_call_graph(CallGraph(), self.output_path, 'folded')
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(ValueError):
+            export_file(STATIC_OUTPUT_PATH, self.output_path, 'svg')
+
+
+if __name__ == '__main__':
+    main()
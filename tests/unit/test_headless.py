@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+from pathlib import Path
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+import time
+from unittest import main, mock, TestCase
+
+from tracerface.call_graph import CallGraph
+from tracerface.export import export_call_graph
+from tracerface.headless import run_headless
+from tracerface.load_output import load_trace_output_from_file_to_call_graph
+from tracerface.snapshot import load_snapshot
+from tracerface.trace_setup import ConfigFileError
+
+
+STATIC_OUTPUT_PATH = str(Path(__file__).absolute().parent.parent.joinpath('resources', 'test_static_output'))
+
+
+# Load the static trace output into the call graph as if it was traced
+def _trace_static_output(functions, call_graph):
+    load_trace_output_from_file_to_call_graph(STATIC_OUTPUT_PATH, call_graph)
+
+
+@mock.patch('tracerface.headless.TraceController')
+@mock.patch('tracerface.headless.Setup')
+class TestRunHeadless(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.output_path = str(Path(self.directory.name).joinpath('output'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _setup_mocks(self, setup, trace_controller):
+        setup.return_value.load_from_file.return_value = ''
+        trace_controller.return_value.start_trace.side_effect = _trace_static_output
+        trace_controller.return_value.thread_error.return_value = None
+        trace_controller.return_value.dropped_stacks.return_value = 0
+
+    def test_run_headless_saves_snapshot(self, setup, trace_controller):
+        self._setup_mocks(setup, trace_controller)
+
+        error = run_headless('config.yml', self.output_path, duration=0)
+
+        self.assertIsNone(error)
+        setup.return_value.load_from_file.assert_called_once_with('config.yml')
+        trace_controller.return_value.stop_trace.assert_called_once()
+        trace_controller.return_value.wait_for_trace.assert_called_once()
+        expected = CallGraph()
+        _trace_static_output(None, expected)
+        result = CallGraph()
+        load_snapshot(self.output_path, result)
+        self.assertEqual(
+            sorted((node['name'], node['call_count']) for node in result.get_nodes().values()),
+            sorted((node['name'], node['call_count']) for node in expected.get_nodes().values())
+        )
+
+    def test_run_headless_saves_report(self, setup, trace_controller):
+        self._setup_mocks(setup, trace_controller)
+
+        error = run_headless('config.yml', self.output_path, format='report', duration=0)
+
+        self.assertIsNone(error)
+        lines = Path(self.output_path).read_text().splitlines()
+        self.assertEqual(lines[0], '8 calls of 3 traced functions')
+        self.assertEqual(lines[1].split(), ['5', 'func3', '[test_application]'])
+        self.assertEqual(lines[2].split(), ['5', 'called', 'by', 'func4', '[test_application]'])
+
+    def test_run_headless_exports_folded_stacks(self, setup, trace_controller):
+        self._setup_mocks(setup, trace_controller)
+
+        error = run_headless('config.yml', self.output_path, format='folded', duration=0)
+
+        self.assertIsNone(error)
+        expected = CallGraph(calling_context=True)
+        _trace_static_output(None, expected)
+        expected_path = str(Path(self.directory.name).joinpath('expected'))
+        export_call_graph(expected, expected_path, 'folded')
+        self.assertEqual(Path(self.output_path).read_text(), Path(expected_path).read_text())
+
+    def test_run_headless_returns_thread_error(self, setup, trace_controller):
+        self._setup_mocks(setup, trace_controller)
+        trace_controller.return_value.thread_error.return_value = 'Process failed'
+
+        error = run_headless('config.yml', self.output_path)
+
+        self.assertEqual(error, 'Process failed')
+        trace_controller.return_value.stop_trace.assert_called_once()
+        self.assertTrue(Path(self.output_path).exists())
+
+    def test_run_headless_returns_config_error(self, setup, trace_controller):
+        setup.return_value.load_from_file.side_effect = ConfigFileError('File needs to be yaml format')
+
+        error = run_headless('config.yml', self.output_path)
+
+        self.assertEqual(error, 'File needs to be yaml format')
+        trace_controller.return_value.start_trace.assert_not_called()
+        self.assertFalse(Path(self.output_path).exists())
+
+
+# Prints a call-stack at first and another one right before bcc trace is
+# interrupted, whose end is only known then, and exits like bcc trace
+def _dummy_trace():
+    print('19059  19059  dummy_source1 func1')
+    print("b'func1+0x0 [dummy_source1]'")
+    print("b'func2+0x26 [dummy_source1]'")
+    print()
+    time.sleep(0.5)
+    print('19059  19059  dummy_source1 func3')
+    print("b'func3+0x0 [dummy_source1]'")
+    print("b'func2+0x26 [dummy_source1]'")
+    try:
+        time.sleep(10)
+    except KeyboardInterrupt:
+        sys.exit()
+
+
+@mock.patch('tracerface.trace_process._get_bcc_trace_tool')
+@mock.patch('tracerface.headless.Setup')
+class TestRunHeadlessTrace(TestCase):
+    def test_stacks_printed_before_stop_are_saved(self, setup, tool):
+        setup.return_value.load_from_file.return_value = ''
+        setup.return_value.generate_bcc_args.return_value = ['dummy_function']
+        tool.return_value.run = _dummy_trace
+        with TemporaryDirectory() as directory:
+            path = str(Path(directory).joinpath('snapshot'))
+
+            error = run_headless('config.yml', path, duration=1)
+
+            call_graph = CallGraph()
+            load_snapshot(path, call_graph)
+        self.assertIsNone(error)
+        counts = sorted((node['name'], node['call_count']) for node in call_graph.get_nodes().values())
+        self.assertEqual(counts, [('func1', 1), ('func2', 0), ('func3', 1)])
+
+
+class TestHeadlessImports(TestCase):
+    def test_headless_does_not_import_web_ui(self):
+        modules = subprocess.run(
+            [sys.executable, '-c', 'import sys, tracerface.headless; print(" ".join(sys.modules))'],
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+
+        self.assertNotIn('tracerface.web_ui', modules)
+        self.assertFalse([module for module in modules if module.split('.')[0] in ('dash', 'dash_cytoscape')])
+
+
+if __name__ == '__main__':
+    main()
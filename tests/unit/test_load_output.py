@@ -1,12 +1,38 @@
 #!/usr/bin/env python3
+from io import StringIO
+import os
 from pathlib import Path
-from unittest import main, TestCase
+from tempfile import TemporaryDirectory
+from unittest import main, mock, TestCase
 
-from tracerface.load_output import load_trace_output_from_file_to_call_graph
+from tracerface.load_output import (
+    CHUNK_SIZE,
+    read_stacks,
+    load_trace_output_from_file_to_call_graph,
+    load_trace_output_in_parallel,
+    split_trace_output
+)
 from tracerface.call_graph import CallGraph
+from tests.benchmarks.synthetic import synthetic_stack, write_synthetic_trace
 from tests.integration.test_trace import EXPECTED_NODES
 
 
+STATIC_OUTPUT_PATH = str(Path(__file__).absolute().parent.parent.joinpath('resources', 'test_static_output'))
+
+
+# Returns nodes and edges of a call graph by name in the order they were added
+def _graph_by_name(call_graph):
+    nodes = call_graph.get_nodes()
+    return (
+        [(node['name'], node['source'], node['call_count']) for node in nodes.values()],
+        [
+            (nodes[caller]['name'], nodes[called]['name'], edge['call_count'],
+             edge['params'].get_samples(), edge['params'].most_common())
+            for (caller, called), edge in call_graph.get_edges().items()
+        ]
+    )
+
+
 class TestLoadFromFile(TestCase):
     def test_load_output_happy_case(self):
         test_file_path = Path(__file__).absolute().parent.parent.joinpath(
@@ -21,6 +47,102 @@ class TestLoadFromFile(TestCase):
             assert result['call_count'] == expected['count']
             assert result['source'] == expected['source']
 
+    def test_load_output_keeps_call_graph_if_file_not_found(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({
+            'dummy_hash1': {'name': 'dummy_name1', 'source': 'dummy_source1', 'call_count': 3}
+        })
+        with self.assertRaises(FileNotFoundError):
+            load_trace_output_from_file_to_call_graph('/dummy/path', call_graph)
+        self.assertEqual(len(call_graph.get_nodes()), 1)
+
+
+class TestLoadInParallel(TestCase):
+    def assert_same_as_serial(self, path, workers, chunk_size):
+        serial = CallGraph()
+        load_trace_output_from_file_to_call_graph(path, serial)
+        parallel = CallGraph()
+        load_trace_output_in_parallel(path, parallel, workers, chunk_size)
+        self.assertEqual(_graph_by_name(parallel), _graph_by_name(serial))
+        self.assertEqual(parallel.max_count(), serial.max_count())
+
+    def test_static_output_is_loaded_as_by_serial_load(self):
+        for chunk_size in [1, 100, 10 ** 6]:
+            self.assert_same_as_serial(STATIC_OUTPUT_PATH, 2, chunk_size)
+
+    def test_small_output_is_loaded_without_processes(self):
+        with mock.patch('tracerface.load_output.ProcessPoolExecutor') as executor:
+            self.assert_same_as_serial(STATIC_OUTPUT_PATH, 4, CHUNK_SIZE)
+        executor.assert_not_called()
+
+    def test_static_output_is_loaded_as_by_serial_load_in_one_process(self):
+        self.assert_same_as_serial(STATIC_OUTPUT_PATH, 1, 100)
+
+    def test_synthetic_output_is_loaded_as_by_serial_load(self):
+        with TemporaryDirectory() as directory:
+            path = str(Path(directory).joinpath('output'))
+            with open(path, 'w') as output:
+                for index in range(200):
+                    output.write('\n'.join(synthetic_stack(5, 20, 'p{}'.format(index % 3), seed=index)) + '\n\n')
+            self.assert_same_as_serial(path, 3, 1000)
+
+    def test_paths_are_kept_for_call_graph_with_calling_context(self):
+        serial = CallGraph()
+        load_trace_output_from_file_to_call_graph(STATIC_OUTPUT_PATH, serial)
+        with_context = CallGraph(calling_context=True)
+        load_trace_output_in_parallel(STATIC_OUTPUT_PATH, with_context, 2, 100)
+
+        self.assertEqual(_graph_by_name(with_context)[0], _graph_by_name(serial)[0])
+        context = with_context.get_calling_context()
+        self.assertEqual(context.total(), sum(node['call_count'] for node in serial.get_nodes().values()))
+
+    def test_load_keeps_call_graph_if_file_not_found(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({
+            'dummy_hash1': {'name': 'dummy_name1', 'source': 'dummy_source1', 'call_count': 3}
+        })
+        with self.assertRaises(FileNotFoundError):
+            load_trace_output_in_parallel('/dummy/path', call_graph, 2)
+        self.assertEqual(len(call_graph.get_nodes()), 1)
+
+
+class TestSplitTraceOutput(TestCase):
+    def test_ranges_cover_the_file_and_end_at_stack_boundaries(self):
+        with TemporaryDirectory() as directory:
+            path = str(Path(directory).joinpath('output'))
+            write_synthetic_trace(path, 100000)
+            with open(path, 'rb') as output:
+                content = output.read()
+            ranges = split_trace_output(path, 4, 10000)
+            self.assertGreater(len(ranges), 4)
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], len(content))
+            for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(end, start)
+                self.assertEqual(content[end - 2:end], b'\n\n')
+
+    def test_small_file_is_not_split(self):
+        self.assertEqual(split_trace_output(STATIC_OUTPUT_PATH, 4), [(0, os.path.getsize(STATIC_OUTPUT_PATH))])
+
+    def test_file_above_minimum_is_split_between_workers(self):
+        self.assertGreater(len(split_trace_output(STATIC_OUTPUT_PATH, 4, min_chunk_size=100)), 1)
+
+    def test_empty_file_has_no_ranges(self):
+        with TemporaryDirectory() as directory:
+            path = Path(directory).joinpath('output')
+            path.touch()
+            self.assertEqual(split_trace_output(str(path), 4), [])
+
+
+class TestReadStacks(TestCase):
+    def test_read_stacks_splits_output_at_empty_lines(self):
+        output = StringIO('line1\nline2\n\nline3\n\n\nline4')
+        result = list(read_stacks(output))
+        self.assertEqual(result, [['line1', 'line2'], ['line3'], ['line4']])
+
+    def test_read_stacks_returns_nothing_for_empty_output(self):
+        self.assertEqual(list(read_stacks(StringIO(''))), [])
+
 
 if __name__ == '__main__':
     main()
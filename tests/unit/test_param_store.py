@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+import json
+import pickle
+from unittest import main, TestCase
+
+from tracerface.param_store import ParamStore
+
+
+class TestAdd(TestCase):
+    def test_new_store_is_empty(self):
+        store = ParamStore()
+        self.assertEqual(store.seen(), 0)
+        self.assertEqual(store.get_samples(), [])
+        self.assertEqual(store.distinct_count(), 0)
+        self.assertEqual(store.most_common(), [])
+
+    def test_all_calls_are_kept_below_sample_size(self):
+        store = ParamStore(sample_size=3)
+        store.add(['a', 'b'])
+        store.add(['c'])
+        self.assertEqual(store.get_samples(), [['a', 'b'], ['c']])
+        self.assertTrue(store.is_complete())
+
+    def test_samples_are_bounded(self):
+        store = ParamStore(sample_size=10)
+        for index in range(1000):
+            store.add([str(index)])
+        self.assertEqual(len(store.get_samples()), 10)
+        self.assertEqual(store.seen(), 1000)
+        self.assertFalse(store.is_complete())
+
+    def test_add_counts_multiple_calls(self):
+        store = ParamStore()
+        store.add(['a'], count=3)
+        self.assertEqual(store.seen(), 3)
+        self.assertEqual(store.most_common(), [(['a'], 3)])
+
+    def test_add_many_calls_keeps_samples_bounded(self):
+        store = ParamStore(sample_size=10)
+        store.add(['a'], count=10 ** 12)
+        self.assertEqual(store.seen(), 10 ** 12)
+        self.assertEqual(store.get_samples(), [['a']] * 10)
+        self.assertEqual(store.most_common(), [(['a'], 10 ** 12)])
+
+    def test_add_many_calls_replaces_samples_in_proportion(self):
+        replaced = 0
+        for _ in range(200):
+            store = ParamStore(sample_size=100)
+            store.add(['a'], count=100)
+            store.add(['b'], count=300)
+            replaced += store.get_samples().count(['b'])
+        # 300 of 400 calls are b, so three quarters of the samples on average
+        self.assertAlmostEqual(replaced / 200, 75, delta=2)
+
+
+class TestMostCommon(TestCase):
+    def test_most_common_returns_frequent_values_first(self):
+        store = ParamStore(top_k=2)
+        for value in ['a', 'b', 'a', 'c', 'a', 'b']:
+            store.add([value])
+        self.assertEqual(store.most_common(), [(['a'], 3), (['b'], 2)])
+
+    def test_most_common_finds_heavy_value_among_many(self):
+        store = ParamStore(top_k=1)
+        for index in range(1000):
+            store.add(['heavy'] if index % 2 else [str(index)])
+        self.assertEqual(store.most_common()[0][0], ['heavy'])
+
+
+class TestDistinctCount(TestCase):
+    def test_distinct_count_is_exact_for_few_values(self):
+        store = ParamStore()
+        for index in range(100):
+            store.add([str(index % 7)])
+        self.assertEqual(store.distinct_count(), 7)
+        self.assertTrue(store.is_distinct_count_exact())
+
+    def test_distinct_count_is_estimated_for_many_values(self):
+        store = ParamStore()
+        for index in range(20000):
+            store.add([str(index)])
+        self.assertFalse(store.is_distinct_count_exact())
+        self.assertAlmostEqual(store.distinct_count(), 20000, delta=20000 * 0.2)
+
+
+class TestMerge(TestCase):
+    def test_merge_keeps_all_calls_below_sample_size(self):
+        store = ParamStore()
+        store.add(['a'])
+        other = ParamStore()
+        other.add(['b'])
+        store.merge(other)
+        self.assertEqual(store.get_samples(), [['a'], ['b']])
+        self.assertEqual(store.seen(), 2)
+        self.assertEqual(store.distinct_count(), 2)
+
+    def test_merge_keeps_samples_bounded(self):
+        store = ParamStore(sample_size=10)
+        other = ParamStore(sample_size=10)
+        for index in range(50):
+            store.add(['a{}'.format(index)])
+            other.add(['b{}'.format(index)])
+        store.merge(other)
+        self.assertEqual(len(store.get_samples()), 10)
+        self.assertEqual(store.seen(), 100)
+        self.assertEqual(store.distinct_count(), 100)
+
+    def test_merge_combines_estimated_distinct_counts(self):
+        store = ParamStore()
+        other = ParamStore()
+        for index in range(10000):
+            store.add([str(index)])
+            other.add([str(index + 5000)])
+        store.merge(other)
+        self.assertAlmostEqual(store.distinct_count(), 15000, delta=15000 * 0.2)
+
+
+class TestPickle(TestCase):
+    def test_pickled_store_keeps_its_state(self):
+        store = ParamStore()
+        store.add(['a'])
+        result = pickle.loads(pickle.dumps(store))
+        self.assertEqual(result.get_samples(), [['a']])
+        self.assertEqual(result.most_common(), [(['a'], 1)])
+
+
+
+class TestState(TestCase):
+    def test_store_is_restored_from_state(self):
+        store = ParamStore(sample_size=2, top_k=2)
+        for index in range(300):
+            store.add([str(index % 3), 'b'])
+        result = ParamStore.from_state(json.loads(json.dumps(store.get_state())))
+        self.assertEqual(result.seen(), 300)
+        self.assertEqual(result.get_samples(), store.get_samples())
+        self.assertEqual(result.most_common(), store.most_common())
+        self.assertEqual(result.distinct_count(), 3)
+
+    def test_exact_distinct_count_beyond_counters_is_restored(self):
+        store = ParamStore(top_k=1)
+        for index in range(100):
+            store.add([str(index)])
+        result = ParamStore.from_state(json.loads(json.dumps(store.get_state())))
+        self.assertTrue(result.is_distinct_count_exact())
+        self.assertEqual(result.distinct_count(), 100)
+
+    def test_estimated_distinct_count_is_restored(self):
+        store = ParamStore()
+        for index in range(1000):
+            store.add([str(index)])
+        result = ParamStore.from_state(json.loads(json.dumps(store.get_state())))
+        self.assertFalse(result.is_distinct_count_exact())
+        self.assertEqual(result.distinct_count(), store.distinct_count())
+        result.add(['new'])
+        self.assertGreater(result.seen(), store.seen())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 from unittest import main, TestCase
 
-from tracerface.parse_stack import parse_stack
+from tracerface.parse_stack import parse_frames, parse_stack, StackCache
+from tracerface.symbol_table import SymbolTable
 
 
 class TestParseStack(TestCase):
@@ -112,6 +113,114 @@ class TestParseStack(TestCase):
         self.assertDictEqual(result.nodes, {})
         self.assertDictEqual(result.edges, {})
 
+    def test_parse_stack_does_not_modify_given_stack(self):
+        stack = [
+            "PID    TID    COMM         FUNC             ",
+            "19059  19059  dummy_source1 func1        ",
+            "        -14",
+            "b'func1+0x0 [dummy_source1]'",
+            "b'func2+0x26 [dummy_source1]'"
+        ]
+        expected = list(stack)
+
+        parse_stack(stack)
+        self.assertListEqual(stack, expected)
+
+    def test_parse_stack_accepts_iterator_of_lines(self):
+        stack = [
+            "19059  19059  dummy_source1 func1",
+            "-14",
+            "b'func1+0x0 [dummy_source1]'"
+        ]
+
+        result = parse_stack(iter(stack))
+        self.assertListEqual(
+            list(result.nodes.values()),
+            [{'call_count': 1, 'name': 'func1', 'source': 'dummy_source1'}]
+        )
+
+    def test_parse_stack_uses_ids_of_given_symbol_table(self):
+        symbols = SymbolTable()
+        stack = [
+            "19059  19059  dummy_source1 func1",
+            "-14",
+            "b'func1+0x0 [dummy_source1]'",
+            "b'func2+0x26 [dummy_source1]'"
+        ]
+
+        first = parse_stack(stack, symbols)
+        second = parse_stack(stack, symbols)
+        func1 = symbols.get_id('func1', 'dummy_source1')
+        func2 = symbols.get_id('func2', 'dummy_source1')
+        self.assertEqual(set(first.nodes), {func1, func2})
+        self.assertEqual(set(second.nodes), {func1, func2})
+        self.assertEqual(list(second.edges), [(func2, func1)])
+        self.assertEqual(len(symbols), 2)
+
+
+class TestParseFrames(TestCase):
+    def test_parse_frames_returns_ids_from_traced_function_and_params(self):
+        symbols = SymbolTable()
+        stack = [
+            "PID     TID     COMM            FUNC             -",
+            "19059  19059  dummy_source1 func1 b'param1' b'param2'",
+            "-14",
+            "b'func1+0x0 [dummy_source1]'",
+            "b'func2+0x26 [dummy_source1]'",
+            "b'func1+0x10 [dummy_source1]'"
+        ]
+        frames = parse_frames(stack, symbols)
+        self.assertEqual(frames.ids, (0, 1, 0))
+        self.assertEqual(frames.params, ['param1', 'param2'])
+        self.assertEqual(symbols.get_symbol(1), ('func2', 'dummy_source1'))
+
+    def test_parse_frames_returns_nothing_for_header_only(self):
+        frames = parse_frames(["PID     TID     COMM            FUNC             -"], SymbolTable())
+        self.assertEqual(frames.ids, ())
+        self.assertIsNone(frames.params)
+
+
+def _stack(function, param=''):
+    return [
+        "19059  19059  dummy_source1 {} {}".format(function, param),
+        "-14",
+        "b'{}+0x0 [dummy_source1]'".format(function),
+        "b'main+0x26 [dummy_source1]'"
+    ]
+
+
+class TestStackCache(TestCase):
+    def test_cached_stack_is_parsed_like_uncached_one(self):
+        symbols = SymbolTable()
+        cache = StackCache(symbols)
+        parse_stack(_stack('func1', "b'param1'"), cache=cache)
+        result = parse_stack(_stack('func1', "b'param2'"), cache=cache)
+        expected = parse_stack(_stack('func1', "b'param2'"), symbols)
+
+        self.assertEqual(result.nodes, expected.nodes)
+        self.assertEqual(result.edges, expected.edges)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_cached_stack_returns_new_dicts(self):
+        cache = StackCache(SymbolTable())
+        first = parse_stack(_stack('func1'), cache=cache)
+        first.nodes[0]['call_count'] += 5
+        second = parse_stack(_stack('func1'), cache=cache)
+        self.assertEqual(second.nodes[0]['call_count'], 1)
+
+    def test_counts_hits_misses_and_evictions(self):
+        cache = StackCache(SymbolTable(), size=2)
+        for function in ['func1', 'func2', 'func1', 'func3', 'func2']:
+            parse_frames(_stack(function), cache.get_symbols(), cache)
+
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 4, 'evictions': 2, 'size': 2})
+
+    def test_least_recently_used_stack_is_evicted(self):
+        cache = StackCache(SymbolTable(), size=2)
+        for function in ['func1', 'func2', 'func1', 'func3', 'func1']:
+            parse_frames(_stack(function), cache.get_symbols(), cache)
+
+        self.assertEqual(cache.stats()['hits'], 2)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+from multiprocessing import get_context
+from queue import Empty
+from unittest import main, TestCase
+
+from tracerface.aggregate import Aggregate
+from tracerface.ring_buffer import SharedMemoryQueue
+
+
+def _produce(queue, count):
+    for index in range(count):
+        queue.put(['stack{}'.format(index)])
+
+
+class TestSharedMemoryQueue(TestCase):
+    def setUp(self):
+        self.queue = SharedMemoryQueue(256)
+
+    def tearDown(self):
+        self.queue.release()
+
+    def test_items_are_returned_in_order(self):
+        self.queue.put(['stack1'])
+        self.queue.put(['stack2', 'stack3'])
+        self.assertEqual(self.queue.get_nowait(), ['stack1'])
+        self.assertEqual(self.queue.get_nowait(), ['stack2', 'stack3'])
+
+    def test_get_nowait_raises_empty_for_empty_ring(self):
+        with self.assertRaises(Empty):
+            self.queue.get_nowait()
+
+    def test_get_raises_empty_after_timeout(self):
+        with self.assertRaises(Empty):
+            self.queue.get(timeout=0.05)
+
+    def test_records_wrap_around_end_of_ring(self):
+        for index in range(50):
+            self.queue.put(['stack{}'.format(index)])
+            self.assertEqual(self.queue.get_nowait(), ['stack{}'.format(index)])
+        self.assertEqual(self.queue.dropped(), 0)
+
+    def test_items_not_fitting_are_counted_as_dropped(self):
+        self.queue.put(['x' * 300, 'y'])
+        self.queue.put('z' * 300)
+        self.assertEqual(self.queue.dropped(), 3)
+        with self.assertRaises(Empty):
+            self.queue.get_nowait()
+
+    def test_dropped_aggregate_counts_its_call_stacks(self):
+        queue = SharedMemoryQueue(16)
+        aggregate = Aggregate()
+        aggregate.add_stack(["b'func1+0x1 [source]'"])
+        aggregate.add_stack(["b'func2+0x1 [source]'"])
+        queue.put(aggregate)
+        self.assertEqual(queue.dropped(), 2)
+        queue.release()
+
+    def test_items_are_sent_between_processes(self):
+        process = get_context().Process(target=_produce, args=(self.queue, 100))
+        process.start()
+        received = []
+        while len(received) + self.queue.dropped() < 100:
+            received.append(self.queue.get(timeout=5))
+        process.join()
+        indexes = [int(item[0][len('stack'):]) for item in received]
+        self.assertEqual(indexes, sorted(indexes))
+        self.assertEqual(len(indexes) + self.queue.dropped(), 100)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+import gzip
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import main, TestCase
+
+from tracerface.call_graph import CallGraph
+from tracerface.load_output import load_trace_output_from_file_to_call_graph
+from tracerface.snapshot import is_snapshot, load_snapshot, save_snapshot, SnapshotFormatError
+
+
+STATIC_OUTPUT = str(Path(__file__).absolute().parent.parent.joinpath('resources', 'test_static_output'))
+
+
+class TestSnapshot(TestCase):
+    def setUp(self):
+        self._directory = TemporaryDirectory()
+        self.path = str(Path(self._directory.name).joinpath('snapshot'))
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_saved_snapshot_loads_same_graph(self):
+        call_graph = CallGraph()
+        load_trace_output_from_file_to_call_graph(STATIC_OUTPUT, call_graph)
+        save_snapshot(call_graph, self.path)
+
+        result = CallGraph()
+        load_snapshot(self.path, result)
+        self.assertEqual(
+            sorted(node.items() for node in result.get_nodes().values()),
+            sorted(node.items() for node in call_graph.get_nodes().values()))
+        self.assertEqual(len(result.get_edges()), len(call_graph.get_edges()))
+        self.assertEqual(result.get_red(), call_graph.get_red())
+
+    def test_snapshots_are_told_apart_from_trace_output(self):
+        save_snapshot(CallGraph(), self.path)
+        self.assertTrue(is_snapshot(self.path))
+        self.assertFalse(is_snapshot(STATIC_OUTPUT))
+
+    def test_loading_other_file_raises_error(self):
+        with self.assertRaises(SnapshotFormatError):
+            load_snapshot(STATIC_OUTPUT, CallGraph())
+
+    def test_loading_other_json_raises_error(self):
+        with gzip.open(self.path, 'wt') as output:
+            output.write('{"nodes": []}')
+        with self.assertRaises(SnapshotFormatError):
+            load_snapshot(self.path, CallGraph())
+
+    def test_loading_missing_file_raises_error(self):
+        with self.assertRaises(FileNotFoundError):
+            load_snapshot(self.path, CallGraph())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+from unittest import main, TestCase
+
+from tracerface.symbol_table import SymbolTable
+
+
+class TestSymbolTable(TestCase):
+    def test_get_id_assigns_consecutive_ids(self):
+        symbols = SymbolTable()
+        self.assertEqual(symbols.get_id('func1', 'source1'), 0)
+        self.assertEqual(symbols.get_id('func2', 'source1'), 1)
+        self.assertEqual(symbols.get_id('func1', 'source2'), 2)
+        self.assertEqual(len(symbols), 3)
+
+    def test_get_id_returns_same_id_for_same_function(self):
+        symbols = SymbolTable()
+        first = symbols.get_id('func1', 'source1')
+        symbols.get_id('func2', 'source1')
+        self.assertEqual(symbols.get_id('func1', 'source1'), first)
+        self.assertEqual(len(symbols), 2)
+
+    def test_get_symbol_returns_name_and_source(self):
+        symbols = SymbolTable()
+        id = symbols.get_id('func1', 'source1')
+        self.assertEqual(symbols.get_symbol(id), ('func1', 'source1'))
+
+
+if __name__ == '__main__':
+    main()
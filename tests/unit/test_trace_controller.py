@@ -1,7 +1,15 @@
 #!/usr/bin/env python3
+from pathlib import Path
+import sys
+from tempfile import TemporaryDirectory
+from threading import Thread
+import time
 from unittest import main, mock, TestCase
 
+from tracerface.call_graph import CallGraph
+from tracerface.capture import read_capture
 from tracerface.trace_controller import TraceController
+from tracerface.trace_process import TraceProcess
 
 
 class TestTraceController(TestCase):
@@ -14,7 +22,16 @@ class TestTraceController(TestCase):
 
         self.assertIsNone(trace_controller.thread_error())
         self.assertTrue(trace_controller._thread_enabled)
-        process.assert_called_once_with(args=['', '-UK', 'dummy', 'functions'])
+        process.assert_called_once_with(args=['', '-UK', 'dummy', 'functions'], aggregate=False, shared_memory=False)
+
+    @mock.patch('tracerface.trace_controller.Thread')
+    @mock.patch('tracerface.trace_controller.TraceProcess')
+    def test_start_trace_with_aggregation_in_process(self, process, thread):
+        trace_controller = TraceController(aggregate=True)
+
+        trace_controller.start_trace(['dummy'], mock.Mock())
+
+        process.assert_called_once_with(args=['', '-UK', 'dummy'], aggregate=True, shared_memory=False)
 
 
     def test_start_trace_without_functions(self):
@@ -31,6 +48,18 @@ class TestTraceController(TestCase):
         self.assertFalse(trace_controller._thread_enabled)
 
 
+    def test_dropped_stacks_returns_dropped_count(self):
+        trace_controller = TraceController()
+        trace_controller._dropped = 3
+
+        self.assertEqual(trace_controller.dropped_stacks(), 3)
+
+
+    def test_capture_of_aggregates_is_rejected(self):
+        with self.assertRaises(ValueError):
+            TraceController(aggregate=True, capture_path='dummy_path')
+
+
     def test_thread_error_returns_error(self):
         trace_controller = TraceController()
         trace_controller._thread_error = 'Dummy Error'
@@ -38,5 +67,160 @@ class TestTraceController(TestCase):
         self.assertEqual(trace_controller.thread_error(), 'Dummy Error')
 
 
+class TestMonitorTracing(TestCase):
+    def _start_monitoring(self, trace_controller, call_graph):
+        process = TraceProcess(
+            args=[],
+            aggregate=trace_controller._aggregate,
+            shared_memory=trace_controller._shared_memory)
+        process.start()
+        trace_controller._thread_enabled = True
+        monitoring = Thread(target=trace_controller._monitor_tracing, args=(process, call_graph,))
+        monitoring.start()
+        return process, monitoring
+
+    @mock.patch('tracerface.trace_process._get_bcc_trace_tool')
+    def test_idle_trace_session_does_not_busy_wait(self, tool):
+        tool.return_value.run = lambda: time.sleep(10)
+        trace_controller = TraceController()
+
+        cpu_start = time.process_time()
+        process, monitoring = self._start_monitoring(trace_controller, CallGraph())
+        time.sleep(1)
+        cpu_time = time.process_time() - cpu_start
+        trace_controller.stop_trace()
+        monitoring.join(timeout=2)
+
+        self.assertLess(cpu_time, 0.3)
+        self.assertFalse(monitoring.is_alive())
+        self.assertFalse(process.is_alive())
+        self.assertIsNone(trace_controller.thread_error())
+
+    @mock.patch('tracerface.trace_process._get_bcc_trace_tool')
+    def test_monitoring_reports_error_if_process_dies(self, tool):
+        tool.return_value.run = lambda: None
+        trace_controller = TraceController()
+
+        _, monitoring = self._start_monitoring(trace_controller, CallGraph())
+        monitoring.join(timeout=2)
+
+        self.assertFalse(monitoring.is_alive())
+        self.assertEqual(trace_controller.thread_error(), 'Tracing stopped unexpectedly')
+
+    @staticmethod
+    def _dummy_trace():
+        print('19059  19059  dummy_source1 func1')
+        print('b\'func1+0x0 [dummy_source1]\'')
+        print('b\'func2+0x26 [dummy_source1]\'')
+        print()
+        time.sleep(10)
+
+    @mock.patch('tracerface.trace_process._get_bcc_trace_tool')
+    def test_monitoring_loads_stacks_in_call_graph(self, tool):
+        tool.return_value.run = self._dummy_trace
+        trace_controller = TraceController()
+        call_graph = CallGraph()
+
+        _, monitoring = self._start_monitoring(trace_controller, call_graph)
+        time.sleep(1)
+        trace_controller.stop_trace()
+        monitoring.join(timeout=2)
+
+        names = sorted(node['name'] for node in call_graph.get_nodes().values())
+        self.assertEqual(names, ['func1', 'func2'])
+        self.assertEqual(len(call_graph.get_edges()), 1)
+        self.assertEqual(trace_controller.stack_cache_stats()['misses'], 1)
+
+    @mock.patch('tracerface.trace_process._get_bcc_trace_tool')
+    def test_monitoring_defers_counted_stacks_to_call_graph(self, tool):
+        tool.return_value.run = self._dummy_trace
+        trace_controller = TraceController(count_stacks=True)
+        call_graph = CallGraph()
+
+        _, monitoring = self._start_monitoring(trace_controller, call_graph)
+        time.sleep(1)
+        trace_controller.stop_trace()
+        monitoring.join(timeout=2)
+
+        self.assertEqual(call_graph.get_nodes(), {})
+        call_graph.version()
+        names = sorted(node['name'] for node in call_graph.get_nodes().values())
+        self.assertEqual(names, ['func1', 'func2'])
+
+    @mock.patch('tracerface.trace_process._get_bcc_trace_tool')
+    def test_monitoring_loads_aggregates_in_call_graph(self, tool):
+        tool.return_value.run = self._dummy_trace
+        trace_controller = TraceController(aggregate=True)
+        call_graph = CallGraph()
+
+        _, monitoring = self._start_monitoring(trace_controller, call_graph)
+        time.sleep(1)
+        trace_controller.stop_trace()
+        monitoring.join(timeout=2)
+
+        counts = sorted((node['name'], node['call_count']) for node in call_graph.get_nodes().values())
+        self.assertEqual(counts, [('func1', 1), ('func2', 0)])
+        self.assertEqual([edge['call_count'] for edge in call_graph.get_edges().values()], [1])
+
+    @mock.patch('tracerface.trace_process._get_bcc_trace_tool')
+    def test_monitoring_loads_stacks_through_shared_memory(self, tool):
+        tool.return_value.run = self._dummy_trace
+        trace_controller = TraceController(shared_memory=True)
+        call_graph = CallGraph()
+
+        _, monitoring = self._start_monitoring(trace_controller, call_graph)
+        time.sleep(1)
+        trace_controller.stop_trace()
+        monitoring.join(timeout=2)
+
+        names = sorted(node['name'] for node in call_graph.get_nodes().values())
+        self.assertEqual(names, ['func1', 'func2'])
+        self.assertEqual(trace_controller.dropped_stacks(), 0)
+
+    # Prints a call-stack whose end is only known once bcc trace
+    # is interrupted, then exits like bcc trace on interrupt
+    @staticmethod
+    def _dummy_trace_interrupted():
+        print('19059  19059  dummy_source1 func1')
+        print('b\'func1+0x0 [dummy_source1]\'')
+        print('b\'func2+0x26 [dummy_source1]\'')
+        try:
+            time.sleep(10)
+        except KeyboardInterrupt:
+            sys.exit()
+
+    @mock.patch('tracerface.trace_process._get_bcc_trace_tool')
+    def test_output_held_by_process_is_loaded_after_stop(self, tool):
+        tool.return_value.run = self._dummy_trace_interrupted
+        for options in [{}, {'aggregate': True}, {'shared_memory': True}]:
+            trace_controller = TraceController(**options)
+            call_graph = CallGraph()
+
+            process, monitoring = self._start_monitoring(trace_controller, call_graph)
+            time.sleep(0.5)
+            trace_controller.stop_trace()
+            monitoring.join(timeout=5)
+
+            self.assertFalse(monitoring.is_alive())
+            self.assertEqual(process.exitcode, 0)
+            counts = sorted((node['name'], node['call_count']) for node in call_graph.get_nodes().values())
+            self.assertEqual(counts, [('func1', 1), ('func2', 0)], options)
+
+    @mock.patch('tracerface.trace_process._get_bcc_trace_tool')
+    def test_monitoring_records_capture(self, tool):
+        tool.return_value.run = self._dummy_trace
+        with TemporaryDirectory() as directory:
+            path = str(Path(directory).joinpath('capture'))
+            trace_controller = TraceController(capture_path=path)
+
+            _, monitoring = self._start_monitoring(trace_controller, CallGraph())
+            time.sleep(1)
+            trace_controller.stop_trace()
+            monitoring.join(timeout=2)
+
+            counts = sorted((node['name'], node['call_count']) for node in read_capture(path).get_nodes().values())
+        self.assertEqual(counts, [('func1', 1), ('func2', 0)])
+
+
 if __name__ == '__main__':
     main()
@@ -1,37 +1,108 @@
 #!/usr/bin/env python3
 from multiprocessing import get_context
-import sys
+from queue import Empty
 import time
 from unittest import main, mock, TestCase
 
-from tracerface.trace_process import TraceProcess, WritableQueue
+from tracerface.trace_process import AggregatingWriter, StackWriter, TraceProcess
 
 
-class TestWritableQueue(TestCase):
-    def test_written_value_gets_put_in_writable_queue(self):
-        queue = WritableQueue(ctx=get_context())
-        queue.write('val')
-        self.assertEqual(queue.get(), 'val')
+class TestStackWriter(TestCase):
+    def test_complete_stacks_are_sent_together(self):
+        queue = get_context().Queue()
+        writer = StackWriter(queue, flush_size=10, flush_interval=10)
+        writer.write('line1\n\n')
+        writer.write('line2\nline3\n\n')
+        self.assertEqual(queue.get(timeout=1), ['line1', 'line2\nline3'])
+        writer.close()
+
+    def test_unfinished_stack_is_not_sent_before_close(self):
+        queue = get_context().Queue()
+        writer = StackWriter(queue, flush_size=1, flush_interval=10)
+        writer.write('line1')
+        writer.write('\n')
+        with self.assertRaises(Empty):
+            queue.get(timeout=0.1)
+        writer.close()
+        self.assertEqual(queue.get(timeout=1), ['line1\n'])
+
+    def test_stack_end_is_found_across_separate_writes(self):
+        queue = get_context().Queue()
+        writer = StackWriter(queue, flush_size=1, flush_interval=10)
+        for output in ['line1', '\n', 'line2', '\n', '\n', 'line3']:
+            writer.write(output)
+        self.assertEqual(queue.get(timeout=1), ['line1\nline2'])
+        writer.close()
+
+    def test_stacks_are_sent_after_flush_interval(self):
+        queue = get_context().Queue()
+        writer = StackWriter(queue, flush_interval=0.05)
+        writer.write('line1\n\n')
+        self.assertEqual(queue.get(timeout=1), ['line1'])
+        writer.close()
+
+
+class TestAggregatingWriter(TestCase):
+    def test_counts_of_stacks_are_sent_together(self):
+        queue = get_context().Queue()
+        writer = AggregatingWriter(queue, flush_interval=0.05)
+        stack = "19059  19059  dummy_source1 func1\n  b'func1+0x0 [dummy_source1]'\n\n"
+        writer.write(stack)
+        writer.write(stack)
+
+        aggregate = queue.get(timeout=1)
+        self.assertEqual(aggregate.stack_count(), 2)
+        self.assertEqual(list(aggregate.get_nodes().values()), [
+            {'name': 'func1', 'source': 'dummy_source1', 'call_count': 2}
+        ])
+        writer.close()
+
+    def test_nothing_is_sent_without_stacks(self):
+        queue = get_context().Queue()
+        writer = AggregatingWriter(queue, flush_interval=0.01)
+        writer.close()
+        with self.assertRaises(Empty):
+            queue.get(timeout=0.1)
 
 
 class TesTraceProcess(TestCase):
-    def test_get_value_returns_none_for_empty_trace_process(self):
+    def test_get_stacks_returns_empty_list_after_timeout(self):
         process = TraceProcess('dummy_args')
-        self.assertEqual(process.get_output(), None)
+        start = time.monotonic()
+        self.assertEqual(process.get_stacks(timeout=0.2), [])
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
 
     @mock.patch('tracerface.trace_process._get_bcc_trace_tool')
-    def test_get_value_returns_value_from_tool(self, tool):
+    def test_get_stacks_returns_stacks_from_tool(self, tool):
         def dummy_print():
-            print('dummy_val')
+            print('dummy_val1')
+            print('dummy_val2')
+            print()
+            print('dummy_val3')
 
         tool.return_value.run = dummy_print
         process = TraceProcess('dummy_args')
         process.start()
         process.join()
-        self.assertEqual(process.get_output(), 'dummy_val')
+        self.assertEqual(process.get_stacks(timeout=1), [['dummy_val1', 'dummy_val2'], ['dummy_val3']])
 
     @mock.patch('tracerface.trace_process._get_bcc_trace_tool')
-    def test_get_value_strips_spaces(self, tool):
+    def test_get_stacks_through_shared_memory(self, tool):
+        def dummy_print():
+            print('dummy_val1')
+            print()
+            print('dummy_val2')
+
+        tool.return_value.run = dummy_print
+        process = TraceProcess('dummy_args', shared_memory=True)
+        process.start()
+        process.join()
+        self.assertEqual(process.get_stacks(timeout=1), [['dummy_val1'], ['dummy_val2']])
+        self.assertEqual(process.get_dropped(), 0)
+        process.release()
+
+    @mock.patch('tracerface.trace_process._get_bcc_trace_tool')
+    def test_get_stacks_strips_spaces(self, tool):
         def dummy_print():
             print('         dummy_val         ')
 
@@ -39,18 +110,19 @@ class TesTraceProcess(TestCase):
         process = TraceProcess('dummy_args')
         process.start()
         process.join()
-        self.assertEqual(process.get_output(), 'dummy_val')
+        self.assertEqual(process.get_stacks(timeout=1), [['dummy_val']])
 
     @mock.patch('tracerface.trace_process._get_bcc_trace_tool')
-    def test_get_value_keeps_empty_line(self, tool):
+    def test_get_stacks_skips_empty_lines(self, tool):
         def dummy_print():
             print('\n')
+            print('dummy_val')
 
         tool.return_value.run = dummy_print
         process = TraceProcess('dummy_args')
         process.start()
         process.join()
-        self.assertEqual(process.get_output(), '\n')
+        self.assertEqual(process.get_stacks(timeout=1), [['dummy_val']])
 
 
 if __name__ == '__main__':
@@ -4,7 +4,7 @@ from unittest.mock import patch
 
 from yaml.parser import ParserError, ScannerError
 
-from tracerface.web_ui.trace_setup import (
+from tracerface.trace_setup import (
     BinaryAlreadyAddedError,
     BinaryNotExistsError,
     ConfigFileError,
@@ -27,7 +27,7 @@ def dummy_setup():
 
 
 class TestInitBinary(TestCase):
-    @patch('tracerface.web_ui.trace_setup.check_output', return_value=b'func1\nfunc2\nfunc3\n')
+    @patch('tracerface.trace_setup.check_output', return_value=b'func1\nfunc2\nfunc3\n')
     def test_initialize_binary(self, nm):
         setup = Setup()
 
@@ -71,7 +71,7 @@ class TestRemoveApp(TestCase):
 
 
 class TestInitBuiltin(TestCase):
-    @patch('tracerface.web_ui.trace_setup.Setup.get_offset_for_built_in', return_value=12)
+    @patch('tracerface.trace_setup.Setup.get_offset_for_built_in', return_value=12)
     def test_initialize_built_in(self, get_offset_for_built_in):
         setup = Setup()
 
@@ -106,7 +106,7 @@ class TestGetAppSetup(TestCase):
 
 
 class TestSetupFunctionToTrace(TestCase):
-    @patch('tracerface.web_ui.trace_setup.Setup.get_offset_for_function', return_value=8)
+    @patch('tracerface.trace_setup.Setup.get_offset_for_function', return_value=8)
     def test_setup_function_to_trace_with_demangled_name(self, get_offset_for_function):
         setup = Setup()
         setup._setup = dummy_setup()
@@ -124,7 +124,7 @@ class TestSetupFunctionToTrace(TestCase):
         }
         self.assertEqual(setup._setup, expected)
 
-    @patch('tracerface.web_ui.trace_setup.Setup.get_offset_for_function', return_value=10)
+    @patch('tracerface.trace_setup.Setup.get_offset_for_function', return_value=10)
     def test_setup_function_to_trace_with_mangled_name(self, get_offset_for_function):
         setup = Setup()
         setup._setup = dummy_setup()
@@ -150,7 +150,7 @@ class TestSetupFunctionToTrace(TestCase):
 
 
 class TestRemoveFunctionFromTrace(TestCase):
-    @patch('tracerface.web_ui.trace_setup.Setup.get_offset_for_function', return_value=8)
+    @patch('tracerface.trace_setup.Setup.get_offset_for_function', return_value=8)
     def test_remove_function_from_trace_with_demangled_name(self, get_offset_for_function):
         setup = Setup()
         setup._setup = dummy_setup()
@@ -163,7 +163,7 @@ class TestRemoveFunctionFromTrace(TestCase):
 
         self.assertEqual(setup._setup, expected_setup)
 
-    @patch('tracerface.web_ui.trace_setup.Setup.get_offset_for_function', return_value=8)
+    @patch('tracerface.trace_setup.Setup.get_offset_for_function', return_value=8)
     def test_remove_function_from_trace_with_mangled_name(self, get_offset_for_function):
         setup = Setup()
         setup._setup = dummy_setup()
@@ -241,7 +241,7 @@ class TestGenerateBCCArgs(TestCase):
 
 
 class TestLoadFromFile(TestCase):
-    @patch('tracerface.web_ui.trace_setup.Path.read_text')
+    @patch('tracerface.trace_setup.Path.read_text')
     def test_load_from_file_raises_exception_if_file_not_found(self, read):
         def side_effect():
             raise FileNotFoundError
@@ -251,7 +251,7 @@ class TestLoadFromFile(TestCase):
         with self.assertRaises(ConfigFileError):
             setup.load_from_file('/dummy/path')
 
-    @patch('tracerface.web_ui.trace_setup.Path.read_text')
+    @patch('tracerface.trace_setup.Path.read_text')
     def test_load_from_file_raises_exception_if_file_is_directory(self, read):
         def side_effect():
             raise IsADirectoryError
@@ -261,8 +261,8 @@ class TestLoadFromFile(TestCase):
         with self.assertRaises(ConfigFileError) as ctx:
             setup.load_from_file('/dummy/path')
 
-    @patch('tracerface.web_ui.trace_setup.yaml.safe_load')
-    @patch('tracerface.web_ui.trace_setup.Path.read_text')
+    @patch('tracerface.trace_setup.yaml.safe_load')
+    @patch('tracerface.trace_setup.Path.read_text')
     def test_load_from_file_raises_exception_on_yaml_parse_error(self, read, load):
         def side_effect(content):
             raise ParserError
@@ -272,8 +272,8 @@ class TestLoadFromFile(TestCase):
         with self.assertRaises(ConfigFileError) as ctx:
             setup.load_from_file('/dummy/path')
 
-    @patch('tracerface.web_ui.trace_setup.yaml.safe_load')
-    @patch('tracerface.web_ui.trace_setup.Path.read_text')
+    @patch('tracerface.trace_setup.yaml.safe_load')
+    @patch('tracerface.trace_setup.Path.read_text')
     def test_load_from_file_raises_exception_on_yaml_scan_error(self, read, load):
         def side_effect(content):
             raise ScannerError
@@ -283,9 +283,9 @@ class TestLoadFromFile(TestCase):
         with self.assertRaises(ConfigFileError) as ctx:
             setup.load_from_file('/dummy/path')
 
-    @patch('tracerface.web_ui.trace_setup.yaml.safe_load', return_value={'dummy_built_in' : {}})
-    @patch('tracerface.web_ui.trace_setup.Path.read_text')
-    @patch('tracerface.web_ui.trace_setup.Setup.get_offset_for_built_in', return_value=8)
+    @patch('tracerface.trace_setup.yaml.safe_load', return_value={'dummy_built_in' : {}})
+    @patch('tracerface.trace_setup.Path.read_text')
+    @patch('tracerface.trace_setup.Setup.get_offset_for_built_in', return_value=8)
     def test_load_from_file_adds_built_in_if_binary_not_found(self, read, load, get_offset_for_built_in):
         setup = Setup()
         setup.load_from_file('dummy/path')
@@ -294,14 +294,14 @@ class TestLoadFromFile(TestCase):
 
 
 class TestGetOffsetForBuiltIn(TestCase):
-    @patch('tracerface.web_ui.trace_setup.check_output', side_effect=[b'0\n10', b'push %rbp\nmov %rsp,%rbp\n0x8'])
+    @patch('tracerface.trace_setup.check_output', side_effect=[b'0\n10', b'push %rbp\nmov %rsp,%rbp\n0x8'])
     def test_get_offset_for_built_in_existing(self, check_output):
         setup = Setup()
         result = setup.get_offset_for_built_in('builtin_func')
         expected = 8
         self.assertEqual(result, expected)
 
-    @patch('tracerface.web_ui.trace_setup.check_output', side_effect=[b'0\n10', b'line1\nline2'])
+    @patch('tracerface.trace_setup.check_output', side_effect=[b'0\n10', b'line1\nline2'])
     def test_get_offset_for_built_in_no_match(self, check_output):
         setup = Setup()
         result = setup.get_offset_for_built_in('builtin_func')
@@ -315,21 +315,21 @@ class TestGetOffsetForBuiltIn(TestCase):
 
 
 class TestGetOffsetForFunction(TestCase):
-    @patch('tracerface.web_ui.trace_setup.check_output', return_value=b'push %rbp\nmov %rsp,%rbp\n<func1+0x1a>')
+    @patch('tracerface.trace_setup.check_output', return_value=b'push %rbp\nmov %rsp,%rbp\n<func1+0x1a>')
     def test_get_offset_for_function_hexadecimal(self, check_output):
         setup = Setup()
         result = setup.get_offset_for_function('app', 'func1')
         expected = 26
         self.assertEqual(result, expected)
 
-    @patch('tracerface.web_ui.trace_setup.check_output', return_value=b'extra1\npush %rbp\nextra2\nmov %rsp,%rbp\nextra3\n<func2+0x8>')
+    @patch('tracerface.trace_setup.check_output', return_value=b'extra1\npush %rbp\nextra2\nmov %rsp,%rbp\nextra3\n<func2+0x8>')
     def test_get_offset_for_function_extra_lines(self, check_output):
         setup = Setup()
         result = setup.get_offset_for_function('app', 'func2')
         expected = 8
         self.assertEqual(result, expected)
 
-    @patch('tracerface.web_ui.trace_setup.check_output', return_value=b'line1\nline2')
+    @patch('tracerface.trace_setup.check_output', return_value=b'line1\nline2')
     def test_get_offset_for_function_no_match(self, check_output):
         setup = Setup()
         result = setup.get_offset_for_function('app', 'func')
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+from unittest import main, TestCase
+
+from tracerface.call_graph import CallGraph
+from tracerface.web_ui.layered_layout import COLUMN_WIDTH, LAYER_HEIGHT, LayeredLayout
+
+
+# Create call graph with the given edges
+def _call_graph(*edges):
+    call_graph = CallGraph()
+    call_graph.load_edges({edge: {'param': [], 'call_count': 1} for edge in edges})
+    return call_graph
+
+
+class TestLayeredLayout(TestCase):
+    def test_callers_are_placed_above_called_nodes(self):
+        call_graph = _call_graph((0, 1), (1, 2))
+        layout = LayeredLayout()
+        layout.add_nodes(call_graph, [2, 1, 0])
+        self.assertEqual(layout.get_position(0), {'x': 0, 'y': 0})
+        self.assertEqual(layout.get_position(1), {'x': 0, 'y': LAYER_HEIGHT})
+        self.assertEqual(layout.get_position(2), {'x': 0, 'y': 2 * LAYER_HEIGHT})
+
+    def test_nodes_of_a_layer_get_different_columns(self):
+        call_graph = _call_graph((0, 1), (0, 2), (0, 3))
+        layout = LayeredLayout()
+        layout.add_nodes(call_graph, [0, 1, 2, 3])
+        columns = [layout.get_position(node_id)['x'] for node_id in [1, 2, 3]]
+        self.assertEqual(columns, [0, COLUMN_WIDTH, -COLUMN_WIDTH])
+
+    def test_placed_nodes_do_not_move(self):
+        call_graph = _call_graph((0, 1))
+        layout = LayeredLayout()
+        layout.add_nodes(call_graph, [0, 1])
+        call_graph.load_edges({(2, 1): {'param': [], 'call_count': 1}})
+        layout.add_nodes(call_graph, [0, 1, 2])
+        self.assertEqual(layout.get_position(1), {'x': 0, 'y': LAYER_HEIGHT})
+        self.assertEqual(layout.get_position(2), {'x': COLUMN_WIDTH, 'y': 0})
+
+    def test_cycles_are_placed(self):
+        call_graph = _call_graph((0, 1), (1, 0), (1, 1))
+        layout = LayeredLayout()
+        layout.add_nodes(call_graph, [0, 1])
+        self.assertEqual(layout.get_position(0), {'x': 0, 'y': 0})
+        self.assertEqual(layout.get_position(1), {'x': 0, 'y': LAYER_HEIGHT})
+
+    def test_clear_forgets_positions(self):
+        call_graph = _call_graph((0, 1))
+        layout = LayeredLayout()
+        layout.add_nodes(call_graph, [1])
+        layout.clear()
+        layout.add_nodes(call_graph, [0, 1])
+        self.assertEqual(layout.get_position(1), {'x': 0, 'y': LAYER_HEIGHT})
+
+
+if __name__ == '__main__':
+    main()
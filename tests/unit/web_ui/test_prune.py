@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+from unittest import main, TestCase
+
+from tracerface.call_graph import CallGraph
+from tracerface.web_ui.prune import fold_hidden_nodes, select_focused_nodes, select_hot_nodes
+
+
+# Create node with a given number of calls
+def _node(call_count):
+    return {'name': 'dummy_name', 'source': 'dummy_source', 'call_count': call_count}
+
+
+class TestSelectHotNodes(TestCase):
+    def _call_graph(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({0: _node(5), 1: _node(1), 2: _node(9), 3: _node(3)})
+        return call_graph
+
+    # Traced nodes 3 and 4, called by 1 and 2, which are called by 0
+    def _call_graph_with_callers(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({0: _node(0), 1: _node(0), 2: _node(0), 3: _node(6), 4: _node(2)})
+        call_graph.load_edges({
+            (0, 1): {'param': [], 'call_count': 0},
+            (0, 2): {'param': [], 'call_count': 0},
+            (1, 4): {'param': [], 'call_count': 2},
+            (2, 3): {'param': [], 'call_count': 6}
+        })
+        return call_graph
+
+    def test_all_nodes_without_limits(self):
+        self.assertEqual(select_hot_nodes(self._call_graph()), [0, 1, 2, 3])
+
+    def test_top_nodes(self):
+        self.assertEqual(select_hot_nodes(self._call_graph(), top=2), [2, 0])
+
+    def test_top_larger_than_graph(self):
+        self.assertEqual(select_hot_nodes(self._call_graph(), top=10), [0, 1, 2, 3])
+
+    def test_nodes_above_threshold(self):
+        self.assertEqual(select_hot_nodes(self._call_graph(), threshold=3), [0, 2, 3])
+
+    def test_top_nodes_above_threshold(self):
+        self.assertEqual(select_hot_nodes(self._call_graph(), top=1, threshold=3), [2])
+
+    def test_top_larger_than_traced_nodes_adds_callers_by_calls(self):
+        self.assertEqual(select_hot_nodes(self._call_graph_with_callers(), top=3), [3, 4, 2])
+        self.assertEqual(select_hot_nodes(self._call_graph_with_callers(), top=4), [3, 4, 2, 1])
+        self.assertEqual(select_hot_nodes(self._call_graph_with_callers(), top=10), [3, 4, 2, 1, 0])
+
+    def test_threshold_does_not_add_callers(self):
+        self.assertEqual(select_hot_nodes(self._call_graph_with_callers(), top=4, threshold=1), [3, 4])
+
+
+class TestFoldHiddenNodes(TestCase):
+    def _call_graph(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({0: _node(1), 1: _node(4), 2: _node(2), 3: _node(1)})
+        call_graph.load_edges({
+            (0, 1): {'param': [], 'call_count': 4},
+            (0, 2): {'param': [], 'call_count': 2},
+            (0, 3): {'param': [], 'call_count': 1},
+            (2, 3): {'param': [], 'call_count': 1}
+        })
+        return call_graph
+
+    def test_nothing_folded_when_all_nodes_kept(self):
+        kept_edges, other_nodes, other_edges = fold_hidden_nodes(self._call_graph(), [0, 1, 2, 3])
+        self.assertEqual(sorted(kept_edges), [(0, 1), (0, 2), (0, 3), (2, 3)])
+        self.assertEqual(other_nodes, {})
+        self.assertEqual(other_edges, {})
+
+    def test_hidden_callees_are_folded_per_caller(self):
+        kept_edges, other_nodes, other_edges = fold_hidden_nodes(self._call_graph(), [0, 1])
+        self.assertEqual(kept_edges, [(0, 1)])
+        self.assertEqual(other_nodes, {
+            'other-0': {'name': 'other', 'source': '2 hidden functions', 'call_count': 3}
+        })
+        self.assertEqual(list(other_edges), [(0, 'other-0')])
+        self.assertEqual(other_edges[(0, 'other-0')]['call_count'], 3)
+
+    def test_hidden_callers_are_folded_per_called_node(self):
+        kept_edges, other_nodes, other_edges = fold_hidden_nodes(self._call_graph(), [3])
+        self.assertEqual(kept_edges, [])
+        self.assertEqual(other_nodes, {
+            'other-callers-3': {'name': 'other callers', 'source': '2 hidden functions', 'call_count': 0}
+        })
+        self.assertEqual(list(other_edges), [('other-callers-3', 3)])
+        self.assertEqual(other_edges[('other-callers-3', 3)]['call_count'], 2)
+
+
+
+class TestSelectFocusedNodes(TestCase):
+    # Chain of callers 0 -> 1 -> 2 -> 3 where 3 is traced, and 4 -> 3
+    def _call_graph(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({0: _node(0), 1: _node(0), 2: _node(0), 3: _node(2), 4: _node(0)})
+        call_graph.load_edges({
+            (0, 1): {'param': [], 'call_count': 1},
+            (1, 2): {'param': [], 'call_count': 1},
+            (2, 3): {'param': [], 'call_count': 1},
+            (4, 3): {'param': [], 'call_count': 1}
+        })
+        return call_graph
+
+    def test_traced_nodes_with_callers(self):
+        nodes, edges = select_focused_nodes(self._call_graph(), [])
+        self.assertEqual(nodes, [3, 2, 4])
+        self.assertEqual(edges, [(2, 3), (4, 3)])
+
+    def test_expanded_nodes_show_callers(self):
+        nodes, edges = select_focused_nodes(self._call_graph(), [2, 1])
+        self.assertEqual(nodes, [3, 2, 4, 1, 0])
+        self.assertEqual(sorted(edges), [(0, 1), (1, 2), (2, 3), (4, 3)])
+
+    def test_expanded_nodes_not_reached_are_ignored(self):
+        nodes, _ = select_focused_nodes(self._call_graph(), [1])
+        self.assertEqual(nodes, [3, 2, 4])
+
+
+if __name__ == '__main__':
+    main()
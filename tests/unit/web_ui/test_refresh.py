@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+from unittest import main, TestCase
+
+from tracerface.web_ui.refresh import (
+    next_interval,
+    DEFAULT_INTERVAL,
+    MAX_INTERVAL,
+    MIN_INTERVAL
+)
+
+
+class TestNextInterval(TestCase):
+    def test_backs_off_while_idle(self):
+        self.assertEqual(next_interval(DEFAULT_INTERVAL, 0, 0), 2 * DEFAULT_INTERVAL)
+
+    def test_backs_off_up_to_maximum(self):
+        interval = DEFAULT_INTERVAL
+        for _ in range(10):
+            interval = next_interval(interval, 0, 0)
+        self.assertEqual(interval, MAX_INTERVAL)
+
+    def test_speeds_up_on_changes(self):
+        self.assertEqual(next_interval(4000, 10, 0), 2000)
+
+    def test_speeds_up_down_to_minimum(self):
+        self.assertEqual(next_interval(300, 10, 0), MIN_INTERVAL)
+
+    def test_slow_conversion_lengthens_interval(self):
+        self.assertEqual(next_interval(DEFAULT_INTERVAL, 10, 800), 1600)
+
+    def test_slow_conversion_exceeds_maximum(self):
+        self.assertEqual(next_interval(MAX_INTERVAL, 0, 4000), 8000)
+
+
+if __name__ == '__main__':
+    main()
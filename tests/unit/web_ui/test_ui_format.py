@@ -1,25 +1,38 @@
 #!/usr/bin/env python3
-from unittest import main, TestCase
+from unittest import main, mock, TestCase
 
+from tracerface.call_graph import CallGraph
+from tracerface.param_store import ParamStore
+from tracerface.web_ui import ui_format
+from tracerface.web_ui.layered_layout import LayeredLayout
 from tracerface.web_ui.ui_format import (
     convert_edges_to_cytoscape_format,
-    convert_nodes_to_cytoscape_format
+    convert_nodes_to_cytoscape_format,
+    ElementCache
 )
 
 
+# Create parameter store with the parameters of the given calls
+def _store(*calls):
+    store = ParamStore()
+    for params in calls:
+        store.add(params)
+    return store
+
+
 class TestConvertNodes(TestCase):
     def _edges(self):
         return {
             ('dummy_hash1', 'dummy_hash2'): {
-                'params': [],
+                'params': _store(),
                 'call_count': 0
             },
             ('dummy_hash1', 'dummy_hash3'): {
-                'params': [['dummy_param']],
+                'params': _store(['dummy_param']),
                 'call_count': 3
             },
             ('dummy_hash2', 'dummy_hash3'): {
-                'params': [['dummy_param1'], ['dummy_param2'], ['dummy_param3']],
+                'params': _store(['dummy_param1'], ['dummy_param2'], ['dummy_param3']),
                 'call_count': 4
             }
         }
@@ -67,6 +80,32 @@ class TestConvertNodes(TestCase):
         result = convert_nodes_to_cytoscape_format(nodes, self._edges())
         self.assertEqual(result, expected)
 
+    def test_convert_node_uses_given_callers_index(self):
+        nodes = {
+            'dummy_hash3': {
+                'name': 'dummy_name3',
+                'source': 'dummy_source1',
+                'call_count': 2
+            }
+        }
+        result = convert_nodes_to_cytoscape_format(nodes, self._edges(), {'dummy_hash3': ['dummy_hash2']})
+        expected_info = 'dummy_name3\n' + 'Source: dummy_source1\n' + 'Called 2 times\n'
+        expected_info += 'With parameters:\n' + 'dummy_param1\n' + 'dummy_param2\n' + 'dummy_param3'
+        self.assertEqual(result[0]['data']['info'], expected_info)
+
+    def test_convert_only_nodes_with_given_ids(self):
+        nodes = {
+            'dummy_hash1': {'name': 'dummy_name1', 'source': 'dummy_source1', 'call_count': 0},
+            'dummy_hash3': {'name': 'dummy_name3', 'source': 'dummy_source1', 'call_count': 2}
+        }
+        result = convert_nodes_to_cytoscape_format(nodes, self._edges(), node_ids=['dummy_hash3'])
+        self.assertEqual([node['data']['id'] for node in result], ['dummy_hash3'])
+
+    def test_convert_node_turns_integer_id_into_string(self):
+        nodes = {7: {'name': 'dummy_name', 'source': 'dummy_source', 'call_count': 1}}
+        result = convert_nodes_to_cytoscape_format(nodes, {})
+        self.assertEqual(result[0]['data']['id'], '7')
+
 
 
 class TestConvertEdges(TestCase):
@@ -91,7 +130,7 @@ class TestConvertEdges(TestCase):
     def test_convert_edge_without_params(self):
         edges = {
             ('dummy_hash1', 'dummy_hash2'): {
-                'params': [],
+                'params': _store(),
                 'call_count': 0
             }
         }
@@ -100,6 +139,7 @@ class TestConvertEdges(TestCase):
                     'call_count': 0,
                     'called_name': 'dummy_name2',
                     'caller_name': 'dummy_name1',
+                    'id': 'dummy_hash1-dummy_hash2',
                     'info': 'Call made 0 times',
                     'params': '',
                     'source': 'dummy_hash1',
@@ -112,7 +152,7 @@ class TestConvertEdges(TestCase):
     def test_convert_edge_with_single_param(self):
         edges = {
             ('dummy_hash1', 'dummy_hash3'): {
-                'params': [['dummy_param']],
+                'params': _store(['dummy_param']),
                 'call_count': 3
             }
         }
@@ -121,6 +161,7 @@ class TestConvertEdges(TestCase):
                 'call_count': 3,
                 'called_name': 'dummy_name3',
                 'caller_name': 'dummy_name1',
+                'id': 'dummy_hash1-dummy_hash3',
                 'info': 'Call made 3 times\nWith parameters:\ndummy_param',
                 'params': 'dummy_param',
                 'source': 'dummy_hash1',
@@ -133,7 +174,7 @@ class TestConvertEdges(TestCase):
     def test_convert_edge_with_multiple_params(self):
         edges = {
             ('dummy_hash2', 'dummy_hash3'): {
-                'params': [['dummy_param1'], ['dummy_param2'], ['dummy_param3']],
+                'params': _store(['dummy_param1'], ['dummy_param2'], ['dummy_param3']),
                 'call_count': 4
             }
         }
@@ -144,6 +185,7 @@ class TestConvertEdges(TestCase):
                 'call_count': 4,
                 'called_name': 'dummy_name3',
                 'caller_name': 'dummy_name2',
+                'id': 'dummy_hash2-dummy_hash3',
                 'info': expected_info,
                 'params': '...',
                 'source': 'dummy_hash2',
@@ -153,6 +195,220 @@ class TestConvertEdges(TestCase):
         result = convert_edges_to_cytoscape_format(self._nodes(), edges)
         self.assertEqual(result, expected)
 
+    def test_convert_edge_turns_integer_ids_into_strings(self):
+        nodes = {
+            0: {'name': 'dummy_name1', 'source': 'dummy_source', 'call_count': 0},
+            1: {'name': 'dummy_name2', 'source': 'dummy_source', 'call_count': 1}
+        }
+        edges = {(0, 1): {'params': _store(), 'call_count': 1}}
+        result = convert_edges_to_cytoscape_format(nodes, edges)
+        self.assertEqual(result[0]['data']['source'], '0')
+        self.assertEqual(result[0]['data']['target'], '1')
+        self.assertEqual(result[0]['data']['id'], '0-1')
+
+    def test_convert_only_edges_with_given_ids(self):
+        edges = {
+            ('dummy_hash1', 'dummy_hash3'): {'params': _store(), 'call_count': 1},
+            ('dummy_hash2', 'dummy_hash3'): {'params': _store(), 'call_count': 1}
+        }
+        result = convert_edges_to_cytoscape_format(self._nodes(), edges, [('dummy_hash2', 'dummy_hash3')])
+        self.assertEqual([edge['data']['id'] for edge in result], ['dummy_hash2-dummy_hash3'])
+
+    def test_convert_edge_with_more_calls_than_samples(self):
+        store = ParamStore(sample_size=2, top_k=2)
+        for params in [['a'], ['b'], ['a'], ['c'], ['a']]:
+            store.add(params)
+        edges = {('dummy_hash1', 'dummy_hash2'): {'params': store, 'call_count': 5}}
+
+        result = convert_edges_to_cytoscape_format(self._nodes(), edges)
+
+        expected_info = 'Call made 5 times\nWith parameters:\n'
+        expected_info += '5 calls with 3 distinct values, most frequent:\n'
+        expected_info += 'a (3 times)\nb (1 times)'
+        self.assertEqual(result[0]['data']['info'], expected_info)
+        self.assertEqual(result[0]['data']['params'], '...')
+
+
+
+class TestElementCache(TestCase):
+    def _node(self, call_count=1):
+        return {'name': 'dummy_name', 'source': 'dummy_source', 'call_count': call_count}
+
+    def _call_graph(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({0: self._node(), 1: self._node(), 2: self._node()})
+        call_graph.load_edges({(0, 1): {'param': [], 'call_count': 1}})
+        return call_graph
+
+    def _ids(self, patch):
+        return sorted(element['data']['id'] for element in patch['elements'])
+
+    def test_first_patch_contains_all_elements(self):
+        patch = ElementCache(self._call_graph()).get_patch(None)
+        self.assertEqual(patch['version'], 1)
+        self.assertTrue(patch['full'])
+        self.assertEqual(self._ids(patch), ['0', '0-1', '1', '2'])
+
+    def test_no_patch_for_client_up_to_date(self):
+        cache = ElementCache(self._call_graph())
+        version = cache.get_patch(None)['version']
+        self.assertIsNone(cache.get_patch(version))
+
+    def test_patch_contains_changed_elements(self):
+        call_graph = self._call_graph()
+        cache = ElementCache(call_graph)
+        version = cache.get_patch(None)['version']
+        call_graph.load_edges({(0, 1): {'param': ['dummy_param'], 'call_count': 1}})
+        call_graph.load_nodes({2: self._node()})
+        patch = cache.get_patch(version)
+        self.assertFalse(patch['full'])
+        self.assertEqual(self._ids(patch), ['0-1', '1', '2'])
+        self.assertEqual(patch['elements'][-1]['data']['call_count'], 2)
+
+    def test_only_changed_elements_are_converted(self):
+        call_graph = self._call_graph()
+        cache = ElementCache(call_graph)
+        cache.get_patch(None)
+        call_graph.load_nodes({2: self._node()})
+        with mock.patch.object(ui_format, '_get_info_text_for_node', return_value='') as convert_node:
+            with mock.patch.object(ui_format, '_get_info_text_for_edge', return_value='') as convert_edge:
+                patch = cache.get_patch(None)
+        self.assertEqual(convert_node.call_count, 1)
+        self.assertEqual(convert_edge.call_count, 0)
+        self.assertEqual(self._ids(patch), ['0', '0-1', '1', '2'])
+
+    def test_elements_are_converted_while_call_graph_is_locked(self):
+        call_graph = self._call_graph()
+        locked = []
+        def get_info_text(node, params):
+            locked.append(call_graph._lock.locked())
+            return ''
+        with mock.patch.object(ui_format, '_get_info_text_for_node', side_effect=get_info_text):
+            ElementCache(call_graph, LayeredLayout()).get_patch(None)
+        self.assertEqual(locked, [True, True, True])
+
+    def test_elements_changed_before_clear_are_skipped(self):
+        call_graph = self._call_graph()
+        cache = ElementCache(call_graph)
+        cache.get_patch(None)
+        call_graph.load_nodes({2: self._node()})
+        call_graph.load_edges({(0, 1): {'param': [], 'call_count': 1}})
+        changes_since = call_graph.changes_since
+        def clear_after_changes(version, until=None):
+            changes = changes_since(version, until)
+            call_graph.clear()
+            return changes
+        with mock.patch.object(call_graph, 'changes_since', side_effect=clear_after_changes):
+            cache.update()
+        patch = cache.get_patch(None)
+        self.assertTrue(patch['full'])
+        self.assertEqual(patch['elements'], [])
+
+    def test_pruned_patch_contains_hot_nodes_and_other_nodes(self):
+        call_graph = self._call_graph()
+        call_graph.load_nodes({1: self._node(3)})
+        patch = ElementCache(call_graph).get_patch(None, {'top': 1})
+        self.assertTrue(patch['full'])
+        self.assertEqual(patch['view'], {'top': 1})
+        self.assertEqual(self._ids(patch), ['1', 'other-callers-1', 'other-callers-1-1'])
+
+        call_graph.load_nodes({0: self._node(5)})
+        patch = ElementCache(call_graph).get_patch(None, {'top': 1})
+        self.assertEqual(self._ids(patch), ['0', '0-other-0', 'other-0'])
+
+    def test_pruned_patch_folds_hidden_callers(self):
+        call_graph = self._call_graph()
+        call_graph.load_nodes({1: self._node(3)})
+        patch = ElementCache(call_graph, LayeredLayout()).get_patch(None, {'top': 1})
+        self.assertEqual(self._ids(patch), ['1', 'other-callers-1', 'other-callers-1-1'])
+        positions = {element['data']['id']: element['position'] for element in patch['elements'] if 'position' in element}
+        self.assertLess(positions['other-callers-1']['y'], positions['1']['y'])
+
+    def test_pruned_nodes_are_selected_while_call_graph_is_locked(self):
+        call_graph = self._call_graph()
+        def select(graph, top, threshold):
+            self.assertTrue(graph._lock.locked())
+            return [0]
+        with mock.patch.object(ui_format, 'select_hot_nodes', side_effect=select):
+            patch = ElementCache(call_graph).get_patch(None, {'top': 1})
+        self.assertEqual(self._ids(patch), ['0', '0-other-0', 'other-0'])
+
+    def test_pruned_patch_leaves_edges_added_after_update(self):
+        call_graph = self._call_graph()
+        cache = ElementCache(call_graph)
+        update = cache.update
+        def update_before_load():
+            version = update()
+            call_graph.load_edges({(1, 0): {'param': [], 'call_count': 1}})
+            return version
+        with mock.patch.object(cache, 'update', side_effect=update_before_load):
+            patch = cache.get_patch(None, {'top': 5})
+        self.assertEqual(self._ids(patch), ['0', '0-1', '1', '2'])
+        patch = cache.get_patch(patch['version'], {'top': 5}, patch['view'])
+        self.assertEqual(self._ids(patch), ['0', '0-1', '1', '1-0', '2'])
+
+    def test_patch_is_sent_when_view_changes(self):
+        cache = ElementCache(self._call_graph())
+        patch = cache.get_patch(None, {'top': 1})
+        self.assertIsNone(cache.get_patch(patch['version'], {'top': 1}, patch['view']))
+        patch = cache.get_patch(patch['version'], None, patch['view'])
+        self.assertTrue(patch['full'])
+        self.assertEqual(self._ids(patch), ['0', '0-1', '1', '2'])
+
+    def test_focused_patch_contains_traced_nodes_and_callers(self):
+        call_graph = CallGraph()
+        call_graph.load_nodes({0: self._node(0), 1: self._node(0), 2: self._node(1)})
+        call_graph.load_edges({
+            (0, 1): {'param': [], 'call_count': 1},
+            (1, 2): {'param': [], 'call_count': 1}
+        })
+        cache = ElementCache(call_graph)
+        patch = cache.get_patch(None, {'focus': []})
+        self.assertTrue(patch['full'])
+        self.assertEqual(self._ids(patch), ['1', '1-2', '2'])
+        patch = cache.get_patch(patch['version'], {'focus': ['1']}, patch['view'])
+        self.assertEqual(self._ids(patch), ['0', '0-1', '1', '1-2', '2'])
+
+    def test_focused_nodes_are_selected_while_call_graph_is_locked(self):
+        def select(graph, expanded):
+            self.assertTrue(graph._lock.locked())
+            return [0, 1], [(0, 1)]
+        with mock.patch.object(ui_format, 'select_focused_nodes', side_effect=select):
+            patch = ElementCache(self._call_graph()).get_patch(None, {'focus': []})
+        self.assertEqual(self._ids(patch), ['0', '0-1', '1'])
+
+    def test_focused_patch_leaves_edges_added_after_update(self):
+        call_graph = self._call_graph()
+        cache = ElementCache(call_graph)
+        update = cache.update
+        def update_before_load():
+            version = update()
+            call_graph.load_edges({(1, 0): {'param': [], 'call_count': 1}})
+            return version
+        with mock.patch.object(cache, 'update', side_effect=update_before_load):
+            patch = cache.get_patch(None, {'focus': ['0', '1']})
+        self.assertEqual(self._ids(patch), ['0', '0-1', '1', '2'])
+
+    def test_nodes_are_given_positions_by_layout(self):
+        patch = ElementCache(self._call_graph(), LayeredLayout()).get_patch(None)
+        positions = {
+            element['data']['id']: element['position']
+            for element in patch['elements'] if 'position' in element
+        }
+        self.assertEqual(sorted(positions), ['0', '1', '2'])
+        self.assertEqual(positions['1']['x'], positions['0']['x'])
+        self.assertGreater(positions['1']['y'], positions['0']['y'])
+
+    def test_elements_are_dropped_on_clear(self):
+        call_graph = self._call_graph()
+        cache = ElementCache(call_graph)
+        version = cache.get_patch(None)['version']
+        call_graph.clear()
+        call_graph.load_nodes({5: self._node()})
+        patch = cache.get_patch(version)
+        self.assertTrue(patch['full'])
+        self.assertEqual(self._ids(patch), ['5'])
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+from collections import Counter
+
+from tracerface.param_store import ParamStore
+from tracerface.parse_stack import parse_frames, StackCache
+from tracerface.symbol_table import SymbolTable
+
+
+# The Aggregate class sums up the nodes and edges of many call-stacks
+# away from the call graph, e.g. inside the tracing process.
+# Its ids come from its own symbol table, so nodes carry their name
+# and source which the call graph uses to translate them to its own ids.
+# Repeated call-stacks are parsed once through a StackCache, which can be
+# given to share it between aggregates using the same symbol table.
+# With count_stacks set, added call-stacks are only counted by their
+# ids and parameters, and turned into nodes and edges once they are asked
+# for, so each distinct call-stack is expanded once instead of each call.
+class Aggregate:
+    def __init__(self, symbols=None, cache=None, count_stacks=False):
+        self._symbols = symbols if symbols is not None else SymbolTable()
+        self._cache = cache if cache is not None else StackCache(self._symbols)
+        self._nodes = {}
+        self._edges = {}
+        self._stack_count = 0
+        self._stacks = Counter() if count_stacks else None
+
+    # The symbol table is local to the process, only counts are sent
+    def __getstate__(self):
+        self._expand_stacks()
+        return {
+            '_stacks': None,
+            '_symbols': None,
+            '_cache': None,
+            '_nodes': self._nodes,
+            '_edges': self._edges,
+            '_stack_count': self._stack_count
+        }
+
+    # Parse a call-stack given as its lines and add it to the counts
+    def add_stack(self, lines):
+        frames = parse_frames(lines, self._symbols, self._cache)
+        self.add_frames(frames.ids, frames.params)
+
+    # Add call-stacks counted by another aggregate with count_stacks set
+    # which uses the same symbol table, without expanding them
+    def add_stack_counts(self, stacks):
+        self._stacks.update(stacks)
+        self._stack_count += sum(stacks.values())
+
+    # Returns call-stacks counted by their ids and parameters which are not
+    # expanded into nodes and edges yet, empty without count_stacks set
+    def get_stack_counts(self):
+        return self._stacks or Counter()
+
+    # Add counted call-stacks to the nodes and edges
+    def _expand_stacks(self):
+        if not self._stacks:
+            return
+        stacks, self._stacks = self._stacks, Counter()
+        for (ids, params), count in stacks.items():
+            self._add_calls(ids, params, count)
+
+    # Add calls of a call-stack given as a tuple of the ids of its functions
+    # in the symbol table, starting with the traced one, and its parameters.
+    # With count_stacks set the call-stack is counted as a whole instead.
+    def add_frames(self, ids, params=None, count=1):
+        if self._stacks is None:
+            self._add_calls(ids, params, count)
+        else:
+            self._stacks[(ids, tuple(params) if params else None)] += count
+        self._stack_count += count
+
+    # For repeated call-stacks only counts are bumped, their nodes and
+    # edges are checked to exist without looping in Python
+    def _add_calls(self, ids, params, count):
+        if not all(map(self._nodes.__contains__, ids)):
+            for node_id in ids:
+                if node_id not in self._nodes:
+                    name, source = self._symbols.get_symbol(node_id)
+                    self._nodes[node_id] = {'name': name, 'source': source, 'call_count': 0}
+        if ids:
+            self._nodes[ids[0]]['call_count'] += count
+        edge_ids = list(zip(ids[1:], ids))
+        if not all(map(self._edges.__contains__, edge_ids)):
+            for edge_id in edge_ids:
+                if edge_id not in self._edges:
+                    self._edges[edge_id] = {'params': ParamStore(), 'call_count': 0}
+        if len(ids) > 1:
+            edge = self._edges[(ids[1], ids[0])]
+            edge['call_count'] += count
+            if params:
+                edge['params'].add(params, count)
+
+    # Add the counts and parameters of another aggregate to this one,
+    # translating its ids by the name and source of its nodes.
+    # Merging is associative, so partial aggregates can be combined
+    # in any grouping. Returns this aggregate.
+    def merge(self, other):
+        ids = {}
+        for node_id, node in other.get_nodes().items():
+            ids[node_id] = self._symbols.get_id(node['name'], node['source'])
+            if ids[node_id] in self._nodes:
+                self._nodes[ids[node_id]]['call_count'] += node['call_count']
+            else:
+                self._nodes[ids[node_id]] = dict(node)
+        for (caller, called), edge in other.get_edges().items():
+            edge_id = (ids[caller], ids[called])
+            if edge_id not in self._edges:
+                self._edges[edge_id] = {'params': ParamStore(), 'call_count': 0}
+            self._edges[edge_id]['call_count'] += edge['call_count']
+            self._edges[edge_id]['params'].merge(edge['params'])
+        self._stack_count += other.stack_count()
+        return self
+
+    # Return the symbol table of the ids of nodes
+    def get_symbols(self):
+        return self._symbols
+
+    # Returns counters of the cache of parsed call-stacks
+    def cache_stats(self):
+        return self._cache.stats()
+
+    # Return aggregated nodes
+    def get_nodes(self):
+        self._expand_stacks()
+        return self._nodes
+
+    # Return aggregated edges
+    def get_edges(self):
+        self._expand_stacks()
+        return self._edges
+
+    # Return number of call-stacks added
+    def stack_count(self):
+        return self._stack_count
+
+    # Returns whether no call-stack was added yet
+    def is_empty(self):
+        return self._stack_count == 0
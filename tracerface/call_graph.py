@@ -1,36 +1,142 @@
 #!/usr/bin/env python3
+from collections import deque
+from threading import Lock
+
+from tracerface.aggregate import Aggregate
+from tracerface.calling_context import CallingContextTree
+from tracerface.param_store import ParamStore, SAMPLE_SIZE, TOP_K
+from tracerface.symbol_table import SymbolTable
+
+
+# Number of versions whose changed elements are remembered
+_HISTORY_LENGTH = 64
+
+
+# Returns default bounds of yellow and red coloring for a maximum count
+def _default_colors(max_count):
+    yellow = round(max_count / 3)
+    return yellow, yellow * 2
+
+
+# Return what an element id of the graph view maps to in the given
+# mapping of node element ids, a list of the node or of the caller
+# and called nodes of an edge, None if its nodes are not mapped
+def _parse_element_id(element_id, nodes):
+    if element_id in nodes:
+        return [nodes[element_id]]
+    caller, _, called = element_id.partition('-')
+    if caller in nodes and called in nodes:
+        return [nodes[caller], nodes[called]]
+    return None
+
 
 # Representation of the call graph
-# generated through the tracing
+# generated through the tracing.
+# Parameters of edges are kept in a bounded ParamStore
+# configured by sample_size and top_k.
+# Every change of the nodes and edges is recorded under a
+# version number, so views only need to update changed elements.
+# Call-stacks counted by an Aggregate can be deferred, they are only
+# expanded into nodes and edges when the next version is asked for.
+# With calling_context set, whole paths of counted call-stacks are also
+# kept in a calling context tree next to the nodes and edges.
 class CallGraph:
-    def __init__(self):
+    def __init__(self, sample_size=SAMPLE_SIZE, top_k=TOP_K, calling_context=False):
+        self._sample_size = sample_size
+        self._top_k = top_k
+        self._symbols = SymbolTable()
         self._nodes = {}
         self._edges = {}
+        self._callers = {}
+        self._callees = {}
+        self._max_count = 0
         self._yellow = 0
         self._red = 0
         self._expanded_elements = []
+        self._lock = Lock()
+        self._version = 0
+        self._base_version = 0 # oldest version changes can be listed since
+        self._history = deque()
+        self._changed_nodes = set()
+        self._changed_edges = set()
+        self._deferred = None # Aggregate of deferred call-stacks
+        self._context = CallingContextTree() if calling_context else None
+
+    # Add calls of a node to the graph. Counts only grow until
+    # the graph is cleared, so the maximum is kept up to date here.
+    def _add_node(self, node_id, node):
+        if node_id in self._nodes:
+            self._nodes[node_id]['call_count'] += node['call_count']
+        else:
+            self._nodes[node_id] = node
+        self._changed_nodes.add(node_id)
+        self._max_count = max(self._max_count, self._nodes[node_id]['call_count'])
+
+    # Add calls of an edge to the graph and return its parameter store.
+    # New edges are also indexed by both of their nodes.
+    def _add_edge(self, edge_id, call_count):
+        if edge_id not in self._edges:
+            self._edges[edge_id] = {
+                'params': ParamStore(self._sample_size, self._top_k),
+                'call_count': 0
+            }
+            caller, called = edge_id
+            self._callers.setdefault(called, []).append(caller)
+            self._callees.setdefault(caller, []).append(called)
+        self._edges[edge_id]['call_count'] += call_count
+        self._changed_edges.add(edge_id)
+        return self._edges[edge_id]['params']
 
     # Merge collection of new nodes to already existing ones
     def load_nodes(self, nodes):
-        for node in nodes:
-            if node in self._nodes:
-                self._nodes[node]['call_count'] += nodes[node]['call_count']
-            else:
-                self._nodes[node] = nodes[node]
+        with self._lock:
+            for node in nodes:
+                self._add_node(node, nodes[node])
 
     # Merge collection of new edges to already existing ones
     def load_edges(self, edges):
-        for edge in edges:
-            if edge in self._edges:
-                self._edges[edge]['call_count'] += edges[edge]['call_count']
+        with self._lock:
+            for edge in edges:
+                params = self._add_edge(edge, edges[edge]['call_count'])
                 if edges[edge]['param']:
-                    self._edges[edge]['params'].append(edges[edge]['param'])
-            else:
-                self._edges[edge] = {}
-                self._edges[edge]['params'] = []
-                self._edges[edge]['call_count'] = edges[edge]['call_count']
-                if edges[edge]['param']:
-                    self._edges[edge]['params'].append(edges[edge]['param'])
+                    params.add(edges[edge]['param'])
+
+    # Merge nodes and edges summed up by an Aggregate, translating
+    # its ids to the ids of this graph by the name and source of nodes
+    def load_aggregate(self, aggregate):
+        with self._lock:
+            self._merge_aggregate(aggregate)
+
+    # Call-stacks counted by aggregates using the symbol table of this
+    # graph are added to the calling context tree before they are expanded
+    def _merge_aggregate(self, aggregate):
+        if self._context is not None and aggregate.get_symbols() is self._symbols:
+            for (ids, _), count in aggregate.get_stack_counts().items():
+                self._context.add_stack(ids, count)
+        nodes = aggregate.get_nodes()
+        ids = {node_id: self._symbols.get_id(node['name'], node['source']) for node_id, node in nodes.items()}
+        for node_id, node in nodes.items():
+            self._add_node(ids[node_id], dict(node))
+        for (caller, called), edge in aggregate.get_edges().items():
+            self._add_edge((ids[caller], ids[called]), edge['call_count']).merge(edge['params'])
+
+    # Keep call-stacks counted by an Aggregate with count_stacks set, which
+    # uses the symbol table of this graph, until the next version is asked
+    # for. Only the counts of distinct call-stacks are summed up until then.
+    def defer_aggregate(self, aggregate):
+        with self._lock:
+            if self._deferred is None:
+                self._deferred = Aggregate(self._symbols, count_stacks=True)
+            self._deferred.add_stack_counts(aggregate.get_stack_counts())
+
+    # Expand deferred call-stacks into nodes and edges, and initialize
+    # the colors again as they are after loading while tracing
+    def _load_deferred(self):
+        if self._deferred is None:
+            return
+        deferred, self._deferred = self._deferred, None
+        self._merge_aggregate(deferred)
+        self.set_colors(*_default_colors(self._max_count))
 
     # Return list of all nodes
     def get_nodes(self):
@@ -40,13 +146,137 @@ class CallGraph:
     def get_edges(self):
         return self._edges
 
+    # Return ids of nodes calling the given node
+    def get_callers(self, node_id):
+        return self._callers.get(node_id, [])
+
+    # Return ids of nodes called by the given node
+    def get_callees(self, node_id):
+        return self._callees.get(node_id, [])
+
+    # Return index of callers by the id of the called node
+    def get_callers_index(self):
+        return self._callers
+
+    # Return the result of a function reading the graph given as its first
+    # argument, called while nodes and edges are not changed by other threads
+    def read(self, function, *args):
+        with self._lock:
+            return function(self, *args)
+
+    # Return the calling context tree, None if it is not kept
+    def get_calling_context(self):
+        return self._context
+
+    # Return the symbol table interning the ids of nodes.
+    # It is kept on clear, so ids stay stable during the session.
+    def get_symbols(self):
+        return self._symbols
+
+    # Return nodes, edges with their parameters, color bounds and expanded
+    # elements as plain lists and numbers. Nodes are identified by their
+    # index in the snapshot, so it does not depend on the symbol table.
+    def to_snapshot(self):
+        with self._lock:
+            self._load_deferred()
+            indexes = {node_id: index for index, node_id in enumerate(self._nodes)}
+            element_indexes = {str(node_id): index for node_id, index in indexes.items()}
+            return {
+                'nodes': [[node['name'], node['source'], node['call_count']] for node in self._nodes.values()],
+                'edges': [
+                    [indexes[caller], indexes[called], edge['call_count'],
+                     edge['params'].get_state() if edge['params'].seen() else None]
+                    for (caller, called), edge in self._edges.items()
+                ],
+                'colors': [self._yellow, self._red],
+                'expanded': [
+                    element for element in (
+                        _parse_element_id(element_id, element_indexes) for element_id in self._expanded_elements
+                    ) if element
+                ]
+            }
+
+    # Load a snapshot returned by to_snapshot. The graph is replaced
+    # including its colors and expanded elements, unless merge is set
+    # in which case the counts and parameters are added to the graph.
+    def load_snapshot(self, snapshot, merge=False):
+        if not merge:
+            self.clear()
+        with self._lock:
+            ids = [self._symbols.get_id(name, source) for name, source, _ in snapshot['nodes']]
+            for node_id, (name, source, call_count) in zip(ids, snapshot['nodes']):
+                self._add_node(node_id, {'name': name, 'source': source, 'call_count': call_count})
+            for caller, called, call_count, params in snapshot['edges']:
+                edge_id = (ids[caller], ids[called])
+                store = self._add_edge(edge_id, call_count)
+                if params and store.seen():
+                    store.merge(ParamStore.from_state(params))
+                elif params:
+                    self._edges[edge_id]['params'] = ParamStore.from_state(params)
+        if merge:
+            self.init_colors()
+        else:
+            self.set_colors(*snapshot['colors'])
+            self._expanded_elements = ['-'.join(str(ids[index]) for index in element) for element in snapshot['expanded']]
+
+    # Record changes made since the last version under a new version
+    def _commit_changes(self):
+        self._load_deferred()
+        if not self._changed_nodes and not self._changed_edges:
+            return
+        self._version += 1
+        self._history.append((self._version, self._changed_nodes, self._changed_edges))
+        if len(self._history) > _HISTORY_LENGTH:
+            self._base_version = self._history.popleft()[0]
+        self._changed_nodes = set()
+        self._changed_edges = set()
+
+    # Return the current version of nodes and edges,
+    # which only changes when they do
+    def version(self):
+        with self._lock:
+            self._commit_changes()
+            return self._version
+
+    # Return the current version, or the given later one, with ids of
+    # nodes and edges changed since a given version, or None instead of the
+    # ids if the graph was cleared or changes are not remembered since then
+    def changes_since(self, version, until=None):
+        with self._lock:
+            self._commit_changes()
+            if until is None or until > self._version:
+                until = self._version
+            if version < self._base_version or version > until:
+                return until, None
+            nodes = set()
+            edges = set()
+            for changed_version, changed_nodes, changed_edges in reversed(self._history):
+                if changed_version <= version:
+                    break
+                if changed_version <= until:
+                    nodes.update(changed_nodes)
+                    edges.update(changed_edges)
+            return until, (nodes, edges)
+
     # Clear nodes and edges from graph
     def clear(self):
-        self._nodes = {}
-        self._edges = {}
-        self._yellow = 0
-        self._red = 0
-        self._expanded_elements = []
+        with self._lock:
+            self._nodes = {}
+            self._edges = {}
+            self._callers = {}
+            self._callees = {}
+            self._max_count = 0
+            self._yellow = 0
+            self._red = 0
+            self._expanded_elements = []
+            self._version += 1
+            self._base_version = self._version
+            self._history.clear()
+            self._changed_nodes = set()
+            self._changed_edges = set()
+            self._deferred = None
+            if self._context is not None:
+                self._context.clear()
 
     # Set bounds for yellow and red coloring
     def set_colors(self, yellow, red):
@@ -63,17 +293,13 @@ class CallGraph:
 
     # Returns the maximum number of calls among nodes
     def max_count(self):
-        call_counts = [node['call_count'] for node in self._nodes.values()]
-        if call_counts:
-            return max(call_counts)
-        return 0
+        with self._lock:
+            self._load_deferred()
+            return self._max_count
 
     # Initialize color boundaries to default values based on maximum count
     def init_colors(self):
-        max_count = self.max_count()
-        new_yellow = round(max_count / 3)
-        new_red = new_yellow * 2
-        self.set_colors(new_yellow, new_red)
+        self.set_colors(*_default_colors(self.max_count()))
 
     # Add to or remove element from expanded ones when the user clicks on them
     def element_clicked(self, id):
@@ -5,6 +5,14 @@ from dash import callback_context
 from dash.dependencies import Input, Output, State
 from dash.exceptions import PreventUpdate
 
+from tracerface.snapshot import save_snapshot
+from tracerface.trace_setup import (
+    BinaryAlreadyAddedError,
+    BinaryNotExistsError,
+    ConfigFileError,
+    FunctionNotInBinaryError,
+    BuiltInNotExistsError
+)
 from  tracerface.web_ui.alerts import (
     ErrorAlert,
     SuccessAlert,
@@ -13,13 +21,6 @@ from  tracerface.web_ui.alerts import (
 )
 from tracerface.web_ui.dashboard import Dashboard
 from tracerface.web_ui.graph import Graph
-from tracerface.web_ui.trace_setup import (
-    BinaryAlreadyAddedError,
-    BinaryNotExistsError,
-    ConfigFileError,
-    FunctionNotInBinaryError,
-    BuiltInNotExistsError
-)
 
 
 # Disable function managagement buttons if no function is selected
@@ -46,11 +47,31 @@ def disable_load_config_button(app):
 
 # Load output of bcc trace output
 def disable_load_button(app):
-    output = Output('load-output-button', 'disabled')
+    output = [
+        Output('load-output-button', 'disabled'),
+        Output('load-snapshot-button', 'disabled'),
+        Output('save-snapshot-button', 'disabled')
+    ]
     input = [Input('output-path', 'value')]
     @app.callback(output, input)
     def disable(content):
-        return not content
+        return not content, not content, not content
+
+
+# Save snapshot of the call graph to the given path
+def save_snapshot_of_graph(app, call_graph):
+    output = Output('save-snapshot-notification', 'children')
+    input = [Input('save-snapshot-button', 'n_clicks')]
+    state = [State('output-path', 'value')]
+    @app.callback(output, input, state)
+    def save(clicks, path):
+        if not clicks or not path:
+            raise PreventUpdate
+        try:
+            save_snapshot(call_graph, path)
+        except OSError as error:
+            return ErrorAlert('Could not save snapshot: {}'.format(error.strerror))
+        return SuccessAlert('Snapshot saved to {}'.format(path))
 
 
 # Stop tracing if an error occurs
@@ -69,6 +90,18 @@ def stop_trace_on_error(app, trace_controller):
         raise PreventUpdate
 
 
+# Show how many call-stacks were lost because the transport was full
+def show_dropped_stacks(app, trace_controller):
+    output = Output('dropped-notification', 'children')
+    input = [Input('timer', 'n_intervals')]
+    @app.callback(output, input)
+    def show_dropped(timer_tick):
+        dropped = trace_controller.dropped_stacks()
+        if dropped:
+            return '{} call-stacks dropped, the transport buffer was full'.format(dropped)
+        return None
+
+
 # Start realtime tracing
 def start_or_stop_trace(app, call_graph, setup, trace_controller):
     output = Output('timer', 'disabled')
@@ -96,9 +129,10 @@ def update_color_slider(app, call_graph):
         if not callback_context.triggered:
             raise PreventUpdate
 
-        disabled = call_graph.max_count() < 1 or not timer_off
+        max_count = call_graph.max_count()
+        disabled = max_count < 1 or not timer_off
         return Dashboard.slider(call_graph.get_yellow(), call_graph.get_red(),
-                                call_graph.max_count(), disabled)
+                                max_count, disabled)
 
 
 # Disable parts of the interface while tracing is active
@@ -180,7 +214,7 @@ def clear_selected_app(app):
 
 
 # Save animation status and spacing between nodes
-def update_graph_layout(app):
+def update_graph_layout(app, server_layout=False):
     output = Output('graph', 'layout')
     input = [
         Input('animate-switch', 'value'),
@@ -189,4 +223,4 @@ def update_graph_layout(app):
     @app.callback(output, input)
     def update_spacing_and_animate(animate_switch, spacing):
         animate = len(animate_switch) == 1
-        return Graph.layout(spacing=spacing, animate=animate)
+        return Graph.layout(spacing=spacing, animate=animate, preset=server_layout)
@@ -2,51 +2,183 @@
 This module contains all callbacks regarding
 the shown graph including the information cards
 '''
-from dash import callback_context
-from dash.dependencies import Input, Output, State
+import os
+import time
+
+from dash import callback_context, no_update
+from dash.dependencies import ClientsideFunction, Input, Output, State
 from dash.exceptions import PreventUpdate
 
-from tracerface.load_output import load_trace_output_from_file_to_call_graph
+from tracerface.capture import CaptureFormatError, is_capture, load_capture_to_call_graph
+from tracerface.combine import load_outputs_to_call_graph
+from tracerface.load_output import load_trace_output_in_parallel
+from tracerface.snapshot import is_snapshot, load_snapshot, SnapshotFormatError
 from tracerface.web_ui.alerts import ErrorAlert
+from tracerface.web_ui.dashboard import Dashboard
 from tracerface.web_ui.graph import Graph
+from tracerface.web_ui.layered_layout import LayeredLayout
+from tracerface.web_ui.refresh import DEFAULT_INTERVAL, next_interval
 from tracerface.web_ui.styles import expanded_style
-from tracerface.web_ui.ui_format import (
-    convert_edges_to_cytoscape_format,
-    convert_nodes_to_cytoscape_format
-)
+from tracerface.web_ui.ui_format import ElementCache
+
 
+# Number of paths shown for a clicked node
+_SHOWN_PATHS = 10
 
-# Update nodes and edges in graph
-def update_graph_elements(app, call_graph):
+# Update nodes and edges in graph by sending only the elements
+# changed since the version the client has, nothing if there are none.
+# Huge graphs can be pruned to their most called nodes, or to traced
+# functions and their callers in focus mode.
+# The number of changed elements and the time it took to convert them
+# are reported on every tick if the refresh interval is adaptive.
+# Positions of nodes are computed here if the layout is on the server.
+def update_graph_elements(app, call_graph, adaptive_refresh=False, server_layout=False):
     output = [
-        Output('graph', 'elements'),
-        Output('load-output-notification', 'children')
+        Output('graph-patch', 'data'),
+        Output('load-output-notification', 'children'),
+        Output('refresh-stats', 'data')
     ]
     input = [
         Input('load-output-button', 'n_clicks'),
-        Input('timer', 'n_intervals')
+        Input('load-snapshot-button', 'n_clicks'),
+        Input('timer', 'n_intervals'),
+        Input('prune-top-input', 'value'),
+        Input('prune-threshold-input', 'value'),
+        Input('focus-switch', 'value'),
+        Input('focus-expanded', 'data')
+    ]
+    state = [
+        State('output-path', 'value'),
+        State('graph-patch', 'data')
     ]
-    state = [State('output-path', 'value')]
+    cache = ElementCache(call_graph, LayeredLayout() if server_layout else None)
     @app.callback(output, input, state)
-    def update_elements(load, timer, file_path):
+    def update_elements(load, load_snapshot_clicks, timer, top, threshold, focus, expanded, file_path, patch):
         if not callback_context.triggered:
             raise PreventUpdate
 
         alert = None
         id = callback_context.triggered[0]['prop_id'].split('.')[0]
-        if id == 'load-output-button' and file_path:
+        loading = id in ('load-output-button', 'load-snapshot-button')
+        if loading and file_path:
             try:
-                load_trace_output_from_file_to_call_graph(file_path, call_graph)
-            except FileNotFoundError:
-                alert = ErrorAlert('Could not find output file at {}'.format(file_path))
-            except IsADirectoryError:
-                alert = ErrorAlert('{} is a directory, not a file'.format(file_path))
-        elif id == 'load-output-button' :
+                if id == 'load-snapshot-button':
+                    load_snapshot(file_path, call_graph)
+                elif os.pathsep in file_path:
+                    load_outputs_to_call_graph(file_path.split(os.pathsep), call_graph)
+                elif is_capture(file_path):
+                    load_capture_to_call_graph(file_path, call_graph)
+                elif is_snapshot(file_path):
+                    load_snapshot(file_path, call_graph)
+                else:
+                    load_trace_output_in_parallel(file_path, call_graph)
+            except FileNotFoundError as error:
+                alert = ErrorAlert('Could not find output file at {}'.format(error.filename or file_path))
+            except IsADirectoryError as error:
+                alert = ErrorAlert('{} is a directory, not a file'.format(error.filename or file_path))
+            except (CaptureFormatError, SnapshotFormatError) as error:
+                alert = ErrorAlert(str(error))
+            except UnicodeDecodeError:
+                alert = ErrorAlert('{} is not a BCC trace output, capture or snapshot'.format(file_path))
+        elif loading:
             alert = ErrorAlert('No path given')
 
-        edges = convert_edges_to_cytoscape_format(call_graph.get_nodes(), call_graph.get_edges())
-        nodes = convert_nodes_to_cytoscape_format(call_graph.get_nodes(), call_graph.get_edges())
-        return nodes + edges, alert
+        start = time.perf_counter()
+        view = None
+        if focus:
+            view = {'focus': expanded or []}
+        elif top or threshold:
+            view = {'top': top, 'threshold': threshold}
+        if patch:
+            new_patch = cache.get_patch(patch['version'], view, patch['view'])
+        else:
+            new_patch = cache.get_patch(None, view)
+        stats = {
+            'tick': timer,
+            'changed': len(new_patch['elements']) if new_patch else 0,
+            'render_time': (time.perf_counter() - start) * 1000
+        }
+        if new_patch is None:
+            if loading:
+                return no_update, alert, stats
+            if not adaptive_refresh:
+                raise PreventUpdate
+            return no_update, no_update, stats
+        return new_patch, alert, stats
+
+
+# Adapt the interval of refreshing the graph to the changes and
+# conversion time reported by the server, starting from the default
+# interval whenever tracing is started
+def adapt_refresh_interval(app):
+    output = Output('timer', 'interval')
+    input = [
+        Input('refresh-stats', 'data'),
+        Input('timer', 'disabled')
+    ]
+    state = [State('timer', 'interval')]
+    @app.callback(output, input, state)
+    def adapt_interval(stats, timer_off, interval):
+        if not callback_context.triggered:
+            raise PreventUpdate
+
+        id = callback_context.triggered[0]['prop_id'].split('.')[0]
+        if id == 'timer':
+            return DEFAULT_INTERVAL
+        if not stats:
+            raise PreventUpdate
+        return next_interval(interval, stats['changed'], stats['render_time'])
+
+
+# Expand or collapse callers of a node clicked in focus mode,
+# all nodes are collapsed when focus mode is switched
+def expand_focused_node(app):
+    output = Output('focus-expanded', 'data')
+    input = [
+        Input('graph', 'tapNodeData'),
+        Input('focus-switch', 'value')
+    ]
+    state = [State('focus-expanded', 'data')]
+    @app.callback(output, input, state)
+    def expand(node, focus, expanded):
+        if not callback_context.triggered:
+            raise PreventUpdate
+
+        id = callback_context.triggered[0]['prop_id'].split('.')[0]
+        if id == 'focus-switch':
+            return []
+        if not focus or not node:
+            raise PreventUpdate
+        expanded = list(expanded or [])
+        if node['id'] in expanded:
+            expanded.remove(node['id'])
+        else:
+            expanded.append(node['id'])
+        return expanded
+
+
+# Merge patches of elements into the graph in the browser
+def patch_graph_elements(app):
+    app.clientside_callback(
+        ClientsideFunction(namespace='graph', function_name='applyPatch'),
+        Output('graph', 'elements'),
+        [Input('graph-patch', 'data')],
+        [State('graph', 'elements')])
+
+
+# Show the most frequent paths leading to a clicked node
+def show_paths_of_node(app, call_graph):
+    output = Output('paths-div', 'children')
+    input = [Input('graph', 'tapNodeData')]
+    @app.callback(output, input)
+    def show_paths(node):
+        if not node or not node['id'].isdigit():
+            raise PreventUpdate
+        symbols = call_graph.get_symbols()
+        paths = call_graph.get_calling_context().paths_to(int(node['id']), _SHOWN_PATHS)
+        return Dashboard.paths(node['name'], [
+            ([symbols.get_symbol(function)[0] for function in path], count) for path, count in paths
+        ])
 
 
 # Display or hide inforamtion about edges and nodes
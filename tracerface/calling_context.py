@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+'''
+Calling context tree of traced call-stacks. Every node of the tree
+is a unique path of calls from an outermost caller, so it keeps the
+context pairwise edges of the call graph lose. The tree is stored in
+flat arrays indexed by node, children are linked as lists of siblings.
+Nodes with many children, like the callers at the root, also index
+their children by function so they are not searched one by one.
+Each node counts the call-stacks ending in it and the ones passing
+through it, so totals of subtrees are read without traversing them.
+'''
+from array import array
+
+
+# Index of the root node, which stands for no function
+_ROOT = 0
+_NO_NODE = -1
+
+# Number of children of a node searched one by one before they are indexed
+_MAX_SCAN = 8
+
+
+class CallingContextTree:
+    def __init__(self):
+        self.clear()
+
+    # Remove all paths
+    def clear(self):
+        self._function = array('q', [_NO_NODE]) # function of the last call of the path
+        self._parent = array('q', [_NO_NODE])
+        self._first_child = array('q', [_NO_NODE])
+        self._next_sibling = array('q', [_NO_NODE])
+        self._count = array('Q', [0]) # call-stacks ending in the path
+        self._total = array('Q', [0]) # call-stacks ending in the path or in longer ones
+        self._nodes_of_function = {}
+        self._children_by_function = {} # index of children of nodes with many of them
+
+    # Returns the child of a node calling the given function, None if there is none
+    def _find_child(self, node, function):
+        children = self._children_by_function.get(node)
+        if children is not None:
+            return children.get(function)
+        child = self._first_child[node]
+        scanned = 0
+        while child != _NO_NODE:
+            if self._function[child] == function:
+                return child
+            child = self._next_sibling[child]
+            scanned += 1
+        if scanned >= _MAX_SCAN:
+            self._children_by_function[node] = {
+                self._function[child]: child for child in self._iter_children(node)
+            }
+        return None
+
+    def _iter_children(self, node):
+        child = self._first_child[node]
+        while child != _NO_NODE:
+            yield child
+            child = self._next_sibling[child]
+
+    def _add_child(self, node, function):
+        child = len(self._function)
+        self._function.append(function)
+        self._parent.append(node)
+        self._first_child.append(_NO_NODE)
+        self._next_sibling.append(self._first_child[node])
+        self._first_child[node] = child
+        self._count.append(0)
+        self._total.append(0)
+        self._nodes_of_function.setdefault(function, array('q')).append(child)
+        if node in self._children_by_function:
+            self._children_by_function[node][function] = child
+        return child
+
+    # Add a call-stack given as ids of its functions starting with the traced one,
+    # which was seen the given number of times, and return its node
+    def add_stack(self, ids, count=1):
+        node = _ROOT
+        self._total[node] += count
+        for function in reversed(ids):
+            child = self._find_child(node, function)
+            node = self._add_child(node, function) if child is None else child
+            self._total[node] += count
+        self._count[node] += count
+        return node
+
+    # Returns number of nodes in the tree, not counting the root
+    def __len__(self):
+        return len(self._function) - 1
+
+    # Returns number of call-stacks ending in the given node or below it,
+    # the root node counts all call-stacks
+    def total(self, node=_ROOT):
+        return self._total[node]
+
+    # Returns number of call-stacks ending in the given node
+    def count(self, node):
+        return self._count[node]
+
+    # Returns ids of the functions on the path of a node from the outermost caller
+    def get_path(self, node):
+        path = []
+        while node != _ROOT:
+            path.append(self._function[node])
+            node = self._parent[node]
+        path.reverse()
+        return path
+
+    # Returns paths leading to a function with the number of call-stacks
+    # passing through the function on each of them, most frequent first.
+    # Only the top most frequent are returned if top is given.
+    def paths_to(self, function, top=None):
+        nodes = sorted(self._nodes_of_function.get(function, []), key=self._total.__getitem__, reverse=True)
+        return [(self.get_path(node), self._total[node]) for node in nodes[:top]]
+
+    # Yield paths ending a call-stack with their counts in depth first order
+    def iter_stacks(self):
+        path = []
+        pending = [(self._first_child[_ROOT], 0)]
+        while pending:
+            node, depth = pending.pop()
+            if node == _NO_NODE:
+                continue
+            pending.append((self._next_sibling[node], depth))
+            del path[depth:]
+            path.append(self._function[node])
+            if self._count[node]:
+                yield list(path), self._count[node]
+            pending.append((self._first_child[node], depth + 1))
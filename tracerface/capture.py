@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+'''
+Binary capture of call-stacks, which loads much faster than
+bcc trace output as no regular expressions are involved.
+
+A capture starts with a header, followed by blocks of call-stacks
+and an index of the blocks at the end of the file. Each block holds
+the functions first seen in it, the length of each call-stack, the
+ids of the functions of all call-stacks, their timestamps and their
+parameters. The index holds the offset and time range of every
+block, a capture without index is read block by block.
+
+Convert bcc trace output to a capture with
+python3 -m tracerface.capture TRACE_OUTPUT CAPTURE
+'''
+from array import array
+from collections import Counter
+import struct
+import sys
+
+from tracerface.aggregate import Aggregate
+from tracerface.load_output import read_stacks
+from tracerface.parse_stack import parse_frames, StackCache
+from tracerface.symbol_table import SymbolTable
+
+
+_MAGIC = b'TRFCAP'
+_VERSION = 1
+_HEADER = struct.Struct('<6sH')
+_BLOCK_MAGIC = b'BLK1'
+_BLOCK_HEADER = struct.Struct('<4sIIII') # magic, symbol, stack, frame and parameter sizes
+_INDEX_MAGIC = b'IDX1'
+_INDEX_HEADER = struct.Struct('<4sI')
+_INDEX_ENTRY = struct.Struct('<QIdd') # offset, number of stacks, first and last timestamp
+_FOOTER = struct.Struct('<Q4s') # offset of the index
+_FOOTER_MAGIC = b'TEND'
+
+# Separators of names and parameters, these do not occur in bcc output
+_SYMBOL_SEPARATOR = '\0'
+_PARAM_SEPARATOR = '\x1f'
+_STACK_SEPARATOR = '\x1e'
+
+# Number of call-stacks written in a block
+BLOCK_SIZE = 4096
+
+
+# Error raised when a file is not a valid capture
+class CaptureFormatError(Exception):
+    pass
+
+
+# Array of unsigned ints or doubles stored in little endian
+def _to_bytes(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+# The CaptureWriter class records call-stacks given as the lines
+# of bcc trace output into a capture file, one block at a time
+class CaptureWriter:
+    def __init__(self, path, block_size=BLOCK_SIZE):
+        self._output = open(path, 'wb')
+        self._output.write(_HEADER.pack(_MAGIC, _VERSION))
+        self._block_size = block_size
+        self._symbols = SymbolTable()
+        self._cache = StackCache(self._symbols)
+        self._written_symbols = 0
+        self._index = []
+        self._stack_count = 0
+        self._lengths = array('I')
+        self._frames = array('I')
+        self._timestamps = array('d')
+        self._params = []
+
+    # Add a call-stack captured at the given time
+    def add_stack(self, lines, timestamp=0.0):
+        frames = parse_frames(lines, self._symbols, self._cache)
+        if not frames.ids:
+            return
+        self._lengths.append(len(frames.ids))
+        self._frames.extend(frames.ids)
+        self._timestamps.append(timestamp)
+        self._params.append(_PARAM_SEPARATOR.join(frames.params or []))
+        if len(self._lengths) >= self._block_size:
+            self.flush()
+
+    # Write the call-stacks added since the last block as a new block
+    def flush(self):
+        if not self._lengths:
+            return
+        symbols = ''.join(
+            '{}{}{}{}'.format(name, _SYMBOL_SEPARATOR, source, _SYMBOL_SEPARATOR)
+            for name, source in map(self._symbols.get_symbol, range(self._written_symbols, len(self._symbols)))
+        ).encode()
+        params = _STACK_SEPARATOR.join(self._params).encode()
+        self._index.append((self._output.tell(), len(self._lengths), self._timestamps[0], self._timestamps[-1]))
+        self._stack_count += len(self._lengths)
+        self._output.write(_BLOCK_HEADER.pack(
+            _BLOCK_MAGIC, len(symbols), len(self._lengths), len(self._frames), len(params)))
+        self._output.write(symbols)
+        self._output.write(_to_bytes(self._lengths))
+        self._output.write(_to_bytes(self._frames))
+        self._output.write(_to_bytes(self._timestamps))
+        self._output.write(params)
+        self._written_symbols = len(self._symbols)
+        self._lengths = array('I')
+        self._frames = array('I')
+        self._timestamps = array('d')
+        self._params = []
+
+    # Write the remaining call-stacks and the index, then close the file
+    def close(self):
+        self.flush()
+        index_offset = self._output.tell()
+        self._output.write(_INDEX_HEADER.pack(_INDEX_MAGIC, len(self._index)))
+        for entry in self._index:
+            self._output.write(_INDEX_ENTRY.pack(*entry))
+        self._output.write(_FOOTER.pack(index_offset, _FOOTER_MAGIC))
+        self._output.close()
+
+    # Return number of call-stacks written in blocks
+    def stack_count(self):
+        return self._stack_count
+
+
+# Returns whether a file is a capture
+def is_capture(path):
+    with open(path, 'rb') as capture:
+        return capture.read(len(_MAGIC)) == _MAGIC
+
+
+# Return entries of the index of a capture, None if it has no index
+def _read_index(capture):
+    capture.seek(0, 2)
+    size = capture.tell()
+    if size < _HEADER.size + _FOOTER.size:
+        return None
+    capture.seek(size - _FOOTER.size)
+    index_offset, magic = _FOOTER.unpack(capture.read(_FOOTER.size))
+    if magic != _FOOTER_MAGIC:
+        return None
+    capture.seek(index_offset)
+    magic, count = _INDEX_HEADER.unpack(capture.read(_INDEX_HEADER.size))
+    if magic != _INDEX_MAGIC:
+        return None
+    return [_INDEX_ENTRY.unpack(capture.read(_INDEX_ENTRY.size)) for _ in range(count)]
+
+
+# Read the header of a block at the current position, None at the end
+def _read_block_header(capture):
+    data = capture.read(_BLOCK_HEADER.size)
+    if len(data) < _BLOCK_HEADER.size:
+        return None
+    header = _BLOCK_HEADER.unpack(data)
+    if header[0] != _BLOCK_MAGIC:
+        return None
+    return header[1:]
+
+
+# Yield the offset of every block of a capture without index,
+# stopping at a block which was not written completely
+def _scan_blocks(capture):
+    capture.seek(0, 2)
+    size = capture.tell()
+    offset = _HEADER.size
+    while True:
+        capture.seek(offset)
+        header = _read_block_header(capture)
+        if header is None:
+            return
+        symbol_size, stack_count, frame_count, param_size = header
+        end = offset + _BLOCK_HEADER.size + symbol_size + 12 * stack_count + 4 * frame_count + param_size
+        if end > size:
+            return
+        yield offset
+        offset = end
+
+
+# Register the functions first seen in a block in the symbol table.
+# Functions are written in the order of their ids in the capture, so the
+# id each of them got in the symbol table is appended to the given list.
+def _read_symbols(data, symbols, symbol_ids):
+    names = data.decode().split(_SYMBOL_SEPARATOR)
+    for index in range(0, len(names) - 1, 2):
+        symbol_ids.append(symbols.get_id(names[index], names[index + 1]))
+
+
+# Return the call-stacks of a block counted by their functions and
+# parameters, translating ids of the capture through the given list
+def _read_stacks_of_block(capture, stack_count, frame_count, param_size, symbol_ids):
+    lengths = _from_bytes('I', capture.read(4 * stack_count)).tolist()
+    frames = list(map(symbol_ids.__getitem__, _from_bytes('I', capture.read(4 * frame_count))))
+    capture.seek(8 * stack_count, 1) # timestamps
+    params = capture.read(param_size).decode().split(_STACK_SEPARATOR)
+    stacks = Counter()
+    position = 0
+    for length, param in zip(lengths, params):
+        stacks[(tuple(frames[position:position + length]), param)] += 1
+        position += length
+    return stacks
+
+
+# Yield call-stacks of a capture captured between the given times, all of
+# them if no time is given, as the ids of their functions registered in the
+# given symbol table, their parameters and the times they were seen in a
+# block. Only one block is held in memory at a time.
+def iter_capture(path, symbols, start=None, end=None):
+    with open(path, 'rb') as capture:
+        header = capture.read(_HEADER.size)
+        if len(header) < _HEADER.size or _HEADER.unpack(header) != (_MAGIC, _VERSION):
+            raise CaptureFormatError('{} is not a capture'.format(path))
+        index = _read_index(capture)
+        if index is None:
+            index = [(offset, None, None, None) for offset in _scan_blocks(capture)]
+        symbol_ids = [] # ids in the symbol table by the ids in the capture
+        for offset, _, first, last in index:
+            capture.seek(offset)
+            symbol_size, stack_count, frame_count, param_size = _read_block_header(capture)
+            _read_symbols(capture.read(symbol_size), symbols, symbol_ids)
+            if first is not None and ((start is not None and last < start) or (end is not None and first > end)):
+                continue
+            stacks = _read_stacks_of_block(capture, stack_count, frame_count, param_size, symbol_ids)
+            for (ids, param), count in stacks.items():
+                yield ids, param.split(_PARAM_SEPARATOR) if param else None, count
+
+
+# Return an Aggregate of the call-stacks of a capture captured
+# between the given times, all of them if no time is given.
+# They are added to the given aggregate if there is one.
+def read_capture(path, start=None, end=None, aggregate=None):
+    if aggregate is None:
+        aggregate = Aggregate(SymbolTable())
+    for ids, params, count in iter_capture(path, aggregate.get_symbols(), start, end):
+        aggregate.add_frames(ids, params, count)
+    return aggregate
+
+
+# Load call-stacks of a capture into the call graph, replacing its content.
+# Call-stacks are counted as a whole if the graph keeps their paths.
+def load_capture_to_call_graph(path, call_graph, start=None, end=None):
+    count_stacks = call_graph.get_calling_context() is not None
+    aggregate = read_capture(path, start, end, Aggregate(call_graph.get_symbols(), count_stacks=count_stacks))
+    call_graph.clear()
+    call_graph.load_aggregate(aggregate)
+    call_graph.init_colors()
+
+
+# Convert bcc trace output to a capture and return the number of call-stacks
+def convert_trace_output(output_path, capture_path):
+    writer = CaptureWriter(capture_path)
+    with open(output_path) as output:
+        for stack in read_stacks(output):
+            writer.add_stack(stack)
+    writer.close()
+    return writer.stack_count()
+
+
+def main(args):
+    if len(args) != 2:
+        print('Usage: python3 -m tracerface.capture TRACE_OUTPUT CAPTURE')
+        return 1
+    stacks = convert_trace_output(args[0], args[1])
+    print('{} call-stacks written to {}'.format(stacks, args[1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
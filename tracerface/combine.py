@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+'''
+Combine several bcc trace outputs and captures, e.g. recorded on
+different hosts or in different time windows, into one call graph.
+Every file is read into a partial Aggregate, text outputs in ranges
+of whole call-stacks, and the partials are merged in the order given.
+'''
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from tracerface.aggregate import Aggregate
+from tracerface.capture import is_capture, read_capture
+from tracerface.load_output import (
+    aggregate_trace_output_range,
+    CHUNK_SIZE,
+    MIN_CHUNK_SIZE,
+    read_stacks,
+    split_trace_output
+)
+
+
+# Returns the parts the given files are read in, as the path with the
+# byte range of a text output or with None for a whole capture
+def _split_outputs(paths, workers, chunk_size, min_chunk_size):
+    parts = []
+    for path in paths:
+        if is_capture(path):
+            parts.append((path, None))
+        else:
+            parts += [(path, part) for part in split_trace_output(path, workers, chunk_size, min_chunk_size)]
+    return parts
+
+
+# Returns an Aggregate of a part of a file
+def _read_part(path, part):
+    if part is None:
+        return read_capture(path)
+    return aggregate_trace_output_range(path, *part)
+
+
+# Returns an Aggregate of all call-stacks of the given files, which are
+# read by the given number of processes, one per core if not given.
+# Files smaller than min_chunk_size in total are read by this process.
+def read_outputs(paths, workers=None, chunk_size=CHUNK_SIZE, min_chunk_size=MIN_CHUNK_SIZE):
+    workers = workers or os.cpu_count() or 1
+    parts = _split_outputs(paths, workers, chunk_size, min_chunk_size)
+    aggregate = Aggregate()
+    if workers == 1 or len(parts) < 2 or sum(map(os.path.getsize, paths)) < min_chunk_size:
+        for path, part in parts:
+            aggregate.merge(_read_part(path, part))
+    else:
+        with ProcessPoolExecutor(min(workers, len(parts))) as executor:
+            for partial in executor.map(_read_part, *zip(*parts)):
+                aggregate.merge(partial)
+    return aggregate
+
+
+# Returns an Aggregate counting whole call-stacks of the given files in the
+# symbol table of a call graph. Files are read by this process, as paths
+# of call-stacks are lost when they are sent between processes.
+def _read_outputs_with_paths(paths, call_graph):
+    aggregate = Aggregate(call_graph.get_symbols(), count_stacks=True)
+    for path in paths:
+        if is_capture(path):
+            read_capture(path, aggregate=aggregate)
+        else:
+            with open(path) as output:
+                for stack in read_stacks(output):
+                    aggregate.add_stack(stack)
+    return aggregate
+
+
+# Load the call-stacks of the given files into the call graph,
+# replacing its content once all of them could be read.
+# Files are read by a single process if the graph keeps paths of call-stacks.
+def load_outputs_to_call_graph(paths, call_graph, workers=None, chunk_size=CHUNK_SIZE,
+                               min_chunk_size=MIN_CHUNK_SIZE):
+    if call_graph.get_calling_context() is not None:
+        aggregate = _read_outputs_with_paths(paths, call_graph)
+    else:
+        aggregate = read_outputs(paths, workers, chunk_size, min_chunk_size)
+    call_graph.clear()
+    call_graph.load_aggregate(aggregate)
+    call_graph.init_colors()
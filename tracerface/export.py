@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+'''
+Export of traced call-stacks for flame graph tools, in the folded
+stack format of FlameGraph and as a sampled speedscope profile.
+Call-stacks are read from bcc trace output, a capture or a call graph
+keeping a calling context tree, and written while they are read.
+Only distinct call-stacks of a batch of output or of a block of
+a capture are counted in memory, so the same call-stack can be
+written more than once, which both formats sum up.
+'''
+from array import array
+from collections import Counter
+import json
+
+from tracerface.capture import is_capture, iter_capture
+from tracerface.load_output import read_stacks
+from tracerface.parse_stack import parse_frames, StackCache
+from tracerface.symbol_table import SymbolTable
+
+
+FORMATS = ['folded', 'speedscope']
+
+# Number of distinct call-stacks of trace output counted before they are written
+_BATCH_SIZE = 100000
+
+_SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+
+
+# Yield call-stacks of bcc trace output as ids of their functions from
+# the outermost caller registered in the symbol table, and their counts
+def iter_output_stacks(path, symbols):
+    cache = StackCache(symbols)
+    stacks = Counter()
+    with open(path) as output:
+        for lines in read_stacks(output):
+            ids = parse_frames(lines, symbols, cache).ids
+            if ids:
+                stacks[ids] += 1
+            if len(stacks) >= _BATCH_SIZE:
+                yield from ((ids[::-1], count) for ids, count in stacks.items())
+                stacks = Counter()
+    yield from ((ids[::-1], count) for ids, count in stacks.items())
+
+
+# Yield call-stacks of a capture like iter_output_stacks
+def iter_capture_stacks(path, symbols):
+    for ids, _, count in iter_capture(path, symbols):
+        yield ids[::-1], count
+
+
+# Write call-stacks given as ids from the outermost caller and their counts
+# as lines of function names separated by semicolons followed by the count,
+# and return the number of call-stacks
+def write_folded(stacks, symbols, output):
+    total = 0
+    for ids, count in stacks:
+        output.write('{} {}\n'.format(';'.join(symbols.get_symbol(function)[0] for function in ids), count))
+        total += count
+    return total
+
+
+# Write call-stacks like write_folded as a speedscope profile whose
+# samples are the call-stacks weighted by their counts, and return the
+# number of call-stacks. Samples are written while they are read,
+# frames are written last as all functions are only known then.
+def write_speedscope(stacks, symbols, output, name='tracerface'):
+    output.write('{{"$schema": {}, "exporter": "tracerface", "name": {}, "activeProfileIndex": 0, '.format(
+        json.dumps(_SPEEDSCOPE_SCHEMA), json.dumps(name)))
+    output.write('"profiles": [{{"type": "sampled", "name": {}, "unit": "none", "startValue": 0, "samples": ['.format(
+        json.dumps(name)))
+    weights = array('Q')
+    for ids, count in stacks:
+        output.write('{}{}'.format(',' if weights else '', json.dumps(list(ids))))
+        weights.append(count)
+    total = sum(weights)
+    output.write('], "weights": {}, "endValue": {}}}], "shared": {{"frames": ['.format(
+        json.dumps(weights.tolist()), total))
+    output.write(','.join(
+        json.dumps({'name': name, 'file': source}) for name, source in map(symbols.get_symbol, range(len(symbols)))
+    ))
+    output.write(']}}')
+    return total
+
+
+def _write(stacks, symbols, output_path, format, name):
+    if format not in FORMATS:
+        raise ValueError('Unknown export format {}, expected one of {}'.format(format, ', '.join(FORMATS)))
+    with open(output_path, 'w') as output:
+        if format == 'folded':
+            return write_folded(stacks, symbols, output)
+        return write_speedscope(stacks, symbols, output, name)
+
+
+# Export call-stacks of bcc trace output or a capture to a file
+# in the given format and return the number of call-stacks
+def export_file(input_path, output_path, format):
+    symbols = SymbolTable()
+    if is_capture(input_path):
+        stacks = iter_capture_stacks(input_path, symbols)
+    else:
+        stacks = iter_output_stacks(input_path, symbols)
+    return _write(stacks, symbols, output_path, format, input_path)
+
+
+# Export call-stacks kept by the calling context tree of a call graph
+def export_call_graph(call_graph, output_path, format):
+    context = call_graph.get_calling_context()
+    if context is None:
+        raise ValueError('The call graph does not keep paths of call-stacks')
+    return _write(context.iter_stacks(), call_graph.get_symbols(), output_path, format, 'tracerface')
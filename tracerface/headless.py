@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+'''
+Tracing without the user interface, e.g. on a production host.
+Functions of a config file in the format of the dashboard are traced
+for a given time or until interrupted, then the aggregated call graph
+is saved as a snapshot, a text report or in a flame graph format.
+No module of the web UI is imported, so Dash is not needed.
+'''
+import time
+
+from tracerface.call_graph import CallGraph
+from tracerface.export import export_call_graph, FORMATS as EXPORT_FORMATS
+from tracerface.snapshot import save_snapshot
+from tracerface.trace_controller import TraceController
+from tracerface.trace_setup import (
+    BinaryAlreadyAddedError,
+    ConfigFileError,
+    FunctionNotInBinaryError,
+    Setup
+)
+
+
+FORMATS = ['snapshot', 'report'] + EXPORT_FORMATS
+
+# Seconds between checks whether the trace is over
+_POLL_INTERVAL = 0.1
+
+# Seconds to wait for the tracing process to be stopped
+_STOP_TIMEOUT = 10
+
+
+# Returns lines of a report listing traced functions by their number of
+# calls, each followed by its callers with the number of calls they made
+def get_report_lines(call_graph):
+    nodes = call_graph.get_nodes()
+    edges = call_graph.get_edges()
+    traced = sorted((node_id for node_id in nodes if nodes[node_id]['call_count']),
+                    key=lambda node_id: nodes[node_id]['call_count'], reverse=True)
+    lines = ['{} calls of {} traced functions'.format(
+        sum(nodes[node_id]['call_count'] for node_id in traced), len(traced))]
+    for node_id in traced:
+        lines.append('{:>10}  {} [{}]'.format(nodes[node_id]['call_count'], nodes[node_id]['name'], nodes[node_id]['source']))
+        callers = sorted(call_graph.get_callers(node_id),
+                         key=lambda caller: edges[(caller, node_id)]['call_count'], reverse=True)
+        for caller in callers:
+            lines.append('{:>10}    called by {} [{}]'.format(
+                edges[(caller, node_id)]['call_count'], nodes[caller]['name'], nodes[caller]['source']))
+    return lines
+
+
+# Save the call graph to a file in one of the formats
+def save_call_graph(call_graph, output_path, format):
+    call_graph.version() # expand deferred call-stacks
+    if format == 'snapshot':
+        save_snapshot(call_graph, output_path)
+    elif format == 'report':
+        with open(output_path, 'w') as output:
+            output.write('\n'.join(get_report_lines(call_graph)) + '\n')
+    else:
+        export_call_graph(call_graph, output_path, format)
+
+
+# Wait until the given number of seconds passed, forever if None,
+# or until the trace is interrupted or stops with an error,
+# and return the error
+def _wait_for_trace(trace_controller, duration):
+    deadline = None if duration is None else time.monotonic() + duration
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            if trace_controller.thread_error():
+                return trace_controller.thread_error()
+            time.sleep(_POLL_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    return None
+
+
+# Trace functions of a config file for the given number of seconds,
+# or until interrupted if None, and save the call graph to a file.
+# Returns an error message if tracing failed, the call graph traced
+# until then is saved anyway.
+def run_headless(config_path, output_path, format='snapshot', duration=None,
+                 aggregate=False, shared_memory=False, capture_path=None):
+    if format not in FORMATS:
+        raise ValueError('Unknown format {}, expected one of {}'.format(format, ', '.join(FORMATS)))
+    setup = Setup()
+    try:
+        warning = setup.load_from_file(config_path)
+    except (BinaryAlreadyAddedError, ConfigFileError, FunctionNotInBinaryError) as error:
+        return str(error)
+    if warning:
+        print(warning)
+
+    # Paths of call-stacks are needed by the flame graph formats,
+    # they are not received from the tracing process when it aggregates
+    if format in EXPORT_FORMATS and aggregate:
+        return 'Call-stacks aggregated by the tracing process can not be exported as {}'.format(format)
+    call_graph = CallGraph(calling_context=format in EXPORT_FORMATS)
+    trace_controller = TraceController(aggregate=aggregate, shared_memory=shared_memory,
+                                       capture_path=capture_path, count_stacks=not aggregate)
+    trace_controller.start_trace(setup.generate_bcc_args(), call_graph)
+    error = _wait_for_trace(trace_controller, duration)
+    trace_controller.stop_trace()
+    trace_controller.wait_for_trace(_STOP_TIMEOUT)
+    save_call_graph(call_graph, output_path, format)
+    if trace_controller.dropped_stacks():
+        print('{} call-stacks dropped, the transport buffer was full'.format(trace_controller.dropped_stacks()))
+    return error
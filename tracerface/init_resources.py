@@ -8,12 +8,12 @@ from tracerface.callbacks import (
 )
 from tracerface.call_graph import CallGraph
 from tracerface.trace_controller import TraceController
+from tracerface.trace_setup import Setup
 from tracerface.web_ui.layout import Layout
-from tracerface.web_ui.trace_setup import Setup
 
 
 # Initialize all callbacks used by the application
-def _setup_callbacks(app, call_graph, setup, trace_controller):
+def _setup_callbacks(app, call_graph, setup, trace_controller, adaptive_refresh, server_layout):
     app_dialog_callbacks.clear_traced_dropdown_menu(app)
     app_dialog_callbacks.clear_not_traced_dropdown_menu(app)
     app_dialog_callbacks.disable_manage_function_buttons(app)
@@ -26,12 +26,14 @@ def _setup_callbacks(app, call_graph, setup, trace_controller):
     dashboard_callbacks.disable_manage_app_buttons(app)
     dashboard_callbacks.disable_load_config_button(app)
     dashboard_callbacks.disable_load_button(app)
+    dashboard_callbacks.save_snapshot_of_graph(app, call_graph)
     dashboard_callbacks.start_or_stop_trace(app, call_graph, setup, trace_controller)
     dashboard_callbacks.stop_trace_on_error(app, trace_controller)
+    dashboard_callbacks.show_dropped_stacks(app, trace_controller)
     dashboard_callbacks.clear_selected_app(app)
     dashboard_callbacks.update_apps_dropdown_options(app, setup)
     dashboard_callbacks.update_color_slider(app, call_graph)
-    dashboard_callbacks.update_graph_layout(app)
+    dashboard_callbacks.update_graph_layout(app, server_layout)
 
     func_dialog_callbacks.open_or_close_dialog(app)
     func_dialog_callbacks.clear_dialog(app)
@@ -40,14 +42,22 @@ def _setup_callbacks(app, call_graph, setup, trace_controller):
     func_dialog_callbacks.update_parameters(app, setup)
     func_dialog_callbacks.disable_add_button(app, setup)
 
-    graph_callbacks.update_graph_elements(app, call_graph)
+    graph_callbacks.update_graph_elements(app, call_graph, adaptive_refresh, server_layout)
+    graph_callbacks.patch_graph_elements(app)
+    graph_callbacks.expand_focused_node(app)
+    if adaptive_refresh:
+        graph_callbacks.adapt_refresh_interval(app)
+    if call_graph.get_calling_context() is not None:
+        graph_callbacks.show_paths_of_node(app, call_graph)
     graph_callbacks.update_graph_style(app, call_graph)
 
 # Initialize all resources used by the application
-def initialize(app):
-    call_graph = CallGraph()
-    trace_controller = TraceController()
+def initialize(app, aggregate=False, shared_memory=False, adaptive_refresh=False, server_layout=False,
+               capture_path=None, count_stacks=False, calling_context=False):
+    call_graph = CallGraph(calling_context=calling_context)
+    trace_controller = TraceController(aggregate=aggregate, shared_memory=shared_memory, capture_path=capture_path,
+                                       count_stacks=count_stacks)
     setup = Setup()
-    app.layout = Layout()
+    app.layout = Layout(server_layout)
     app.title = 'Tracerface'
-    _setup_callbacks(app, call_graph, setup, trace_controller)
+    _setup_callbacks(app, call_graph, setup, trace_controller, adaptive_refresh, server_layout)
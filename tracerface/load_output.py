@@ -1,16 +1,119 @@
 #!/usr/bin/env python3
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO, TextIOWrapper
+import os
 
-from pathlib import Path
+from tracerface.aggregate import Aggregate
 
-from tracerface.parse_stack import parse_stack
 
+# Largest part of a trace output a worker parses at once
+CHUNK_SIZE = 64 * 1024 ** 2
 
-def load_trace_output_from_file_to_call_graph(file_path, call_graph):
-    text = Path(file_path).read_text()
+# Smallest part of a trace output worth a separate process, smaller
+# outputs are parsed in the calling process without starting any
+MIN_CHUNK_SIZE = 8 * 1024 ** 2
+
+# Call-stacks are separated by an empty line
+_STACK_BOUNDARY = b'\n\n'
+
+# Bytes read at a time while looking for the end of a call-stack
+_SEARCH_SIZE = 64 * 1024
+
+
+# Yield the call-stacks of an opened bcc trace output one at a time.
+# The file is read line by line through its buffer, so only the
+# stack currently being collected is held in memory.
+def read_stacks(output):
+    stack = []
+    for line in output:
+        line = line.rstrip('\n')
+        if line:
+            stack.append(line)
+        elif stack:
+            yield stack
+            stack = []
+    if stack:
+        yield stack
+
+
+# Load a trace output into the call graph, replacing its content once
+# the whole output was read. Repeated call-stacks are parsed once through
+# the given cache, which has to be bound to the symbol table of the graph.
+# Call-stacks are counted as a whole if the graph keeps their paths.
+def load_trace_output_from_file_to_call_graph(file_path, call_graph, cache=None):
+    count_stacks = call_graph.get_calling_context() is not None
+    aggregate = Aggregate(call_graph.get_symbols(), cache, count_stacks)
+    with open(file_path) as output:
+        for stack in read_stacks(output):
+            aggregate.add_stack(stack)
+    call_graph.clear()
+    call_graph.load_aggregate(aggregate)
+    call_graph.init_colors()
+
+
+# Returns the offset following the first stack boundary at or after
+# a given offset of an opened output, or the size of the output
+def _find_stack_boundary(output, offset, size):
+    output.seek(offset)
+    while offset < size:
+        data = output.read(_SEARCH_SIZE)
+        index = data.find(_STACK_BOUNDARY)
+        if index >= 0:
+            return offset + index + len(_STACK_BOUNDARY)
+        # keep the last byte in case the boundary is split between reads
+        offset += max(len(data) - 1, 1)
+        output.seek(offset)
+    return size
+
+
+# Split a trace output file into byte ranges of whole call-stacks,
+# as many as workers but none of them shorter than min_chunk_size
+# or longer than chunk_size if possible
+def split_trace_output(file_path, workers, chunk_size=CHUNK_SIZE, min_chunk_size=MIN_CHUNK_SIZE):
+    size = os.path.getsize(file_path)
+    part_size = max(min(chunk_size, max(-(-size // workers), min_chunk_size)), 1)
+    ranges = []
+    with open(file_path, 'rb') as output:
+        start = 0
+        while start < size:
+            end = _find_stack_boundary(output, start + part_size, size) if start + part_size < size else size
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+# Parse the call-stacks in a byte range of a trace output into an Aggregate
+def aggregate_trace_output_range(file_path, start, end):
+    aggregate = Aggregate()
+    with open(file_path, 'rb') as output:
+        output.seek(start)
+        data = output.read(end - start)
+    for stack in read_stacks(TextIOWrapper(BytesIO(data))):
+        aggregate.add_stack(stack)
+    return aggregate
+
+
+# Load a trace output like load_trace_output_from_file_to_call_graph,
+# parsing parts of the file in separate processes. The parts are merged
+# in the order of the file, so the call graph is the same as when the
+# output is loaded by a single process. Paths of call-stacks are lost
+# when they are sent between processes, so a call graph keeping them is
+# loaded by a single process, like outputs too small to be split.
+def load_trace_output_in_parallel(file_path, call_graph, workers=None, chunk_size=CHUNK_SIZE,
+                                  min_chunk_size=MIN_CHUNK_SIZE):
+    if call_graph.get_calling_context() is not None:
+        load_trace_output_from_file_to_call_graph(file_path, call_graph)
+        return
+    workers = workers or os.cpu_count() or 1
+    ranges = split_trace_output(file_path, workers, chunk_size, min_chunk_size)
     call_graph.clear()
-    stacks = [stack.split('\n') for stack in text.split('\n\n')]
-    for stack in stacks:
-        graph = parse_stack(stack)
-        call_graph.load_edges(graph.edges)
-        call_graph.load_nodes(graph.nodes)
+    if workers == 1 or len(ranges) < 2:
+        for start, end in ranges:
+            call_graph.load_aggregate(aggregate_trace_output_range(file_path, start, end))
+    else:
+        with ProcessPoolExecutor(min(workers, len(ranges))) as executor:
+            paths = [file_path] * len(ranges)
+            starts, ends = zip(*ranges)
+            for aggregate in executor.map(aggregate_trace_output_range, paths, starts, ends):
+                call_graph.load_aggregate(aggregate)
     call_graph.init_colors()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+'''
+Bounded summary of the parameters an edge was called with.
+It keeps a uniform reservoir sample of the calls, the most frequent
+values counted with the Space-Saving algorithm, and the number of
+distinct values which is exact up to a limit and estimated with
+k minimum values sketching above it. Memory stays flat no matter
+how many calls are added.
+'''
+from hashlib import blake2b
+from heapq import heappush, heappushpop, nlargest
+import random
+
+
+# Default number of calls kept as samples per edge
+SAMPLE_SIZE = 100
+
+# Default number of most frequent values reported per edge
+TOP_K = 10
+
+# Values counted to find the most frequent ones, per reported value
+_TOP_K_SLACK = 4
+
+# Distinct values counted exactly before switching to the estimate
+_EXACT_DISTINCT = 256
+
+# Number of smallest hashes kept for the distinct value estimate
+_SKETCH_SIZE = 256
+_HASH_RANGE = 2 ** 64
+
+
+# Hash of a value which is the same in every process
+def _hash(value):
+    return int.from_bytes(blake2b('\0'.join(value).encode(), digest_size=8).digest(), 'little')
+
+
+class ParamStore:
+    __slots__ = ['_sample_size', '_top_k', '_seen', '_samples', '_counters', '_distinct', '_sketch']
+
+    def __init__(self, sample_size=SAMPLE_SIZE, top_k=TOP_K):
+        self._sample_size = sample_size
+        self._top_k = top_k
+        self._seen = 0
+        self._samples = []
+        self._counters = {}
+        self._distinct = set() # exact distinct values, None once estimated
+        self._sketch = [] # max-heap of smallest hashes, stored negated
+
+    # Record parameters of a given number of calls. The cost is bounded
+    # by the sample size however many calls of the same value are added.
+    def add(self, params, count=1):
+        value = tuple(params)
+        free = min(count, self._sample_size - len(self._samples))
+        self._samples.extend(list(params) for _ in range(free))
+        self._seen += free
+        self._replace_samples(params, count - free)
+        self._count_value(value, count)
+        self._add_distinct(value)
+
+    # Reservoir sampling of calls once the samples are full: every call
+    # replaces a random sample with a probability of sample_size / seen.
+    # The samples are then a uniform choice among all calls, so the number
+    # of them taken by many calls of one value is drawn at once instead,
+    # from the hypergeometric distribution one sample at a time.
+    def _replace_samples(self, params, count):
+        if count <= self._sample_size:
+            for _ in range(count):
+                self._seen += 1
+                index = int(random.random() * self._seen)
+                if index < self._sample_size:
+                    self._samples[index] = list(params)
+            return
+        total = self._seen + count
+        remaining = count
+        replaced = 0
+        for drawn in range(self._sample_size):
+            if random.random() * (total - drawn) < remaining:
+                remaining -= 1
+                replaced += 1
+        for index in random.sample(range(self._sample_size), replaced):
+            self._samples[index] = list(params)
+        self._seen = total
+
+    # Space-Saving: when all counters are taken, the smallest one is
+    # given to the new value, which overestimates it by at most that count
+    def _count_value(self, value, count):
+        if value in self._counters:
+            self._counters[value] += count
+        elif len(self._counters) < self._top_k * _TOP_K_SLACK:
+            self._counters[value] = count
+        else:
+            smallest = min(self._counters, key=self._counters.get)
+            self._counters[value] = self._counters.pop(smallest) + count
+
+    def _add_distinct(self, value):
+        if self._distinct is not None:
+            self._distinct.add(value)
+            if len(self._distinct) <= _EXACT_DISTINCT:
+                return
+            values, self._distinct = self._distinct, None
+            for seen in values:
+                self._add_hash(_hash(seen))
+        else:
+            self._add_hash(_hash(value))
+
+    def _add_hash(self, value_hash):
+        if len(self._sketch) < _SKETCH_SIZE:
+            if -value_hash not in self._sketch:
+                heappush(self._sketch, -value_hash)
+        elif value_hash < -self._sketch[0] and -value_hash not in self._sketch:
+            heappushpop(self._sketch, -value_hash)
+
+    # Merge parameters recorded by another store into this one
+    def merge(self, other):
+        if other._seen == 0:
+            return
+        total = self._seen + other._seen
+        if total <= self._sample_size:
+            self._samples = self._samples + other._samples
+        else:
+            self._samples = self._merge_samples(other, total)
+        self._seen = total
+        for value, count in other._counters.items():
+            self._count_value(value, count)
+        if other._distinct is not None:
+            for value in other._distinct:
+                self._add_distinct(value)
+        else:
+            if self._distinct is not None:
+                values, self._distinct = self._distinct, None
+                for value in values:
+                    self._add_hash(_hash(value))
+            for value_hash in other._sketch:
+                self._add_hash(-value_hash)
+
+    # Each sample is taken from one of the stores with a probability
+    # proportional to the number of calls the store has seen
+    def _merge_samples(self, other, total):
+        mine = list(self._samples)
+        theirs = list(other._samples)
+        random.shuffle(mine)
+        random.shuffle(theirs)
+        samples = []
+        while len(samples) < self._sample_size and (mine or theirs):
+            take_mine = mine and (not theirs or random.randrange(total) < self._seen)
+            samples.append((mine if take_mine else theirs).pop())
+        return samples
+
+    # Return the state of the store as a list of plain lists and numbers.
+    # While no value was evicted from the counters they hold exactly the
+    # distinct values, which are then not repeated in the state.
+    def get_state(self):
+        if self._distinct is None:
+            distinct = None
+        elif len(self._distinct) == len(self._counters):
+            distinct = True
+        else:
+            distinct = [list(value) for value in self._distinct]
+        return [
+            self._sample_size,
+            self._top_k,
+            self._seen,
+            self._samples,
+            [[list(value), count] for value, count in self._counters.items()],
+            distinct,
+            self._sketch
+        ]
+
+    # Create a store from the state returned by get_state
+    @classmethod
+    def from_state(cls, state):
+        sample_size, top_k, seen, samples, counters, distinct, sketch = state
+        store = cls(sample_size, top_k)
+        store._seen = seen
+        store._samples = samples
+        store._counters = {tuple(value): count for value, count in counters}
+        if distinct is True:
+            store._distinct = set(store._counters)
+        else:
+            store._distinct = None if distinct is None else {tuple(value) for value in distinct}
+        store._sketch = sketch
+        return store
+
+    # Return number of calls recorded with parameters
+    def seen(self):
+        return self._seen
+
+    # Return the sampled parameters, all of them while there are few calls
+    def get_samples(self):
+        return self._samples
+
+    # Returns whether every recorded call is kept as a sample
+    def is_complete(self):
+        return self._seen == len(self._samples)
+
+    # Return number of distinct parameter values, estimated above a limit
+    def distinct_count(self):
+        if self._distinct is not None:
+            return len(self._distinct)
+        if len(self._sketch) < _SKETCH_SIZE:
+            return len(self._sketch)
+        return round((_SKETCH_SIZE - 1) * _HASH_RANGE / -self._sketch[0])
+
+    # Returns whether the number of distinct values is exact
+    def is_distinct_count_exact(self):
+        return self._distinct is not None
+
+    # Return the most frequent parameter values with their call counts
+    def most_common(self, count=None):
+        top = nlargest(count or self._top_k, self._counters.items(), key=lambda item: item[1])
+        return [(list(value), calls) for value, calls in top]
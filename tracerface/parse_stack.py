@@ -5,10 +5,11 @@ Two neighbouring lines are considered at a time
 where the former is the called function
 and the latter is the caller function
 '''
-from collections import namedtuple
-from hashlib import sha256
+from collections import namedtuple, OrderedDict
 from re import compile
 
+from tracerface.symbol_table import SymbolTable
+
 
 # Regex patterns to match in bcc trace output
 _FUNCTION_PATTERN = compile(r'([a-zA-Z0-9_]+)\+.*\s\[(.+)\]')
@@ -16,40 +17,16 @@ _PARAMS_PATTERN = compile(r'^\d+\s+\d+\s+\S+\s+\S+\s+(.+)')
 _HEADER_PATTERN = compile(r'^PID\s+TID\s+COMM\s+FUNC')
 
 
-# Struct to contains a call-stack from bcc trace output
-Stack = namedtuple('Stack', 'nodes edges')
-
-
-# Create node for a function with its name and source
-def _create_node(regex):
-    node_dict = {}
-    node_dict['name'] = regex.group(1)
-    node_dict['source'] = regex.group(2)
-    return node_dict
+# Default number of distinct call-stacks kept by a StackCache
+STACK_CACHE_SIZE = 4096
 
 
-# Add edge to the edges to be returned
-def _expand_edges(called, caller, edges, params, traced):
-    edge_id = (caller, called)
-    # If the edge is not already present then add it to the list
-    if edge_id not in edges:
-        edges[edge_id] = {}
-        edges[edge_id]['param'] = params or []
-        edges[edge_id]['call_count'] = 0
-    # If the edge goes to a traced function then increase call count
-    if traced:
-        edges[edge_id]['call_count'] += 1
-
+# Struct to contains a call-stack from bcc trace output
+Stack = namedtuple('Stack', 'nodes edges')
 
-# Add node to the nodes to be returned
-def _expand_nodes(node_dict, node_hash, nodes, called):
-    # If the node is not already present then add it to the list
-    if node_hash not in nodes:
-        nodes[node_hash] = node_dict
-        nodes[node_hash]['call_count'] = 0
-    # If the function is at the top of the call-stack then increase call count
-    if not called:
-        nodes[node_hash]['call_count'] += 1
+# Struct to contain ids of the functions of a call-stack, starting
+# with the traced one and followed by its callers, and its parameters
+Frames = namedtuple('Frames', 'ids params')
 
 
 # Get parameters from a single stack
@@ -60,31 +37,120 @@ def _get_params(header):
     return None
 
 
-def parse_stack(stack):
-    if not stack:
-        return Stack(nodes={}, edges={})
+# Return the line with the parameters of a call-stack, skipping the
+# header of the output, None if the call-stack has no lines left
+def _get_event_line(lines):
+    header = next(lines, None)
+    if header is not None and _HEADER_PATTERN.match(header):
+        header = next(lines, None)
+    return header
 
-    if _HEADER_PATTERN.match(stack[0]):
-        stack.pop(0)
-    if not stack:
-        return Stack(nodes={}, edges={})
 
-    params = _get_params(stack.pop(0))
+# Returns ids of the functions in the lines of a call-stack following its
+# event line, registering functions not seen before in the symbol table
+def _parse_ids(lines, symbols):
+    ids = []
+    for call in lines:
+        caller = _FUNCTION_PATTERN.search(call)
+        if caller:
+            ids.append(symbols.get_id(caller.group(1), caller.group(2)))
+    return tuple(ids)
+
+
+# The StackCache class keeps the ids of the functions of recently parsed
+# call-stacks by their lines, not including the event line with the
+# parameters, so repeated call-stacks skip the regular expressions.
+# It is bound to a symbol table, the ids are only valid there.
+# The least recently used call-stack is evicted once size is reached.
+class StackCache:
+    def __init__(self, symbols, size=STACK_CACHE_SIZE):
+        self._symbols = symbols
+        self._size = size
+        self._ids = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    # Return the symbol table the ids are taken from
+    def get_symbols(self):
+        return self._symbols
+
+    # Return ids of the functions of a call-stack given by its lines
+    # following the event line, parsing it if it is not cached
+    def get_ids(self, lines):
+        key = tuple(lines)
+        ids = self._ids.get(key)
+        if ids is not None:
+            self._hits += 1
+            self._ids.move_to_end(key)
+            return ids
+        self._misses += 1
+        ids = _parse_ids(key, self._symbols)
+        self._ids[key] = ids
+        if len(self._ids) > self._size:
+            self._ids.popitem(last=False)
+            self._evictions += 1
+        return ids
+
+    # Returns counters of the cache for tuning its size
+    def stats(self):
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions,
+            'size': len(self._ids)
+        }
+
+
+# Returns ids of the functions in the remaining lines of a call-stack,
+# from the cache if one is given or parsed into the symbol table
+def _get_ids(lines, symbols, cache):
+    if cache is not None:
+        return cache.get_ids(lines)
+    return _parse_ids(lines, symbols)
+
+
+# Parse a single call-stack, identifying functions through the given
+# symbol table so that ids are shared with other parsed stacks.
+# With a cache given its symbol table is used.
+def parse_stack(stack, symbols=None, cache=None):
+    if cache is not None:
+        symbols = cache.get_symbols()
+    elif symbols is None:
+        symbols = SymbolTable()
+    lines = iter(stack)
+    header = _get_event_line(lines)
+    if header is None:
+        return Stack(nodes={}, edges={})
+    ids = _get_ids(lines, symbols, cache)
 
+    # Only the function at the top of the call-stack and the call made
+    # to it are counted, only this call is made with the parameters
     nodes = {}
+    for node_id in ids:
+        if node_id not in nodes:
+            name, source = symbols.get_symbol(node_id)
+            nodes[node_id] = {'name': name, 'source': source, 'call_count': 0}
     edges = {}
-    called_hash = None
-    traced = True
-    while stack:
-        call = stack.pop(0)
-        caller = _FUNCTION_PATTERN.search(call)
-        if caller:
-            caller_node = _create_node(caller)
-            caller_hash = sha256(repr(caller_node).encode()).hexdigest()
-            _expand_nodes(caller_node, caller_hash, nodes, called_hash)
-            if called_hash:
-                _expand_edges(called_hash, caller_hash, edges, params, traced)
-                params = None
-                traced = False
-            called_hash = caller_hash
+    for index in range(1, len(ids)):
+        edge_id = (ids[index], ids[index - 1])
+        if edge_id not in edges:
+            edges[edge_id] = {'param': [], 'call_count': 0}
+    if ids:
+        nodes[ids[0]]['call_count'] += 1
+    if len(ids) > 1:
+        edge = edges[(ids[1], ids[0])]
+        edge['param'] = _get_params(header) or []
+        edge['call_count'] += 1
     return Stack(nodes=nodes, edges=edges)
+
+
+# Parse a single call-stack into the ids of its functions
+# given by the symbol table, and its parameters.
+# With a cache given its symbol table is used.
+def parse_frames(stack, symbols, cache=None):
+    lines = iter(stack)
+    header = _get_event_line(lines)
+    if header is None:
+        return Frames(ids=(), params=None)
+    return Frames(ids=_get_ids(lines, symbols, cache), params=_get_params(header))
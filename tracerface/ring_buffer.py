@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+'''
+Single-producer, single-consumer ring buffer in shared memory.
+Items are pickled into length-prefixed records. The producer never
+blocks: when a record does not fit, it is dropped and counted instead.
+'''
+from multiprocessing import shared_memory
+import pickle
+from queue import Empty
+import struct
+import time
+
+
+# Header of the buffer: write position, read position, dropped items.
+# Positions only grow, their difference is the number of bytes in use.
+_HEADER = struct.Struct('QQQ')
+_WRITE, _READ, _DROPPED = 0, 1, 2
+_LENGTH = struct.Struct('I')
+
+# Seconds to sleep between checks while waiting for a record
+_POLL_INTERVAL = 0.005
+
+
+# Queue-like transport between two processes built on a ring buffer
+class SharedMemoryQueue:
+    def __init__(self, capacity):
+        self._capacity = capacity
+        self._memory = shared_memory.SharedMemory(create=True, size=_HEADER.size + capacity)
+        _HEADER.pack_into(self._memory.buf, 0, 0, 0, 0)
+
+    # Attach to the same memory when sent to another process
+    def __getstate__(self):
+        return {'name': self._memory.name, 'capacity': self._capacity}
+
+    def __setstate__(self, state):
+        self._capacity = state['capacity']
+        self._memory = shared_memory.SharedMemory(name=state['name'])
+
+    # Read a counter of the header, repeating until two reads agree
+    # so a value being written by the other process is not torn
+    def _load(self, index):
+        offset = index * 8
+        value = struct.unpack_from('Q', self._memory.buf, offset)[0]
+        while True:
+            again = struct.unpack_from('Q', self._memory.buf, offset)[0]
+            if again == value:
+                return value
+            value = again
+
+    def _store(self, index, value):
+        struct.pack_into('Q', self._memory.buf, index * 8, value)
+
+    # Copy bytes into the ring starting at the given position
+    def _copy_in(self, position, data):
+        offset = position % self._capacity
+        first = min(len(data), self._capacity - offset)
+        start = _HEADER.size + offset
+        self._memory.buf[start:start + first] = data[:first]
+        if first < len(data):
+            self._memory.buf[_HEADER.size:_HEADER.size + len(data) - first] = data[first:]
+
+    # Copy bytes out of the ring starting at the given position
+    def _copy_out(self, position, length):
+        offset = position % self._capacity
+        first = min(length, self._capacity - offset)
+        start = _HEADER.size + offset
+        data = bytes(self._memory.buf[start:start + first])
+        if first < length:
+            data += bytes(self._memory.buf[_HEADER.size:_HEADER.size + length - first])
+        return data
+
+    # Returns number of call-stacks an item stands for: a list of them counts
+    # as its length, an Aggregate as the number of call-stacks it summed up
+    @staticmethod
+    def _stack_count(item):
+        if isinstance(item, list):
+            return len(item)
+        if hasattr(item, 'stack_count'):
+            return item.stack_count()
+        return 1
+
+    # Add an item to the ring, or count its call-stacks as dropped if it does not fit
+    def put(self, item):
+        data = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+        size = _LENGTH.size + len(data)
+        write = self._load(_WRITE)
+        if self._capacity - (write - self._load(_READ)) < size:
+            self._store(_DROPPED, self._load(_DROPPED) + self._stack_count(item))
+            return
+        self._copy_in(write, _LENGTH.pack(len(data)))
+        self._copy_in(write + _LENGTH.size, data)
+        # publish the record only after it was fully written
+        self._store(_WRITE, write + size)
+
+    # Take the oldest item from the ring or raise Empty
+    def get_nowait(self):
+        read = self._load(_READ)
+        if read == self._load(_WRITE):
+            raise Empty
+        length = _LENGTH.unpack(self._copy_out(read, _LENGTH.size))[0]
+        data = self._copy_out(read + _LENGTH.size, length)
+        self._store(_READ, read + _LENGTH.size + length)
+        return pickle.loads(data)
+
+    # Wait at most timeout seconds for an item, then raise Empty
+    def get(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self.get_nowait()
+            except Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise
+                time.sleep(min(_POLL_INTERVAL, remaining))
+
+    # Return number of items dropped because the ring was full
+    def dropped(self):
+        return self._load(_DROPPED)
+
+    # Free the shared memory, called by its creator when done
+    def release(self):
+        self._memory.close()
+        self._memory.unlink()
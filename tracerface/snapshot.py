@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+'''
+Snapshots of the aggregated call graph, stored as gzip
+compressed JSON so a long trace session can be kept and
+loaded again without its call-stacks.
+'''
+import gzip
+import json
+
+
+_FORMAT = 'tracerface-snapshot'
+_VERSION = 1
+
+# Compression level of gzip, higher levels save little on counts
+_COMPRESS_LEVEL = 6
+
+# First bytes of every gzip file
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+# Error raised when a file is not a valid snapshot
+class SnapshotFormatError(Exception):
+    pass
+
+
+# Save the state of the call graph to a file
+def save_snapshot(call_graph, path):
+    snapshot = call_graph.to_snapshot()
+    snapshot['format'] = _FORMAT
+    snapshot['version'] = _VERSION
+    data = json.dumps(snapshot, separators=(',', ':')).encode()
+    with gzip.open(path, 'wb', compresslevel=_COMPRESS_LEVEL) as output:
+        output.write(data)
+
+
+# Returns whether a file is compressed like a snapshot, as opposed
+# to trace output, which is text
+def is_snapshot(path):
+    with open(path, 'rb') as snapshot_file:
+        return snapshot_file.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC
+
+
+# Load a snapshot from a file into the call graph,
+# replacing its content unless merge is set
+def load_snapshot(path, call_graph, merge=False):
+    with gzip.open(path, 'rb') as snapshot_file:
+        try:
+            snapshot = json.loads(snapshot_file.read())
+        except (OSError, EOFError, ValueError):
+            raise SnapshotFormatError('{} is not a snapshot'.format(path))
+    if not isinstance(snapshot, dict) or snapshot.get('format') != _FORMAT or snapshot.get('version') != _VERSION:
+        raise SnapshotFormatError('{} is not a snapshot'.format(path))
+    call_graph.load_snapshot(snapshot, merge)
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+
+# The SymbolTable class interns functions by their name and source,
+# assigning each unique function a compact integer id only once
+class SymbolTable:
+    def __init__(self):
+        self._ids = {}
+        self._symbols = []
+
+    # Return id of the function, registering it if it was not seen before
+    def get_id(self, name, source):
+        key = (name, source)
+        id = self._ids.get(key)
+        if id is None:
+            id = len(self._symbols)
+            self._ids[key] = id
+            self._symbols.append(key)
+        return id
+
+    # Return name and source of the function with the given id
+    def get_symbol(self, id):
+        return self._symbols[id]
+
+    # Return number of functions registered
+    def __len__(self):
+        return len(self._symbols)
@@ -1,45 +1,117 @@
 from threading import Thread
+import time
 
-from tracerface.parse_stack import parse_stack
+from tracerface.aggregate import Aggregate
+from tracerface.capture import CaptureWriter
+from tracerface.parse_stack import StackCache
 from tracerface.trace_process import TraceProcess
 
 
+# Seconds to wait for output at once, this bounds the time needed
+# to notice that tracing was stopped or the process died
+_POLL_TIMEOUT = 0.1
+
+# Seconds an interrupted tracing process gets to send its remaining
+# output and exit before it is terminated
+_STOP_TIMEOUT = 5
+
+
 # The TraceController class manages the lifecycle
 # of the tracing process, consumes and parses its
-# outputs, and loads them into the given CallGraph
+# outputs, and loads them into the given CallGraph.
+# With aggregate set, parsing is left to the tracing
+# process and only the aggregated counts are loaded.
+# With shared_memory set, output is received through
+# a ring buffer in shared memory instead of a queue.
+# With capture_path set, call-stacks of each trace are
+# also recorded to a capture file at that path, which
+# needs the call-stacks themselves instead of aggregates.
+# With count_stacks set, received call-stacks are only counted
+# and expanded by the call graph when its next version is asked for.
 class TraceController:
-    def __init__(self):
+    def __init__(self, aggregate=False, shared_memory=False, capture_path=None, count_stacks=False):
+        if aggregate and capture_path:
+            raise ValueError('Call-stacks can not be captured when they are aggregated')
         self._thread_enabled = False
         self._thread_error = None
+        self._dropped = 0
+        self._aggregate = aggregate
+        self._shared_memory = shared_memory
+        self._capture_path = capture_path
+        self._count_stacks = count_stacks
+        self._stack_cache = None
+        self._monitoring = None
+
+    # Parse call-stacks output by the tracing process and load them,
+    # recording them with the time they were received if capturing.
+    # Repeated call-stacks are parsed once if a cache is given.
+    # With defer set, they are only counted and deferred to the call graph.
+    # They are also counted as a whole if the call graph keeps their paths.
+    @staticmethod
+    def _load_stacks(trace_process, call_graph, capture=None, cache=None, defer=False):
+        stacks = trace_process.get_stacks(timeout=_POLL_TIMEOUT)
+        timestamp = time.time()
+        count_stacks = defer or call_graph.get_calling_context() is not None
+        aggregate = Aggregate(call_graph.get_symbols(), cache, count_stacks)
+        for calls in stacks:
+            aggregate.add_stack(calls)
+            if capture:
+                capture.add_stack(calls, timestamp)
+        if stacks and defer:
+            call_graph.defer_aggregate(aggregate)
+        elif stacks:
+            call_graph.load_aggregate(aggregate)
+        return bool(stacks)
+
+    # Load counts aggregated by the tracing process
+    @staticmethod
+    def _load_aggregates(trace_process, call_graph):
+        aggregates = trace_process.get_aggregates(timeout=_POLL_TIMEOUT)
+        for aggregate in aggregates:
+            call_graph.load_aggregate(aggregate)
+        return bool(aggregates)
+
+    # Load the output available within the poll timeout
+    # and return whether there was any
+    def _load_output(self, trace_process, call_graph, capture):
+        if self._aggregate:
+            loaded = self._load_aggregates(trace_process, call_graph)
+        else:
+            loaded = self._load_stacks(trace_process, call_graph, capture, self._stack_cache, self._count_stacks)
+        # Colors of deferred call-stacks are initialized once they are expanded
+        if loaded and not self._count_stacks:
+            call_graph.init_colors()
+        self._dropped = trace_process.get_dropped()
+        return loaded
+
+    # Interrupt the tracing process so it sends the output it still holds,
+    # and keep loading output until it exited and the transport is empty.
+    # The process is terminated if it does not exit in time.
+    def _stop_process(self, trace_process, call_graph, capture):
+        trace_process.interrupt()
+        deadline = time.monotonic() + _STOP_TIMEOUT
+        while trace_process.is_alive() and time.monotonic() < deadline:
+            self._load_output(trace_process, call_graph, capture)
+        if trace_process.is_alive():
+            trace_process.terminate()
+        trace_process.join()
+        while self._load_output(trace_process, call_graph, capture):
+            pass
 
-    # While tracing, consume items from the queue and process them
+    # While tracing, consume call-stacks in batches and process them
     def _monitor_tracing(self, trace_process, call_graph):
-        calls = []
-        last_line_was_empty = False # call-stack ends when two empty lines follow eachother
+        capture = CaptureWriter(self._capture_path) if self._capture_path else None
+        self._stack_cache = None if self._aggregate else StackCache(call_graph.get_symbols())
         while self._thread_enabled:
             # If process died unexpectedly, report error
             if not trace_process.is_alive():
                 self._thread_error = 'Tracing stopped unexpectedly'
                 break
-            output = trace_process.get_output()
-            # call-stack ended
-            if output == '\n' and last_line_was_empty:
-                stack = parse_stack(calls)
-                call_graph.load_edges(stack.edges)
-                call_graph.load_nodes(stack.nodes)
-                call_graph.init_colors()
-                calls.clear()
-            # new line after a regular output
-            elif output == '\n':
-                last_line_was_empty = True
-            # regular output from bcc trace
-            elif output:
-                last_line_was_empty = False
-                calls.append(output)
-        # Terminate process when tracing is stopped by the user
-        if trace_process.is_alive():
-            trace_process.terminate()
-            trace_process.join()
+            self._load_output(trace_process, call_graph, capture)
+        self._stop_process(trace_process, call_graph, capture)
+        trace_process.release()
+        if capture:
+            capture.close()
 
     # Starts tracing of given functions
     def start_trace(self, functions, call_graph):
@@ -47,18 +119,36 @@ class TraceController:
             self._thread_error = 'No functions to trace'
             return
         self._thread_error = None
+        self._dropped = 0
         self._thread_enabled = True
 
         args = ['', '-UK'] + [fr'{function}' for function in functions]
-        trace_process = TraceProcess(args=args)
-        monitoring = Thread(target=self._monitor_tracing, args=(trace_process, call_graph,))
+        trace_process = TraceProcess(args=args, aggregate=self._aggregate, shared_memory=self._shared_memory)
+        self._monitoring = Thread(target=self._monitor_tracing, args=(trace_process, call_graph,))
         trace_process.start()
-        monitoring.start()
+        self._monitoring.start()
 
     # Stop tracing and initialize colors
     def stop_trace(self):
         self._thread_enabled = False
 
+    # Wait until monitoring of the last trace finished after it was stopped,
+    # so all output of the tracing process is loaded and the capture is complete
+    def wait_for_trace(self, timeout=None):
+        if self._monitoring is not None:
+            self._monitoring.join(timeout)
+
     # Returns error happening while an active trace
     def thread_error(self):
         return self._thread_error
+
+    # Returns number of call-stacks dropped by the transport during the trace
+    def dropped_stacks(self):
+        return self._dropped
+
+    # Returns counters of the cache of parsed call-stacks of the last trace,
+    # None if no call-stacks were parsed by this process
+    def stack_cache_stats(self):
+        if self._stack_cache is None:
+            return None
+        return self._stack_cache.stats()
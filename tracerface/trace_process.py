@@ -1,9 +1,37 @@
 from contextlib import redirect_stdout
 from importlib import machinery, util
 import multiprocessing
-from multiprocessing.queues import Queue
+import os
 from queue import Empty
+import signal
 import sys
+from threading import Event, Lock, Thread
+
+from tracerface.aggregate import Aggregate
+from tracerface.parse_stack import StackCache
+from tracerface.ring_buffer import SharedMemoryQueue
+from tracerface.symbol_table import SymbolTable
+
+
+# Maximum number of messages returned at once, so consumers
+# regularly get back control even under heavy load
+_MAX_BATCH = 1000
+
+# Complete stacks are sent when this many characters are waiting
+# or when this many seconds passed since the last message
+_FLUSH_SIZE = 64 * 1024
+_FLUSH_INTERVAL = 0.05
+
+# Seconds to aggregate call-stacks for before sending their counts
+_AGGREGATE_INTERVAL = 0.1
+
+# Size in bytes of the ring buffer when output is sent through shared memory
+_RING_BUFFER_SIZE = 32 * 1024 * 1024
+
+
+# Split text of a call-stack into its non-empty lines
+def _split_lines(stack):
+    return [line.strip(' ') for line in stack.split('\n') if line.strip()]
 
 
 # BCC trace is supposed to be run from the terminal.
@@ -18,31 +46,151 @@ def _get_bcc_trace_tool(args):
     return bcc_trace.Tool()
 
 
-# Special Queue class with a write and flush method
-# which can be used to write text streams into
-class WritableQueue(Queue):
+# Text stream which collects the output of bcc trace and puts it
+# in a queue grouped into complete call-stacks. Stacks are sent together
+# in one message when enough of them piled up or when the flush interval
+# elapsed, instead of sending every single write as its own message.
+class StackWriter:
+    def __init__(self, queue, flush_size=_FLUSH_SIZE, flush_interval=_FLUSH_INTERVAL):
+        self._queue = queue
+        self._flush_size = flush_size
+        self._pending = '' # text of the call-stack not finished yet
+        self._stacks = [] # finished call-stacks waiting to be sent
+        self._size = 0
+        self._lock = Lock()
+        self._closed = Event()
+        self._flusher = Thread(target=self._flush_periodically, args=(flush_interval,), daemon=True)
+        self._flusher.start()
+
+    # Keep a finished call-stack until the next message is sent
+    def _add_stack(self, stack):
+        self._stacks.append(stack)
+        self._size += len(stack)
+        if self._size >= self._flush_size:
+            self._send()
+
+    # Put the finished call-stacks in the queue as a single message
+    def _send(self):
+        if self._stacks:
+            self._queue.put(self._stacks)
+            self._stacks = []
+            self._size = 0
+
+    def _flush_periodically(self, interval):
+        while not self._closed.wait(interval):
+            with self._lock:
+                self._send()
+
     def write(self, s):
-        self.put(s)
+        with self._lock:
+            tail = len(self._pending)
+            self._pending += s
+            # call-stack ends with an empty line, which follows a new line
+            if '\n\n' not in self._pending[max(tail - 1, 0):]:
+                return
+            *stacks, self._pending = self._pending.split('\n\n')
+            for stack in stacks:
+                if stack.strip():
+                    self._add_stack(stack)
 
     def flush(self):
         pass
 
+    # Send everything written so far, including an unfinished stack
+    def close(self):
+        self._closed.set()
+        self._flusher.join()
+        with self._lock:
+            if self._pending.strip():
+                self._add_stack(self._pending)
+            self._pending = ''
+            self._send()
+
+
+# Text stream which parses the call-stacks written by bcc trace right
+# inside the tracing process and periodically sends only the counts
+# aggregated from them, instead of the text of every single stack
+class AggregatingWriter(StackWriter):
+    def __init__(self, queue, flush_interval=_AGGREGATE_INTERVAL):
+        self._symbols = SymbolTable()
+        self._cache = StackCache(self._symbols)
+        self._aggregate = Aggregate(self._symbols, self._cache, count_stacks=True)
+        super().__init__(queue, flush_interval=flush_interval)
+
+    def _add_stack(self, stack):
+        self._aggregate.add_stack(_split_lines(stack))
+
+    def _send(self):
+        if not self._aggregate.is_empty():
+            self._queue.put(self._aggregate)
+            self._aggregate = Aggregate(self._symbols, self._cache, count_stacks=True)
+
 
 # Speacial Process class which runs the tracing
 # and makes it possible to retrieve its output.
+# With aggregate set, call-stacks are parsed by the tracing process
+# and only their aggregated counts are retrieved. With shared_memory set,
+# output is sent through a ring buffer instead of a multiprocessing queue.
 class TraceProcess(multiprocessing.Process):
-    def __init__(self, args):
+    def __init__(self, args, aggregate=False, shared_memory=False):
         super().__init__()
-        self._queue = WritableQueue(ctx=multiprocessing.get_context())
+        if shared_memory:
+            self._queue = SharedMemoryQueue(_RING_BUFFER_SIZE)
+        else:
+            self._queue = multiprocessing.get_context().Queue()
         self._args = args
+        self._aggregate = aggregate
+        self._shared_memory = shared_memory
 
+    # bcc trace runs until interrupted, the output it holds is still sent
+    # then, even if another interrupt arrives while it is being sent
     def run(self):
         tool = _get_bcc_trace_tool(self._args)
-        with redirect_stdout(self._queue):
-            tool.run()
+        writer = AggregatingWriter(self._queue) if self._aggregate else StackWriter(self._queue)
+        try:
+            with redirect_stdout(writer):
+                tool.run()
+        finally:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            writer.close()
+
+    # Ask the tracing process to stop like Ctrl-C in a terminal does,
+    # so unlike terminate it still sends the output it holds
+    def interrupt(self):
+        if self.is_alive():
+            os.kill(self.pid, signal.SIGINT)
 
-    def get_output(self):
+    # Wait at most timeout seconds for a message to arrive,
+    # then return every message available without blocking again
+    def _get_messages(self, timeout):
         try:
-            return self._queue.get_nowait().strip(' ')
+            messages = [self._queue.get(timeout=timeout)]
         except Empty:
-            return None
+            return []
+        try:
+            while len(messages) < _MAX_BATCH:
+                messages.append(self._queue.get_nowait())
+        except Empty:
+            pass
+        return messages
+
+    # Return the call-stacks available within timeout seconds.
+    # Each call-stack is returned as a list of its non-empty lines.
+    def get_stacks(self, timeout):
+        return [_split_lines(stack) for stacks in self._get_messages(timeout) for stack in stacks]
+
+    # Return the aggregates available within timeout seconds
+    # when call-stacks are aggregated by the tracing process
+    def get_aggregates(self, timeout):
+        return self._get_messages(timeout)
+
+    # Return number of call-stacks dropped because the transport was full
+    def get_dropped(self):
+        if self._shared_memory:
+            return self._queue.dropped()
+        return 0
+
+    # Free resources of the transport once no more output is needed
+    def release(self):
+        if self._shared_memory:
+            self._queue.release()
@@ -1,3 +1,4 @@
+import os
 
 import dash_bootstrap_components as dbc
 import dash_core_components as dcc
@@ -5,6 +6,7 @@ import dash_daq as daq
 import dash_html_components as html
 
 from tracerface.web_ui.dialogs import ManageApplicationDialog, ManageFunctionDialog
+from tracerface.web_ui.refresh import DEFAULT_INTERVAL
 from tracerface.web_ui.styles import element_style
 
 # Implementation of the dasboard
@@ -20,8 +22,11 @@ class Dashboard(html.Div):
                 self.trace_group(),
                 self.search_function_input(),
                 self.slider_group(),
+                self.prune_group(),
+                self.focus_checklist(),
                 self.spacing_group(),
                 self.animate_checklist(),
+                self.paths_group(),
                 ManageApplicationDialog(),
                 ManageFunctionDialog()
             ])
@@ -83,7 +88,11 @@ class Dashboard(html.Div):
             html.Div(
                 id='trace-error-notification',
                 children=None,
-                style=element_style())
+                style=element_style()),
+            dbc.FormText(
+                id='dropped-notification',
+                children=None,
+                color='danger')
         ])
 
     @staticmethod
@@ -107,7 +116,7 @@ class Dashboard(html.Div):
     @staticmethod
     def load_output_group():
         return dbc.FormGroup([
-            dbc.Label('Load output of BCC trace run'),
+            dbc.Label('Load output of BCC trace run, capture or snapshot, separate paths of outputs to combine with {}'.format(os.pathsep)),
             dbc.Row([
                 dbc.Col(dbc.Input(
                     id='output-path',
@@ -119,15 +128,31 @@ class Dashboard(html.Div):
                     className='mr-1'),
                     width=2)
             ]),
+            dbc.Row([
+                dbc.Col(dbc.Button('Load snapshot',
+                    id='load-snapshot-button',
+                    color='primary',
+                    className='mr-1')),
+                dbc.Col(dbc.Button('Save snapshot',
+                    id='save-snapshot-button',
+                    color='primary',
+                    className='mr-1'))
+            ],
+            style=element_style()),
+            html.Div(
+                id='save-snapshot-notification',
+                children=None,
+                style=element_style()),
             html.Div(
                 id='load-output-notification',
                 children=None,
                 style=element_style()),
             dcc.Interval(
                 id='timer',
-                interval=1*500, # in milliseconds
+                interval=DEFAULT_INTERVAL, # in milliseconds
                 n_intervals=0,
-                disabled=True)
+                disabled=True),
+            dcc.Store(id='refresh-stats')
         ])
 
     @staticmethod
@@ -150,6 +175,37 @@ class Dashboard(html.Div):
             disabled=True,
             placeholder='Search function name')
 
+    @staticmethod
+    def prune_group():
+        return dbc.FormGroup(
+            children=[
+                dbc.Label('Show most called functions: ', width=7),
+                dbc.Col(dbc.Input(
+                    id='prune-top-input',
+                    type='number',
+                    min=1,
+                    placeholder='all')),
+                dbc.Label('With calls at least: ', width=7),
+                dbc.Col(dbc.Input(
+                    id='prune-threshold-input',
+                    type='number',
+                    min=1,
+                    placeholder='any'))
+            ],
+            row=True,
+            style=element_style())
+
+    @staticmethod
+    def focus_checklist():
+        return html.Div([
+            dbc.Checklist(
+                options=[{"label": "Focus on traced functions", "value": 'focus'}],
+                value=[],
+                id="focus-switch",
+                switch=True),
+            dcc.Store(id='focus-expanded', data=[])
+        ])
+
     @staticmethod
     def spacing_group():
         return dbc.FormGroup(
@@ -172,6 +228,25 @@ class Dashboard(html.Div):
             id="animate-switch",
             switch=True)
 
+    @staticmethod
+    def paths_group():
+        return html.Div(
+            id='paths-div',
+            children=None,
+            style=element_style())
+
+    # Returns list of the most frequent paths leading to a function,
+    # or a note that they are not known, e.g. after loading a snapshot
+    @staticmethod
+    def paths(name, paths):
+        if not paths:
+            return html.Div(dbc.Label(
+                'No paths leading to {} are known, snapshots do not keep paths of call-stacks'.format(name)))
+        return html.Div([
+            dbc.Label('Paths leading to {}'.format(name)),
+            html.Ul([html.Li('{} times: {}'.format(count, ' > '.join(path))) for path, count in paths])
+        ])
+
     @staticmethod
     def slider(yellow_count=0, red_count=0, max_count=0, disabled=True):
         return dcc.RangeSlider(
@@ -3,13 +3,15 @@ from dash_cytoscape import Cytoscape, load_extra_layouts
 from tracerface.web_ui.styles import edge_styles, node_styles
 
 
-# Implementation of the displayed graph
+# Implementation of the displayed graph.
+# Nodes are placed by dagre in the browser, or at the positions
+# given by the server if preset is True.
 class Graph(Cytoscape):
-    def __init__(self):
+    def __init__(self, preset=False):
         load_extra_layouts()
         super().__init__(
             id='graph',
-            layout=self.layout(),
+            layout=self.layout(preset=preset),
             style={'height': '99vh'},
             elements=[],
             stylesheet=self.stylesheet())
@@ -19,9 +21,9 @@ class Graph(Cytoscape):
         return node_styles(yellow_count, red_count, search) + edge_styles(yellow_count, red_count, search)
 
     @staticmethod
-    def layout(spacing=2, animate=False):
+    def layout(spacing=2, animate=False, preset=False):
         return {
-            'name': 'dagre',
+            'name': 'preset' if preset else 'dagre',
             'spacingFactor': spacing,
             'animate': animate
         }
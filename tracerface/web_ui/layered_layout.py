@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+'''
+This module contains a layered layout of the call graph computed
+on the server, so the browser only has to place nodes at fixed
+positions. Callers are placed in layers above the functions they
+call. Positions are kept per node, only new nodes are placed and
+nodes never move until the graph is cleared.
+'''
+from collections import deque
+
+
+# Distance between columns and layers in pixels
+COLUMN_WIDTH = 200
+LAYER_HEIGHT = 100
+
+
+class LayeredLayout:
+    def __init__(self):
+        self._positions = {} # (layer, column) of placed nodes
+        self._taken = {} # columns taken in each layer
+        self._offsets = {} # distance of the last free column found by layer and wanted column
+
+    # Forget positions of all nodes
+    def clear(self):
+        self._positions = {}
+        self._taken = {}
+        self._offsets = {}
+
+    # Place nodes of a call graph which have no position yet.
+    # New nodes are placed after their new callers where possible, callers
+    # in a cycle are placed in the order the nodes are given.
+    def add_nodes(self, call_graph, node_ids):
+        new = [node_id for node_id in node_ids if node_id not in self._positions]
+        if not new:
+            return
+        pending = set(new)
+        waiting = {}
+        for node_id in new:
+            waiting[node_id] = sum(
+                1 for caller in call_graph.get_callers(node_id)
+                if caller in pending and caller != node_id)
+        ready = deque(node_id for node_id in new if waiting[node_id] == 0)
+        remaining = iter(new)
+        while pending:
+            if not ready:
+                ready.append(next(node_id for node_id in remaining if node_id in pending))
+            node_id = ready.popleft()
+            if node_id not in pending:
+                continue
+            pending.remove(node_id)
+            self._place(node_id, call_graph.get_callers(node_id))
+            for called in call_graph.get_callees(node_id):
+                if called in pending and called != node_id:
+                    waiting[called] -= 1
+                    if waiting[called] == 0:
+                        ready.append(called)
+
+    # Place a node one layer below its lowest placed caller, in the free
+    # column closest to the average column of its placed callers
+    def _place(self, node_id, callers):
+        placed = [self._positions[caller] for caller in callers if caller in self._positions]
+        layer = max((caller_layer + 1 for caller_layer, _ in placed), default=0)
+        wanted = round(sum(column for _, column in placed) / len(placed)) if placed else 0
+        self._positions[node_id] = (layer, self._take_column(layer, wanted))
+
+    # Take the free column of a layer closest to the wanted one. Columns are
+    # never freed, so the search continues from the distance found last time.
+    def _take_column(self, layer, wanted):
+        taken = self._taken.setdefault(layer, set())
+        offset = self._offsets.get((layer, wanted), 0)
+        while True:
+            for column in (wanted + offset, wanted - offset):
+                if column not in taken:
+                    taken.add(column)
+                    self._offsets[(layer, wanted)] = offset
+                    return column
+            offset += 1
+
+    # Returns position of a placed node in the format of cytoscape
+    def get_position(self, node_id):
+        layer, column = self._positions[node_id]
+        return {'x': column * COLUMN_WIDTH, 'y': layer * LAYER_HEIGHT}
+
+    # Returns position in the layer below a placed node
+    def get_position_below(self, node_id):
+        layer, column = self._positions[node_id]
+        return {'x': column * COLUMN_WIDTH, 'y': (layer + 1) * LAYER_HEIGHT}
+
+    # Returns position in the layer above a placed node
+    def get_position_above(self, node_id):
+        layer, column = self._positions[node_id]
+        return {'x': column * COLUMN_WIDTH, 'y': (layer - 1) * LAYER_HEIGHT}
@@ -1,4 +1,5 @@
 from dash_bootstrap_components import Col, Row
+from dash_core_components import Store
 from dash_html_components import Div
 
 from tracerface.web_ui.dashboard import Dashboard
@@ -7,10 +8,10 @@ from .graph import Graph
 
 # Implementation of the base layout of the user interface
 class Layout(Div):
-    def __init__(self):
+    def __init__(self, server_layout=False):
         super().__init__(
             children=Row([
-                Col(Graph()),
+                Col([Graph(preset=server_layout), Store(id='graph-patch')]),
                 Col(Dashboard(), width=3)
             ]),
             style={'width': '99vw'},)
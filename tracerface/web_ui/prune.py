@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+'''
+This module contains the pruning of huge call graphs
+before they are shown. Only the most called nodes are kept
+with the edges between them, calls from a kept node to hidden
+ones are folded into a synthetic "other" node of that caller,
+and calls from hidden callers of a kept node into an "other
+callers" node of that node.
+In focus mode only traced functions and their callers are kept,
+callers of further nodes are kept once the nodes are expanded.
+Functions of this module read the call graph without locking,
+they are called through CallGraph.read while it is being traced.
+'''
+from heapq import heappop, heappush, nlargest
+from itertools import count
+
+from tracerface.param_store import ParamStore
+
+
+# Returns ids of the nodes with at least threshold calls,
+# only the top most called ones of them if top is given.
+# Only traced functions are called, so without a threshold the places
+# of top left after them go to their callers, the callers making
+# the most calls to kept nodes first, then the ones closest to them.
+def select_hot_nodes(call_graph, top=None, threshold=None):
+    nodes = call_graph.get_nodes()
+    if not top and not threshold:
+        return list(nodes)
+    node_ids = [node_id for node_id in nodes if nodes[node_id]['call_count'] >= (threshold or 1)]
+    if top and top < len(node_ids):
+        return nlargest(top, node_ids, key=lambda node_id: nodes[node_id]['call_count'])
+    if threshold:
+        return node_ids
+    kept = dict.fromkeys(node_ids)
+    candidates = [] # heap of callers by calls made to kept nodes
+    order = count()
+    for node_id in node_ids:
+        _push_callers(call_graph, node_id, kept, candidates, order)
+    while candidates and len(kept) < top:
+        _, _, caller = heappop(candidates)
+        if caller not in kept:
+            kept[caller] = None
+            _push_callers(call_graph, caller, kept, candidates, order)
+    return list(kept)
+
+def _push_callers(call_graph, node_id, kept, candidates, order):
+    edges = call_graph.get_edges()
+    for caller in call_graph.get_callers(node_id):
+        if caller not in kept:
+            heappush(candidates, (-edges[(caller, node_id)]['call_count'], next(order), caller))
+
+# Returns id of the node hidden callees of a given node are folded into
+def get_other_node_id(caller):
+    return 'other-{}'.format(caller)
+
+# Returns id of the node hidden callers of a given node are folded into
+def get_other_callers_node_id(called):
+    return 'other-callers-{}'.format(called)
+
+# Returns ids of the edges between kept nodes of a call graph,
+# and the synthetic nodes and edges the other edges of kept nodes
+# are folded into, in the format of the call graph
+def fold_hidden_nodes(call_graph, kept):
+    kept_set = set(kept)
+    edges = call_graph.get_edges()
+    kept_edges = []
+    other_nodes = {}
+    other_edges = {}
+    for caller in kept:
+        hidden = 0
+        calls = 0
+        for called in call_graph.get_callees(caller):
+            if called in kept_set:
+                kept_edges.append((caller, called))
+            else:
+                hidden += 1
+                calls += edges[(caller, called)]['call_count']
+        if hidden:
+            other_id = get_other_node_id(caller)
+            other_nodes[other_id] = {
+                'name': 'other',
+                'source': '{} hidden functions'.format(hidden),
+                'call_count': calls
+            }
+            other_edges[(caller, other_id)] = {'params': ParamStore(), 'call_count': calls}
+    for called in kept:
+        hidden_callers = [caller for caller in call_graph.get_callers(called) if caller not in kept_set]
+        if hidden_callers:
+            other_id = get_other_callers_node_id(called)
+            other_nodes[other_id] = {
+                'name': 'other callers',
+                'source': '{} hidden functions'.format(len(hidden_callers)),
+                'call_count': 0
+            }
+            other_edges[(other_id, called)] = {
+                'params': ParamStore(),
+                'call_count': sum(edges[(caller, called)]['call_count'] for caller in hidden_callers)
+            }
+    return kept_edges, other_nodes, other_edges
+
+# Returns ids of the traced nodes, their callers and the callers of
+# expanded nodes reachable from them, and ids of the edges between them
+def select_focused_nodes(call_graph, expanded):
+    nodes = call_graph.get_nodes()
+    expanded = set(expanded)
+    roots = [node_id for node_id in nodes if nodes[node_id]['call_count'] > 0]
+    shown = dict.fromkeys(roots)
+    queue = list(roots)
+    for index, node_id in enumerate(queue):
+        if index >= len(roots) and node_id not in expanded:
+            continue
+        for caller in call_graph.get_callers(node_id):
+            if caller not in shown:
+                shown[caller] = None
+                queue.append(caller)
+    edges = [
+        (caller, node_id)
+        for node_id in shown
+        for caller in call_graph.get_callers(node_id)
+        if caller in shown
+    ]
+    return list(shown), edges
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+'''
+This module contains the scheduling of graph refreshes.
+The refresh interval backs off while no new elements arrive,
+speeds up while they do, and is kept well above the time
+the server needs to convert the elements.
+'''
+
+# Intervals of refreshing the graph in milliseconds
+DEFAULT_INTERVAL = 500
+MIN_INTERVAL = 250
+MAX_INTERVAL = 5000
+
+# Factor to change the interval by on each refresh
+_STEP = 2
+
+# Minimum ratio of the interval to the time of the last conversion
+_RENDER_RATIO = 2
+
+
+# Returns the interval of the next refresh in milliseconds based on
+# the current one, the number of elements changed and the time
+# it took to convert them in milliseconds
+def next_interval(interval, changed, render_time):
+    if changed:
+        interval = max(MIN_INTERVAL, interval / _STEP)
+    else:
+        interval = min(MAX_INTERVAL, interval * _STEP)
+    return round(max(interval, render_time * _RENDER_RATIO))
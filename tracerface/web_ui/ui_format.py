@@ -2,39 +2,223 @@
 '''
 This module contains functions to convert
 data in the call graph into the format
-which dash cytoscape requires
+which dash cytoscape requires.
+Nodes are identified by integers in the call graph,
+these are turned into string ids only here.
 '''
+from collections import ChainMap
+from threading import Lock
 
-# Returns list of nodes in a format usable to cytoscape
-def convert_nodes_to_cytoscape_format(nodes, edges):
+from tracerface.web_ui.prune import fold_hidden_nodes, select_focused_nodes, select_hot_nodes
+
+
+# Converted elements of a call graph. Elements are only converted again
+# when they change, so the cost of an update scales with the number of
+# changed elements instead of the size of the graph.
+# All elements are dropped when the call graph is cleared.
+# Nodes are given fixed positions if a layout is given.
+class ElementCache:
+    def __init__(self, call_graph, layout=None):
+        self._call_graph = call_graph
+        self._layout = layout
+        self._lock = Lock()
+        self._version = None
+        self._nodes = {}
+        self._edges = {}
+        self._node_ids = {} # ids of nodes by the id of their element
+
+    # Drop all converted elements
+    def clear(self):
+        self._version = None
+        self._nodes = {}
+        self._edges = {}
+        self._node_ids = {}
+        if self._layout:
+            self._layout.clear()
+
+    # Convert elements changed since the last update and return
+    # the version of the call graph the elements are up to date with.
+    # Nodes are also converted when their incoming edges changed
+    # because their information lists the parameters of those edges.
+    def update(self):
+        if self._version is None:
+            version, changes = self._call_graph.version(), None
+        else:
+            version, changes = self._call_graph.changes_since(self._version)
+        if changes is None:
+            self.clear()
+        self._call_graph.read(self._convert, changes)
+        self._version = version
+        return version
+
+    # Convert the given changed elements of a call graph, all of them
+    # if None, while nodes and edges are not changed by other threads.
+    # Changed elements are gone if the graph was cleared since then,
+    # the next update converts all elements again in that case.
+    def _convert(self, call_graph, changes):
+        nodes = call_graph.get_nodes()
+        edges = call_graph.get_edges()
+        callers = call_graph.get_callers_index()
+        if changes is None:
+            node_ids, edge_ids = nodes, edges
+        else:
+            node_ids, edge_ids = _with_called_nodes(*changes)
+            node_ids = [node_id for node_id in node_ids if node_id in nodes]
+            edge_ids = [edge_id for edge_id in edge_ids if edge_id in edges]
+        if self._layout:
+            self._layout.add_nodes(call_graph, node_ids)
+        for node_id in node_ids:
+            self._nodes[node_id] = convert_nodes_to_cytoscape_format(nodes, edges, callers, [node_id])[0]
+            if self._layout:
+                self._nodes[node_id]['position'] = self._layout.get_position(node_id)
+            self._node_ids[self._nodes[node_id]['data']['id']] = node_id
+        for edge_id in edge_ids:
+            self._edges[edge_id] = convert_edges_to_cytoscape_format(nodes, edges, [edge_id])[0]
+
+    # Returns a patch of elements for a client which has the elements
+    # of a given version and view, or all elements if it has None.
+    # The view can prune elements to the top most called nodes and the
+    # ones with at least threshold calls, or focus on traced nodes and
+    # callers of the expanded ones, given by the ids of their elements.
+    # Patches of such views are always full.
+    # Returns None if the client is up to date.
+    def get_patch(self, client_version, view=None, client_view=None):
+        with self._lock:
+            return self._get_patch(client_version, view, client_view)
+
+    def _get_patch(self, client_version, view, client_view):
+        version = self.update()
+        if client_version == version and client_view == view:
+            return None
+        if view and 'focus' in view:
+            node_ids, edge_ids = self._call_graph.read(
+                _focus, self._get_node_ids(view['focus']), self._nodes, self._edges)
+            return self._get_view_patch(version, view, node_ids, edge_ids)
+        if view:
+            return self._get_pruned_patch(version, view)
+        changes = None
+        if client_version is not None and client_view is None:
+            _, changes = self._call_graph.changes_since(client_version, version)
+        if changes is None:
+            elements = list(self._nodes.values()) + list(self._edges.values())
+        else:
+            node_ids, edge_ids = _with_called_nodes(*changes)
+            elements = [self._nodes[node_id] for node_id in node_ids]
+            elements += [self._edges[edge_id] for edge_id in edge_ids]
+        return {
+            'version': version,
+            'full': changes is None,
+            'elements': elements,
+            'view': None
+        }
+
+    def _get_pruned_patch(self, version, view):
+        nodes = self._call_graph.get_nodes()
+        kept, kept_edges, other_nodes, other_edges = self._call_graph.read(
+            _prune, view.get('top'), view.get('threshold'), self._nodes, self._edges)
+        patch = self._get_view_patch(version, view, kept, kept_edges)
+        other_elements = convert_nodes_to_cytoscape_format(other_nodes, other_edges)
+        if self._layout:
+            for element, (caller, called) in zip(other_elements, other_edges):
+                if caller in other_nodes:
+                    element['position'] = self._layout.get_position_above(called)
+                else:
+                    element['position'] = self._layout.get_position_below(caller)
+        patch['elements'] += other_elements
+        patch['elements'] += convert_edges_to_cytoscape_format(ChainMap(other_nodes, nodes), other_edges)
+        return patch
+
+    def _get_view_patch(self, version, view, node_ids, edge_ids):
+        elements = [self._nodes[node_id] for node_id in node_ids]
+        elements += [self._edges[edge_id] for edge_id in edge_ids]
+        return {
+            'version': version,
+            'full': True,
+            'elements': elements,
+            'view': view
+        }
+
+    # Returns ids of nodes by the ids of their elements, skipping unknown ones
+    def _get_node_ids(self, element_ids):
+        return [self._node_ids[element_id] for element_id in element_ids if element_id in self._node_ids]
+
+# Returns ids of the nodes and edges kept when a call graph is pruned,
+# and the synthetic nodes and edges hidden ones are folded into.
+# Nodes and edges added after the converted ones are left for the next update.
+def _prune(call_graph, top, threshold, converted_nodes, converted_edges):
+    kept = [node_id for node_id in select_hot_nodes(call_graph, top, threshold) if node_id in converted_nodes]
+    kept_edges, other_nodes, other_edges = fold_hidden_nodes(call_graph, kept)
+    kept_edges = [edge for edge in kept_edges if edge in converted_edges]
+    return kept, kept_edges, other_nodes, other_edges
+
+# Returns ids of the nodes and edges kept in focus mode,
+# leaving nodes and edges added after the converted ones for the next update
+def _focus(call_graph, expanded, converted_nodes, converted_edges):
+    node_ids, edge_ids = select_focused_nodes(call_graph, expanded)
+    node_ids = [node_id for node_id in node_ids if node_id in converted_nodes]
+    edge_ids = [edge for edge in edge_ids if edge in converted_edges]
+    return node_ids, edge_ids
+
+# Returns list of nodes in a format usable to cytoscape.
+# Callers of nodes are looked up in the given index of callers
+# by called node, which is built from the edges if not given.
+# Only nodes with the given ids are converted if there are any.
+def convert_nodes_to_cytoscape_format(nodes, edges, callers=None, node_ids=None):
+    if callers is None:
+        callers = _index_callers(edges)
+    if node_ids is None:
+        node_ids = nodes
     return [
         {
             'data': {
-                'id': node_id,
+                'id': str(node_id),
                 'name': nodes[node_id]['name'],
                 'source': nodes[node_id]['source'],
                 'count': nodes[node_id]['call_count'],
-                'info': _get_info_text_for_node(nodes[node_id], _get_params_of_node(node_id, edges))
+                'info': _get_info_text_for_node(nodes[node_id], _get_params_of_node(node_id, edges, callers))
             }
-        } for node_id in nodes
+        } for node_id in node_ids
     ]
 
-# Returns list of edges in a format usable to cytoscape
-def convert_edges_to_cytoscape_format(nodes, edges):
+# Returns list of edges in a format usable to cytoscape.
+# Only edges with the given ids are converted if there are any.
+def convert_edges_to_cytoscape_format(nodes, edges, edge_ids=None):
+    if edge_ids is None:
+        edge_ids = edges
     return [
         {
             'data': {
-                'source': edge[0],
-                'target': edge[1],
+                'id': get_edge_element_id(edge),
+                'source': str(edge[0]),
+                'target': str(edge[1]),
                 'params': _get_param_visuals_for_edge(edges[edge]['params']),
                 'call_count': edges[edge]['call_count'],
                 'caller_name': nodes[edge[0]]['name'],
                 'called_name': nodes[edge[1]]['name'],
                 'info': _get_info_text_for_edge(edges[edge])
             }
-        } for edge in edges
+        } for edge in edge_ids
     ]
 
+# Returns id of the element of an edge, which stays the same between
+# updates so changed edges can replace their earlier version
+def get_edge_element_id(edge):
+    return '{}-{}'.format(edge[0], edge[1])
+
+# Returns lines describing the parameters kept by a parameter store.
+# All calls are listed while every one of them is kept, otherwise
+# the most frequent values and the number of distinct values are shown.
+def _get_param_lines(store):
+    if store.is_complete():
+        return [', '.join(param) for param in store.get_samples()]
+    lines = ['{} calls with {}{} distinct values, most frequent:'.format(
+        store.seen(),
+        '' if store.is_distinct_count_exact() else '~',
+        store.distinct_count()
+    )]
+    lines += ['{} ({} times)'.format(', '.join(param), count) for param, count in store.most_common()]
+    return lines
+
 # Returns text containing information about given node
 def _get_info_text_for_node(node, params):
     text = '{}\nSource: {}\nCalled {} times'.format(
@@ -42,34 +226,39 @@ def _get_info_text_for_node(node, params):
         node['source'],
         node['call_count']
     )
-    if len(params) > 0:
-        text = '{}\nWith parameters:\n{}'.format(
-            text,
-            '\n'.join([', '.join(param) for param in params])
-        )
+    lines = [line for store in params for line in _get_param_lines(store)]
+    if len(lines) > 0:
+        text = '{}\nWith parameters:\n{}'.format(text, '\n'.join(lines))
     return text
 
 # Returns text containing information about given edge
 def _get_info_text_for_edge(edge):
     text = 'Call made {} times'.format(edge['call_count'])
-    params = edge['params']
-    if len(params) > 0:
-        text = '{}\nWith parameters:\n{}'.format(
-            text,
-            '\n'.join([', '.join(param) for param in params])
-        )
+    lines = _get_param_lines(edge['params'])
+    if len(lines) > 0:
+        text = '{}\nWith parameters:\n{}'.format(text, '\n'.join(lines))
     return text
 
 # Returns label of a given edge based on its parameters
 def _get_param_visuals_for_edge(params):
-    if len(params) == 0:
+    if params.seen() == 0:
         return ''
-    elif len(params) == 1:
-        return ', '.join(params[0])
+    elif params.seen() == 1:
+        return ', '.join(params.get_samples()[0])
     else:
         return '...'
 
-# Returns parameters for a node defined by its id/hash
-def _get_params_of_node(node_id, edges):
-    params_by_calls = [edges[edge]['params'] for edge in edges if str(edge[1]) == node_id]
-    return [params for calls in params_by_calls for params in calls]
+# Returns parameter stores of the edges leading to a node defined by its id
+def _get_params_of_node(node_id, edges, callers):
+    return [edges[(caller, node_id)]['params'] for caller in callers.get(node_id, [])]
+
+# Returns ids of changed nodes extended with nodes called by changed edges
+def _with_called_nodes(node_ids, edge_ids):
+    return node_ids | {called for _, called in edge_ids}, edge_ids
+
+# Returns callers of nodes indexed by the called node
+def _index_callers(edges):
+    callers = {}
+    for caller, called in edges:
+        callers.setdefault(called, []).append(caller)
+    return callers